@@ -1,7 +1,9 @@
+import collections
 import os
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
-from typing import Iterable
+from typing import Callable, Iterable, Iterator
 
 
 def make_tempdir():
@@ -38,3 +40,75 @@ def max_version(data: Iterable[str]) -> str:
         return max(data, key=get_version_key)
     except ValueError as e:
         raise ValueError("passed empty sequence") from e
+
+
+def start_process_pool(jobs: int, **executor_kwargs) -> ProcessPoolExecutor:
+    """
+    Create a ProcessPoolExecutor whose worker processes are started right away, rather than when the first item is
+    submitted.
+
+    Forking while other threads are running is prone to deadlocks in the child processes, e.g., if another thread holds
+    a lock at that moment. Pools which are used from multiple threads must therefore be started before these threads.
+
+    :param jobs: number of worker processes
+    :param executor_kwargs: additional arguments for the ProcessPoolExecutor (e.g., initializer or mp_context)
+    """
+
+    executor = ProcessPoolExecutor(max_workers=jobs, **executor_kwargs)
+
+    # with the fork start method, all workers are started along with the first task
+    executor.submit(int).result()
+
+    return executor
+
+
+def _map_in_pool(executor: ProcessPoolExecutor, func: Callable, iterable: Iterable, max_pending: int) -> Iterator:
+    pending = collections.deque()
+
+    try:
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    finally:
+        # the caller might stop iterating early, there's no need to wait for results nobody is interested in
+        for future in pending:
+            future.cancel()
+
+
+def parallel_map(func: Callable, iterable: Iterable, jobs: int = 1, executor: ProcessPoolExecutor = None,
+                 **executor_kwargs) -> Iterator:
+    """
+    Like map(), but runs func in up to jobs worker processes.
+
+    Only a bounded number of items is read ahead from iterable, so it is safe to pass in (potentially long) streams
+    such as a :class:`BinaryWalker`. Results are yielded in the order of the input, which keeps the output
+    deterministic regardless of the number of workers.
+
+    :param func: picklable callable (e.g., a module level function or a bound method of a picklable object)
+    :param iterable: arguments to call func with
+    :param jobs: number of worker processes; with 1 or less, func is called in the current process
+    :param executor: existing pool with jobs worker processes to use (e.g., one made by :func:`start_process_pool`),
+        which is not shut down afterwards; if None, a pool is created for this call
+    :param executor_kwargs: additional arguments for the ProcessPoolExecutor (e.g., initializer or mp_context)
+    :return: iterator yielding func's results
+    """
+
+    if jobs <= 1:
+        yield from map(func, iterable)
+        return
+
+    # keep all workers busy while we wait for the oldest result, but don't read ahead too far
+    max_pending = jobs * 4
+
+    if executor is not None:
+        yield from _map_in_pool(executor, func, iterable, max_pending)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, **executor_kwargs) as executor:
+        yield from _map_in_pool(executor, func, iterable, max_pending)
@@ -0,0 +1,203 @@
+"""
+Python API for using appimagelint as a library, e.g., to lint AppImages in a long-running service without spawning
+a process per AppImage and parsing its log.
+
+Example::
+
+    from appimagelint.api import Linter, lint
+
+    # one-off
+    report = lint("some.AppImage", checks=["glibc_abi_check"])
+    print(report.success(), report.failed_results())
+
+    # the linter keeps its caches and worker processes around for as long as it's open
+    with Linter(workers=4) as linter:
+        for report in linter.lint_many(paths):
+            ...
+
+appimagelint logs to the loggers below ``appimagelint``, but (unlike the CLI) the API never installs any log handlers.
+Applications may configure logging as usual to see the messages.
+"""
+
+import logging
+import multiprocessing
+from typing import Iterable, Iterator
+
+from .cache import BinaryVersionsCache, ResultCache, get_metadata_caches
+from ._util import parallel_map, start_process_pool
+from .cache.runtime_cache import AppImageRuntimeCache
+from .models import LintReport, LintStats, TestResult
+from .services import AppImageMounter, LintSession
+from .services.batch_linter import BatchLinter
+from .services.checks_manager import ChecksManager
+from .services.result_formatter import ResultFormatter
+
+
+# libraries mustn't print anything unless the application asks for it
+logging.getLogger("appimagelint").addHandler(logging.NullHandler())
+
+
+# state of worker processes, set up by _init_worker
+_worker_linter: "Linter" = None
+
+
+def _init_worker(linter: "Linter"):
+    global _worker_linter
+    _worker_linter = linter
+
+
+def _lint_in_worker(path: str) -> LintReport:
+    return _worker_linter.lint(path)
+
+
+class Linter:
+    """
+    Lints AppImages in the current process (or a pool of worker processes), and returns structured results.
+
+    The checks, the distribution metadata and the runtime are loaded once and reused for all AppImages, as are the
+    worker processes.
+    """
+
+    def __init__(self, checks: Iterable[str] = None, backend: str = LintSession.BACKEND_AUTO,
+                 level: str = LintSession.LEVEL_STANDARD, jobs: int = 1, workers: int = 1,
+                 use_binary_cache: bool = True, use_result_cache: bool = False,
+                 mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT, fail_fast: bool = False,
+                 concurrent_checks: bool = True):
+        """
+        :param checks: IDs of the checks to run (default: all)
+        :param backend: how to access the AppImages' contents, see :class:`LintSession`
+        :param level: how thorough the review should be, see :class:`LintSession`
+        :param jobs: number of worker processes used to scan the binaries within a single AppImage
+        :param workers: number of AppImages :meth:`lint_many` lints concurrently in worker processes
+        :param use_binary_cache: cache the versioned dependencies of binaries in the user cache directory
+        :param use_result_cache: reuse the results of unchanged AppImages stored in the user cache directory
+        :param mount_timeout: maximum time in seconds to wait for an AppImage to be mounted
+        :param fail_fast: stop scanning binaries as soon as the compatibility checks' results cannot change anymore
+        :param concurrent_checks: run independent checks on the same AppImage concurrently
+        :raises KeyError: if any of the checks doesn't exist
+        :raises ValueError: if the backend or level are unknown
+        """
+
+        ChecksManager.init()
+
+        if backend not in LintSession.BACKENDS:
+            raise ValueError("unknown backend: {}".format(backend))
+
+        if level not in LintSession.LEVELS:
+            raise ValueError("unknown level: {}".format(level))
+
+        if checks is None:
+            checks = ChecksManager.list_checks()
+
+        checks = list(checks)
+
+        self._workers = workers
+
+        self._binary_versions_cache = None
+        if use_binary_cache:
+            self._binary_versions_cache = BinaryVersionsCache()
+
+        self._result_cache = None
+        if use_result_cache:
+            self._result_cache = ResultCache()
+
+        # the runtime is not needed for reading the SquashFS images directly
+        custom_runtime = None
+        if backend != LintSession.BACKEND_SQUASHFS:
+            custom_runtime = AppImageRuntimeCache.get_data()
+
+        for cache in get_metadata_caches():
+            cache.get_data()
+
+        self._batch_linter = BatchLinter(
+            checks,
+            custom_runtime=custom_runtime,
+            formatter=ResultFormatter(use_colors=False),
+            jobs=jobs,
+            binary_versions_cache=self._binary_versions_cache,
+            result_cache=self._result_cache,
+            backend=backend,
+            mount_timeout=mount_timeout,
+            level=level,
+            fail_fast=fail_fast,
+            concurrent_checks=concurrent_checks,
+        )
+
+        self._executor = None
+
+    def lint(self, path: str) -> LintReport:
+        """
+        Lint a single AppImage in the current process.
+
+        Errors are not raised, but reported in the returned report (see :meth:`LintReport.error`).
+
+        :param path: path to AppImage (or AppDir)
+        """
+
+        results, stats = self._batch_linter.lint_one_with_stats(path)
+
+        return LintReport(path, results, stats, stats.error())
+
+    def _get_executor(self):
+        if self._executor is None:
+            # forking lets workers inherit the registered checks and the cached data without having to reload them
+            # unlike multiprocessing.Pool's, the executor's workers are not daemonic, and may use worker processes for
+            # scanning binaries themselves
+            mp_context = multiprocessing.get_context("fork")
+            self._executor = start_process_pool(
+                self._workers, mp_context=mp_context, initializer=_init_worker, initargs=(self,)
+            )
+
+        return self._executor
+
+    def lint_many(self, paths: Iterable[str]) -> Iterator[LintReport]:
+        """
+        Lint AppImages concurrently in the worker processes. Paths are read lazily, so that the input can be streamed.
+
+        :param paths: paths to AppImages (or AppDirs)
+        :return: iterator yielding reports in the order of paths
+        """
+
+        if self._workers <= 1:
+            for path in paths:
+                yield self.lint(path)
+            return
+
+        yield from parallel_map(_lint_in_worker, paths, self._workers, executor=self._get_executor())
+
+    def close(self):
+        """
+        Stop the worker processes and close the caches. The linter cannot be used anymore afterwards.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        for cache in (self._binary_versions_cache, self._result_cache):
+            if cache is not None:
+                cache.close()
+
+    def __enter__(self) -> "Linter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def lint(path: str, checks: Iterable[str] = None, backend: str = LintSession.BACKEND_AUTO,
+         level: str = LintSession.LEVEL_STANDARD, **kwargs) -> LintReport:
+    """
+    Lint a single AppImage. To lint more than one AppImage, use a :class:`Linter`, which avoids setting everything
+    up again for every AppImage.
+
+    :param path: path to AppImage (or AppDir)
+    :param checks: IDs of the checks to run (default: all)
+    :param kwargs: further options, see :class:`Linter`
+    """
+
+    with Linter(checks=checks, backend=backend, level=level, **kwargs) as linter:
+        return linter.lint(path)
+
+
+__all__ = ("Linter", "lint", "LintReport", "LintStats", "TestResult")
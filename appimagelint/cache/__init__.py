@@ -13,6 +13,18 @@ from .ubuntu_release_names_cache import UbuntuReleaseNamesCache
 from .distro_codenames import DebianCodenameMapCache
 from .package_version_maps import PackageVersionMapsCache
 from .runtime_cache import AppImageRuntimeCache
+from .binary_versions_cache import BinaryVersionsCache
+from .result_cache import ResultCache
+
+
+def get_metadata_caches():
+    """
+    :return: all caches holding distribution metadata the checks compare against
+    """
+
+    return [DebianCodenameMapCache, UbuntuReleaseNamesCache] + PackageVersionMapsCache.cache_classes()
+
 
 __all__ = ("OutOfDateError", "store_json", "load_json", "CacheBase", "DebianCodenameMapCache", "AppImageRuntimeCache",
-           "PackageVersionMapsCache", "UbuntuReleaseNamesCache")
+           "PackageVersionMapsCache", "UbuntuReleaseNamesCache", "BinaryVersionsCache",
+           "ResultCache", "get_metadata_caches")
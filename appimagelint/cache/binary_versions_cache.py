@@ -0,0 +1,46 @@
+import json
+from typing import Dict, List, Optional
+
+from .sqlite_cache_impl_base import SQLiteCacheBase
+
+
+class BinaryVersionsCache(SQLiteCacheBase):
+    """
+    Persistent cache of the versioned dependencies found in ELF files, keyed by a fingerprint of the files' version
+    information (see :meth:`ElfVersionReader.fingerprint`).
+
+    Many AppImages bundle byte-identical libraries, therefore the results can be shared between AppImages as well as
+    between runs.
+    """
+
+    # bump whenever the format of the stored data or the way they are extracted changes
+    _FORMAT_VERSION = 1
+
+    @staticmethod
+    def _database_file_name() -> str:
+        return "binary_versions.sqlite"
+
+    @staticmethod
+    def _table_name() -> str:
+        return "binary_versions"
+
+    @classmethod
+    def _make_key(cls, fingerprint: str, variant: str) -> str:
+        return "{}:{}:{}".format(cls._FORMAT_VERSION, variant, fingerprint)
+
+    def get(self, fingerprint: str, variant: str = "") -> Optional[Dict[str, List[str]]]:
+        """
+        :param fingerprint: fingerprint of the file
+        :param variant: distinguishes different kinds of data stored for the same file
+        :return: cached data, or None if there is no entry for the file
+        """
+
+        data = self._get_raw(self._make_key(fingerprint, variant))
+
+        if data is None:
+            return None
+
+        return json.loads(data)
+
+    def put(self, fingerprint: str, data: Dict[str, List[str]], variant: str = ""):
+        self._put_raw(self._make_key(fingerprint, variant), json.dumps(data))
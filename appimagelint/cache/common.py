@@ -199,7 +199,9 @@ def get_glibcxx_version_from_debian_package(url: str):
         data_archive_name = glob.glob(os.path.join(d, "data.tar.*"))[0]
         check_call(["tar", "-xvf", data_archive_name], cwd=out_path)
 
-        finder = GnuLibVersionSymbolsFinder(query_deps=True, query_reqs=False)
+        # libstdc++ packages contain a lot of binaries, and bundling the metadata isn't time critical, so we can use all
+        # the CPUs available
+        finder = GnuLibVersionSymbolsFinder(query_deps=True, query_reqs=False, jobs=os.cpu_count() or 1)
         return finder.check_all_executables("GLIBCXX_", out_path)
 
 
@@ -10,8 +10,13 @@ class JSONFileCacheBase(CacheBase):
     """
     Template method kind of class that requires very little configuration by actual instances and implements most
     functionality already, based on primitives.
+
+    Once loaded, the data are kept in memory for the rest of the process's lifetime, so that the cache file has to be
+    read and validated only once. Worker processes forked after a call to :meth:`get_data` share the data.
     """
 
+    _in_memory_data = None
+
     @classmethod
     def _get_logger(cls):
         return _get_cache_logger()
@@ -59,6 +64,8 @@ class JSONFileCacheBase(CacheBase):
         data = cls._fetch_data()
         cls._store(data, path)
 
+        cls._in_memory_data = data
+
     @classmethod
     def get_data(cls, raise_on_error=False) -> Union[Mapping, Iterable]:
         """
@@ -74,6 +81,9 @@ class JSONFileCacheBase(CacheBase):
 
         logger = cls._get_logger()
 
+        if cls._in_memory_data is not None:
+            return cls._in_memory_data
+
         cached_data = None
 
         try:
@@ -93,6 +103,7 @@ class JSONFileCacheBase(CacheBase):
 
             logger.debug("Cache still up to date, no update required")
 
+            cls._in_memory_data = cached_data
             return cached_data
 
         logger.debug("data out of date, updating")
@@ -104,6 +115,9 @@ class JSONFileCacheBase(CacheBase):
                 if cached_data is not None:
                     logger.warning("codebase changed since last update, but updating failed, using cached data")
                     logger.exception(e)
+
+                    # no need to retry the update for every single call
+                    cls._in_memory_data = cached_data
                     return cached_data
                 else:
                     raise
@@ -114,4 +128,5 @@ class JSONFileCacheBase(CacheBase):
         user_cache_file_path = os.path.join(cls._user_cache_base_path(), cls._cache_file_name())
         cls._store(new_data, user_cache_file_path)
 
+        cls._in_memory_data = new_data
         return new_data
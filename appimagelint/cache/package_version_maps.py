@@ -52,6 +52,10 @@ class PackageVersionMapsCache(CacheBase):
         RockyLinuxGlibcxxVersionsCache
     ]
 
+    @classmethod
+    def cache_classes(cls):
+        return list(cls._classes)
+
     @classmethod
     def update_now(cls, save_to_bundled_cache: bool = False):
         for c in cls._classes:
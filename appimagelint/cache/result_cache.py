@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from ..models import TestResult
+from .codebase_hasher import CodebaseHasher
+from .sqlite_cache_impl_base import SQLiteCacheBase
+
+
+class ResultCache(SQLiteCacheBase):
+    """
+    Persistent cache of check results for entire AppImages.
+
+    Results are keyed by the AppImage's content digest, a digest of the code implementing the checks and a digest of
+    the distribution metadata the checks compare against, so that a change to any of them invalidates the results.
+    This allows re-runs on unchanged AppImages to skip mounting and scanning entirely.
+    """
+
+    # bump whenever the format of the stored data changes
+    _FORMAT_VERSION = 2
+
+    # stored like the results of a check, check IDs never contain an @
+    _MAX_VERSIONS_ID = "@max_versions"
+
+    _MAX_FILE_DIGESTS = 100000
+
+    def __init__(self, path: str = None, max_size: int = 256 * 1024 * 1024, max_age: float = 30 * 24 * 60 * 60):
+        super().__init__(path=path, max_size=max_size, max_age=max_age)
+
+        # calculated lazily, as it requires loading all the metadata
+        self._context_digest: str = None
+
+    @staticmethod
+    def _database_file_name() -> str:
+        return "results.sqlite"
+
+    @staticmethod
+    def _table_name() -> str:
+        return "results"
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        super()._create_tables(connection)
+
+        # hashing large AppImages is expensive, therefore we remember the digests of files we have seen before
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS file_digests ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+            "digest TEXT NOT NULL)"
+        )
+
+    def _evict(self, connection: sqlite3.Connection):
+        super()._evict(connection)
+
+        # the digests are small, so it's sufficient to limit their number
+        connection.execute(
+            "DELETE FROM file_digests WHERE rowid NOT IN (SELECT rowid FROM file_digests ORDER BY rowid DESC LIMIT ?)",
+            (self._MAX_FILE_DIGESTS,)
+        )
+
+    @staticmethod
+    def _calculate_file_digest(path: str) -> str:
+        d = hashlib.blake2b(digest_size=20)
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                d.update(chunk)
+
+        return d.hexdigest()
+
+    @staticmethod
+    def _calculate_directory_digest(path: str) -> str:
+        d = hashlib.blake2b(digest_size=20)
+
+        # make sure an AppDir's digest never matches an AppImage's one
+        d.update(b"appdir\0")
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            # os.walk()'s order depends on the filesystem
+            dirnames.sort()
+
+            for name in sorted(dirnames + filenames):
+                entry_path = os.path.join(dirpath, name)
+                stat = os.lstat(entry_path)
+
+                d.update(os.path.relpath(entry_path, path).encode(errors="surrogateescape") + b"\0")
+                d.update(str(stat.st_mode).encode() + b"\0")
+
+                if os.path.islink(entry_path):
+                    d.update(os.readlink(entry_path).encode(errors="surrogateescape") + b"\0")
+
+                elif os.path.isfile(entry_path):
+                    with open(entry_path, "rb") as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            d.update(chunk)
+
+        return d.hexdigest()
+
+    def appimage_digest(self, path: str) -> str:
+        """
+        Calculate content digest of an AppImage. Digests are cached and reused as long as the file's size,
+        modification time and inode don't change.
+
+        AppDirs' digests are calculated from all the files within, and are never cached, as a directory's metadata
+        don't reflect changes to files in subdirectories.
+
+        :param path: path to AppImage or AppDir
+        :return: hex digest
+        """
+
+        path = os.path.abspath(path)
+
+        if os.path.isdir(path):
+            return self._calculate_directory_digest(path)
+
+        stat = os.stat(path)
+        file_id = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+        try:
+            connection = self._connect()
+
+        except (sqlite3.Error, OSError) as e:
+            self._handle_error(e)
+            connection = None
+
+        if connection is not None:
+            try:
+                row = connection.execute(
+                    "SELECT size, mtime_ns, inode, digest FROM file_digests WHERE path = ?", (path,)
+                ).fetchone()
+
+                if row is not None and tuple(row[:3]) == file_id:
+                    return row[3]
+
+            except sqlite3.Error as e:
+                self._handle_error(e)
+                connection = None
+
+        digest = self._calculate_file_digest(path)
+
+        if connection is not None:
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO file_digests (path, size, mtime_ns, inode, digest) VALUES (?, ?, ?, ?, ?)",
+                    (path,) + file_id + (digest,)
+                )
+
+            except sqlite3.Error as e:
+                self._handle_error(e)
+
+        return digest
+
+    def _get_context_digest(self) -> str:
+        if self._context_digest is None:
+            # must not import near top of file to avoid circular imports, the checks depend on the caches
+            from .. import checks, services
+            from . import get_metadata_caches
+
+            code_digest = CodebaseHasher([checks, services]).digest_md5()
+
+            metadata = [cache.get_data() for cache in get_metadata_caches()]
+            metadata_digest = hashlib.md5(json.dumps(metadata, sort_keys=True).encode()).hexdigest()
+
+            self._context_digest = "{}:{}".format(code_digest, metadata_digest)
+
+        return self._context_digest
+
+    def _make_key(self, appimage_digest: str, check_id: str, variant: str) -> str:
+        return "{}:{}:{}:{}:{}".format(
+            self._FORMAT_VERSION, self._get_context_digest(), variant, check_id, appimage_digest
+        )
+
+    def get(self, appimage_digest: str, check_id: str, variant: str = "") -> Optional[List[TestResult]]:
+        """
+        :param appimage_digest: content digest of the AppImage (see :meth:`appimage_digest`)
+        :param check_id: ID of the check
+        :param variant: distinguishes results for the same check obtained with different settings
+        :return: cached results, or None if there is no entry
+        """
+
+        data = self._get_raw(self._make_key(appimage_digest, check_id, variant))
+
+        if data is None:
+            return None
+
+        return [TestResult(i["success"], i["id"], i["message"]) for i in json.loads(data)]
+
+    def put(self, appimage_digest: str, check_id: str, results: Iterable[TestResult], variant: str = ""):
+        data = [{"id": res.id(), "success": res.success(), "message": res.message()} for res in results]
+        self._put_raw(self._make_key(appimage_digest, check_id, variant), json.dumps(data))
+
+    def get_max_versions(self, appimage_digest: str, variant: str = "") -> Optional[Dict[str, str]]:
+        """
+        :param appimage_digest: content digest of the AppImage (see :meth:`appimage_digest`)
+        :param variant: see :meth:`get`
+        :return: highest required version for every prefix stored along with the results, or None if the versions
+            hadn't been determined (i.e., none of the checks needed them)
+        :raises KeyError: if there is no entry
+        """
+
+        data = self._get_raw(self._make_key(appimage_digest, self._MAX_VERSIONS_ID, variant))
+
+        if data is None:
+            raise KeyError(appimage_digest)
+
+        return json.loads(data)
+
+    def put_max_versions(self, appimage_digest: str, max_versions: Optional[Dict[str, str]], variant: str = ""):
+        self._put_raw(self._make_key(appimage_digest, self._MAX_VERSIONS_ID, variant), json.dumps(max_versions))
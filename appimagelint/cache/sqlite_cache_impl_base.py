@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from . import _get_cache_logger
+from .cache_base import CacheBase
+
+
+class SQLiteCacheBase:
+    """
+    Base class for key-value caches stored in an SQLite database in the user cache directory.
+
+    SQLite makes it safe to use the caches from multiple processes concurrently. Entries are evicted in least recently
+    used order once the cache grows beyond its maximum size, and, optionally, once they haven't been used for a given
+    amount of time.
+
+    Caches are optional by design: database errors are logged and disable the cache instead of being raised.
+    """
+
+    # access times are updated lazily to avoid a database write for every single cache hit
+    _ACCESS_TIME_RESOLUTION = 60 * 60
+
+    # check the cache size after this many insertions
+    _EVICTION_INTERVAL = 256
+
+    # connections are shared by all instances using the same database within a process (instances may be unpickled
+    # for every task in worker processes), but must never be shared with forked processes
+    # maps database path to (process ID, connection)
+    _connections: Dict[str, Tuple[int, sqlite3.Connection]] = {}
+
+    # the connections are shared by all threads of the process (e.g., checks run concurrently), which must use them one
+    # at a time, otherwise statements of one thread might end up in another thread's transaction (see _evict)
+    # the lock is replaced in forked processes, which might have been forked while another thread was holding it
+    _lock = threading.RLock()
+
+    def __init__(self, path: str = None, max_size: int = 64 * 1024 * 1024, max_age: float = None):
+        if path is None:
+            path = os.path.join(CacheBase._user_cache_base_path(), self._database_file_name())
+
+        self._path = path
+        self._max_size = max_size
+        self._max_age = max_age
+
+        self._insertions = 0
+
+        # set once an error occurs, the cache is optional after all and must never break a check
+        self._disabled = False
+
+    @staticmethod
+    def _get_logger():
+        return _get_cache_logger()
+
+    @classmethod
+    def _reset_lock(cls):
+        cls._lock = threading.RLock()
+
+    @staticmethod
+    def _database_file_name() -> str:
+        """
+        Get database file name. Must be overridden by subclasses.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _table_name() -> str:
+        """
+        Get name of the table storing the entries. Must be overridden by subclasses.
+        """
+        raise NotImplementedError
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        table = self._table_name()
+
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "key TEXT PRIMARY KEY, data TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)".format(table)
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS {0}_last_used ON {0} (last_used)".format(table))
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._disabled:
+            return None
+
+        try:
+            pid, connection = self._connections[self._path]
+
+            if pid == os.getpid():
+                return connection
+
+        except KeyError:
+            pass
+
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+
+        # the connection is shared by all threads of the process, see _lock
+        connection = sqlite3.connect(self._path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables(connection)
+
+        self._connections[self._path] = (os.getpid(), connection)
+
+        return connection
+
+    def _handle_error(self, e: Exception):
+        self._get_logger().warning("{} unavailable, disabling it: {}".format(self._database_file_name(), e))
+        self._disabled = True
+
+    def _get_raw(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get_raw_locked(key)
+
+    def _get_raw_locked(self, key: str) -> Optional[str]:
+        table = self._table_name()
+
+        try:
+            connection = self._connect()
+
+            if connection is None:
+                return None
+
+            row = connection.execute("SELECT data, last_used FROM {} WHERE key = ?".format(table), (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            data, last_used = row
+
+            now = time.time()
+
+            if self._max_age is not None and last_used + self._max_age < now:
+                return None
+
+            if last_used + self._ACCESS_TIME_RESOLUTION < now:
+                connection.execute("UPDATE {} SET last_used = ? WHERE key = ?".format(table), (now, key))
+
+        except (sqlite3.Error, OSError) as e:
+            self._handle_error(e)
+            return None
+
+        return data
+
+    def _put_raw(self, key: str, data: str):
+        with self._lock:
+            self._put_raw_locked(key, data)
+
+    def _put_raw_locked(self, key: str, data: str):
+        try:
+            connection = self._connect()
+
+            if connection is None:
+                return
+
+            connection.execute(
+                "INSERT OR REPLACE INTO {} (key, data, size, last_used) VALUES (?, ?, ?, ?)".format(self._table_name()),
+                (key, data, len(key) + len(data), time.time())
+            )
+
+            self._insertions += 1
+            if self._insertions % self._EVICTION_INTERVAL == 0:
+                self._evict(connection)
+
+        except (sqlite3.Error, OSError) as e:
+            self._handle_error(e)
+
+    def _evict(self, connection: sqlite3.Connection):
+        table = self._table_name()
+
+        if self._max_age is not None:
+            connection.execute("DELETE FROM {} WHERE last_used < ?".format(table), (time.time() - self._max_age,))
+
+        total_size, = connection.execute("SELECT COALESCE(SUM(size), 0) FROM {}".format(table)).fetchone()
+
+        if total_size <= self._max_size:
+            return
+
+        self._get_logger().debug("{} size {} exceeds limit, evicting entries".format(table, total_size))
+
+        # free some more space than strictly necessary to avoid having to evict again right away
+        to_free = total_size - self._max_size * 3 // 4
+
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            keys = []
+
+            for key, size in connection.execute("SELECT key, size FROM {} ORDER BY last_used".format(table)):
+                if to_free <= 0:
+                    break
+
+                keys.append((key,))
+                to_free -= size
+
+            connection.executemany("DELETE FROM {} WHERE key = ?".format(table), keys)
+
+        except:  # noqa
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+    def close(self):
+        """
+        Evict entries if necessary, and close the connection used by the current process.
+        """
+
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        try:
+            pid, connection = self._connections.pop(self._path)
+
+        except KeyError:
+            return
+
+        if pid != os.getpid():
+            return
+
+        try:
+            self._evict(connection)
+            connection.close()
+
+        except (sqlite3.Error, OSError) as e:
+            self._handle_error(e)
+
+
+os.register_at_fork(after_in_child=SQLiteCacheBase._reset_lock)
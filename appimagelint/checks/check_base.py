@@ -1,18 +1,64 @@
 import logging
 
-from typing import Iterator
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
 from appimagelint._logging import make_logger
-from ..models import AppImage, TestResult
+from ..models import TestResult
+from ..services import LintSession, PayloadInventory
 
 
 class CheckBase:
-    def __init__(self, appimage: AppImage):
-        self._appimage = appimage
+    def __init__(self, session: LintSession):
+        self._session = session
+        self._appimage = session.appimage()
 
     def run(self) -> Iterator[TestResult]:
         raise NotImplementedError
 
+    @staticmethod
+    def supported_levels() -> Tuple[str, ...]:
+        """
+        Lint levels (see :class:`LintSession`) the check runs on. Checks which need to scan the entire payload must not
+        declare support for the quick level.
+        """
+        return LintSession.LEVELS
+
+    @staticmethod
+    def required_files(inventory: PayloadInventory, level: str) -> Optional[Iterable[str]]:
+        """
+        Paths of the files in the payload the check needs to access. Used to extract only these files instead of the
+        entire payload. Symlinks' targets are extracted automatically.
+
+        :param inventory: payload to select files from
+        :param level: lint level the check is run on
+        :return: paths relative to the payload root, or None if the check needs the entire payload
+        """
+        return None
+
+    @staticmethod
+    def required_artifacts() -> Tuple[str, ...]:
+        """
+        Artifacts of the session (see :attr:`LintSession.ARTIFACTS`) the check needs. They are computed before the
+        check is run, and checks which don't depend on each other's artifacts are run concurrently (see
+        :class:`CheckScheduler`). Undeclared artifacts are still computed on first use, but can't be computed ahead of
+        time then.
+
+        :return: names of the artifacts
+        """
+        return ()
+
+    @classmethod
+    def verdict_settling_versions(cls) -> Optional[Dict[str, str]]:
+        """
+        Versions of GNU libraries beyond which the check's verdict cannot change anymore: once the AppImage requires a
+        newer version than this for every prefix, scanning more binaries won't change any of the results. Used to stop
+        scanning early in fail-fast mode.
+
+        :return: versions keyed by prefix (e.g., {"GLIBC_": "2.39"}), or None if the check's results don't depend on
+            versioned dependencies
+        """
+        return None
+
     @classmethod
     def get_logger(cls):
         return make_logger(cls.id())
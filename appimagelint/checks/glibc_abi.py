@@ -1,11 +1,11 @@
 from . import GnuAbiCheckBase
 from ..cache.package_version_maps import DebianGlibcVersionsCache, UbuntuGlibcVersionsCache, RockyLinuxGlibcVersionsCache
-from ..models import AppImage
+from ..services import LintSession
 
 
 class GlibcABICheck(GnuAbiCheckBase):
-    def __init__(self, appimage: AppImage):
-        super().__init__(appimage)
+    def __init__(self, session: LintSession):
+        super().__init__(session)
 
     @staticmethod
     def _library_id():
@@ -15,9 +15,9 @@ class GlibcABICheck(GnuAbiCheckBase):
     def name():
         return "GNU libc ABI check"
 
-    @classmethod
-    def _detect_versions_in_file(cls, path):
-        return cls._gnu_lib_versions_symbol_finder.detect_gnu_lib_versions("GLIBC_", path)
+    @staticmethod
+    def _version_prefix():
+        return "GLIBC_"
 
     @classmethod
     def _get_debian_versions_map(cls):
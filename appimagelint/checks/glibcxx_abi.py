@@ -1,12 +1,12 @@
 from . import GnuAbiCheckBase
 from ..cache.package_version_maps import DebianGlibcxxVersionsCache, UbuntuGlibcxxVersionsCache, \
     RockyLinuxGlibcxxVersionsCache
-from ..models import AppImage
+from ..services import LintSession
 
 
 class GlibcxxABICheck(GnuAbiCheckBase):
-    def __init__(self, appimage: AppImage):
-        super().__init__(appimage)
+    def __init__(self, session: LintSession):
+        super().__init__(session)
 
     @staticmethod
     def _library_id():
@@ -16,9 +16,9 @@ class GlibcxxABICheck(GnuAbiCheckBase):
     def name():
         return "GNU libstdc++ ABI check"
 
-    @classmethod
-    def _detect_versions_in_file(cls, path):
-        return cls._gnu_lib_versions_symbol_finder.detect_gnu_lib_versions("GLIBCXX_", path)
+    @staticmethod
+    def _version_prefix():
+        return "GLIBCXX_"
 
     @classmethod
     def _get_debian_versions_map(cls):
@@ -1,23 +1,21 @@
-import logging
-import packaging.version
-from typing import Iterator
+from typing import Dict, Iterator, Optional, Tuple
 
 from .._logging import make_logger
-from ..services import GnuLibVersionSymbolsFinder
 from ..cache import DebianCodenameMapCache
 from ..cache.common import get_debian_releases, get_ubuntu_releases, get_rocky_linux_releases
-from ..models import TestResult
-from ..services import BinaryWalker
-from ..models import AppImage
+from ..models import DistroCompatIndex, SupportedRelease, TestResult
+from ..services import LintSession, PayloadInventory
 from .._util import max_version
 from . import CheckBase
 
 
 class GnuAbiCheckBase(CheckBase):
-    _gnu_lib_versions_symbol_finder = GnuLibVersionSymbolsFinder(query_reqs=True, query_deps=False)
+    _DISTRO_DEBIAN = "debian"
+    _DISTRO_UBUNTU = "ubuntu"
+    _DISTRO_ROCKY_LINUX = "rockylinux"
 
-    def __init__(self, appimage: AppImage):
-        super().__init__(appimage)
+    def __init__(self, session: LintSession):
+        super().__init__(session)
 
     @classmethod
     def id(cls):
@@ -31,55 +29,141 @@ class GnuAbiCheckBase(CheckBase):
     def name():
         raise NotImplementedError()
 
-    @classmethod
-    def _detect_versions_in_file(cls, path):
+    @staticmethod
+    def _version_prefix():
+        """
+        Prefix of the versioned symbols of the library, e.g., GLIBC_.
+        """
         raise NotImplementedError
 
     @staticmethod
     def _library_id():
         raise NotImplementedError
 
-    def run(self) -> Iterator[TestResult]:
-        versions = set()
+    @staticmethod
+    def required_artifacts():
+        return LintSession.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS,
+
+    @staticmethod
+    def required_files(inventory: PayloadInventory, level: str):
+        # the runtime is scanned directly, the payload's ELF files are all we need
+        # on the quick level, only the runtime is checked
+        if level == LintSession.LEVEL_QUICK:
+            return []
+
+        return inventory.binaries()
+
+    # compiled indices, keyed by check class, along with the version maps and releases they were compiled from
+    _compat_indices: Dict[type, Tuple[tuple, tuple, DistroCompatIndex]] = {}
+
+    @classmethod
+    def _compile_compat_index(cls) -> DistroCompatIndex:
+        releases = []
+
+        codename_map = cls._get_debian_codename_map()
+        debian_versions_map = cls._get_debian_versions_map()
 
+        for release in get_debian_releases():
+            codename = codename_map[release]
+
+            max_supported_version = None
+            try:
+                max_supported_version = debian_versions_map[codename]
+            except KeyError:
+                cls.get_logger().warning("could not find version for {}, trying backports".format(release))
+
+                try:
+                    max_supported_version = debian_versions_map["{}-backports".format(codename)]
+                except KeyError:
+                    cls.get_logger().error(
+                        "could not find version for {} in backports either, aborting check".format(release)
+                    )
+
+            releases.append(SupportedRelease(cls._DISTRO_DEBIAN, release, max_supported_version, codename=codename))
+
+        ubuntu_versions_map = cls._get_ubuntu_versions_map()
+
+        for release in get_ubuntu_releases():
+            releases.append(SupportedRelease(cls._DISTRO_UBUNTU, release, ubuntu_versions_map[release]))
+
+        rocky_linux_versions_map = cls._get_rocky_linux_versions_map()
+
+        for release in get_rocky_linux_releases():
+            releases.append(SupportedRelease(cls._DISTRO_ROCKY_LINUX, release, rocky_linux_versions_map[release]))
+
+        return DistroCompatIndex(releases)
+
+    @classmethod
+    def compat_index(cls) -> DistroCompatIndex:
+        """
+        Index of the releases of all distros checked, and the highest version of the library they provide.
+
+        The index is compiled on first use, and recompiled only if the underlying caches are updated.
+        """
+
+        # the caches keep their data in memory, an update replaces the objects
+        maps = (
+            cls._get_debian_codename_map(), cls._get_debian_versions_map(), cls._get_ubuntu_versions_map(),
+            cls._get_rocky_linux_versions_map(),
+        )
+        releases = (get_debian_releases(), get_ubuntu_releases(), get_rocky_linux_releases())
+
+        cached = cls._compat_indices.get(cls)
+
+        if cached is None or cached[1] != releases or any(a is not b for a, b in zip(cached[0], maps)):
+            cached = (maps, releases, cls._compile_compat_index())
+            cls._compat_indices[cls] = cached
+
+        return cached[2]
+
+    @classmethod
+    def verdict_settling_versions(cls) -> Optional[Dict[str, str]]:
+        newest_version = cls.compat_index().newest_version()
+
+        if newest_version is None:
+            return None
+
+        # once the required version is newer than what the newest release supports, all checks fail
+        return {cls._version_prefix(): newest_version}
+
+    def run(self) -> Iterator[TestResult]:
         logger = self.get_logger()
 
-        versions.update(self._detect_versions_in_file(self._appimage.path()))
+        # the table is shared with all other GNU ABI checks, the binaries are scanned only once
+        requirements = self._session.gnu_lib_version_requirements()
 
-        logger.info("detected required version for runtime: "
-                    "{}".format(max_version(versions) if versions else "<none>"))
+        versions = requirements.runtime_versions(self._version_prefix())
 
-        with self._appimage.mount() as mountpoint:
-            payload_versions = set()
+        # AppDirs don't have a runtime yet
+        if not self._appimage.is_appdir():
+            logger.info("detected required version for runtime: "
+                        "{}".format(max_version(versions) if versions else "<none>"))
 
-            for executable in BinaryWalker(mountpoint):
-                # this check takes advantage of libc embedding static symbols into the binary depending on what
-                # features are used
-                # even binaries built on newer platforms may be running on older systems unless such features are used
-                # example: a simple hello world built on bionic can run fine on trusty just fine
-                executable_versions = self._detect_versions_in_file(executable)
-                payload_versions.update(executable_versions)
+        payload_versions = requirements.payload_versions(self._version_prefix())
 
-            versions.update(payload_versions)
+        versions.update(payload_versions)
 
-            if payload_versions:
-                logger.info("detected required version for payload: "
-                            "{}".format(max_version(payload_versions) if versions else "<none>"))
+        if payload_versions:
+            logger.info("detected required version for payload: "
+                        "{}".format(max_version(payload_versions) if versions else "<none>"))
 
         if not versions:
             logger.warning("could not find any dependencies, skipping check")
             return
 
-        required_version = packaging.version.Version(max_version(versions))
+        required_version = max_version(versions)
         logger.debug("overall required version: {}".format(required_version))
 
-        for result in self._check_debian_compat(required_version):
+        # compiled once, and shared by all AppImages checked
+        index = self.compat_index()
+
+        for result in self._check_debian_compat(index, required_version):
             yield result
 
-        for result in self._check_ubuntu_compat(required_version):
+        for result in self._check_ubuntu_compat(index, required_version):
             yield result
 
-        for result in self._check_rocky_linux_compat(required_version):
+        for result in self._check_rocky_linux_compat(index, required_version):
             yield result
 
     @classmethod
@@ -98,64 +182,46 @@ class GnuAbiCheckBase(CheckBase):
     def _get_rocky_linux_versions_map(cls):
         raise NotImplementedError()
 
-    @classmethod
-    def _check_debian_compat(cls, required_version: packaging.version.Version) -> Iterator[TestResult]:
-        codename_map = cls._get_debian_codename_map()
-        versions_map = cls._get_debian_versions_map()
-
-        for release in get_debian_releases():
-            codename = codename_map[release]
+    @staticmethod
+    def _check_compat(index: DistroCompatIndex, required_version: str,
+                      distro: str) -> Iterator[Tuple[SupportedRelease, bool]]:
+        supporting_releases = {id(i) for i in index.supporting_releases(required_version, distro)}
 
-            max_supported_version = None
-            try:
-                max_supported_version = versions_map[codename]
-            except KeyError:
-                cls.get_logger().warning("could not find version for {}, trying backports".format(release))
+        for release in index.releases(distro):
+            yield release, id(release) in supporting_releases
 
-                try:
-                    max_supported_version = versions_map["{}-backports".format(codename)]
-                except KeyError:
-                    cls.get_logger().error(
-                        "could not find version for {} in backports either, aborting check".format(release)
-                    )
+    @classmethod
+    def _check_debian_compat(cls, index: DistroCompatIndex, required_version: str) -> Iterator[TestResult]:
+        logger = cls.get_logger()
+        prefix = cls._test_result_id_prefix()
 
-            if max_supported_version is None:
-                should_run = False
-            else:
-                should_run = required_version <= packaging.version.parse(max_supported_version)
-            
-            test_result_id = "{}_{}_{}".format(cls._test_result_id_prefix(), "debian", release)
-            test_result_msg = "AppImage can run on Debian {} ({})".format(release, codename)
+        for release, should_run in cls._check_compat(index, required_version, cls._DISTRO_DEBIAN):
+            test_result_id = "{}_{}_{}".format(prefix, "debian", release.release)
+            test_result_msg = "AppImage can run on Debian {} ({})".format(release.release, release.codename)
 
-            cls.get_logger().debug("Debian {} max supported version: {}".format(release, max_supported_version))
+            logger.debug("Debian {} max supported version: {}".format(release.release, release.max_version))
             yield TestResult(should_run, test_result_id, test_result_msg)
 
     @classmethod
-    def _check_ubuntu_compat(cls, required_version: packaging.version.Version) -> Iterator[TestResult]:
-        versions_map = cls._get_ubuntu_versions_map()
-
-        for release in get_ubuntu_releases():
-            max_supported_version = versions_map[release]
+    def _check_ubuntu_compat(cls, index: DistroCompatIndex, required_version: str) -> Iterator[TestResult]:
+        logger = cls.get_logger()
+        prefix = cls._test_result_id_prefix()
 
-            should_run = required_version <= packaging.version.Version(max_supported_version)
+        for release, should_run in cls._check_compat(index, required_version, cls._DISTRO_UBUNTU):
+            test_result_id = "{}_{}_{}".format(prefix, "ubuntu", release.release)
+            test_result_msg = "AppImage can run on Ubuntu {}".format(release.release)
 
-            test_result_id = "{}_{}_{}".format(cls._test_result_id_prefix(), "ubuntu", release)
-            test_result_msg = "AppImage can run on Ubuntu {}".format(release)
-
-            cls.get_logger().debug("Ubuntu {} max supported version: {}".format(release, max_supported_version))
+            logger.debug("Ubuntu {} max supported version: {}".format(release.release, release.max_version))
             yield TestResult(should_run, test_result_id, test_result_msg)
 
     @classmethod
-    def _check_rocky_linux_compat(cls, required_version: packaging.version.Version) -> Iterator[TestResult]:
-        versions_map = cls._get_rocky_linux_versions_map()
-
-        for release in get_rocky_linux_releases():
-            max_supported_version = versions_map[release]
-
-            should_run = required_version <= packaging.version.Version(max_supported_version)
+    def _check_rocky_linux_compat(cls, index: DistroCompatIndex, required_version: str) -> Iterator[TestResult]:
+        logger = cls.get_logger()
+        prefix = cls._test_result_id_prefix()
 
-            test_result_id = "{}_{}_{}".format(cls._test_result_id_prefix(), "ubuntu", release)
-            test_result_msg = "AppImage can run on Rocky Linux {}".format(release)
+        for release, should_run in cls._check_compat(index, required_version, cls._DISTRO_ROCKY_LINUX):
+            test_result_id = "{}_{}_{}".format(prefix, "ubuntu", release.release)
+            test_result_msg = "AppImage can run on Rocky Linux {}".format(release.release)
 
-            cls.get_logger().debug("Rocky Linux {} max supported version: {}".format(release, max_supported_version))
+            logger.debug("Rocky Linux {} max supported version: {}".format(release.release, release.max_version))
             yield TestResult(should_run, test_result_id, test_result_msg)
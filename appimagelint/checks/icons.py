@@ -8,15 +8,15 @@ from PIL import Image
 
 from appimagelint._logging import make_logger
 from appimagelint.models import TestResult
-from ..models import AppImage
+from ..services import LintSession, PayloadInventory
 from . import CheckBase
 
 
 class IconsCheck(CheckBase):
     _KNOWN_RESOLUTIONS = (8, 16, 32, 48, 56, 64, 128, 192, 256, 384, 512)
 
-    def __init__(self, appimage: AppImage):
-        super().__init__(appimage)
+    def __init__(self, session: LintSession):
+        super().__init__(session)
 
     @staticmethod
     def name():
@@ -26,171 +26,190 @@ class IconsCheck(CheckBase):
     def id():
         return "icons_check"
 
+    @staticmethod
+    def required_artifacts():
+        return LintSession.ARTIFACT_INVENTORY,
+
+    @staticmethod
+    def required_files(inventory: PayloadInventory, level: str):
+        # the main icon's name is read from the desktop file, so we just pick all candidates in the AppDir root
+        root_files = inventory.glob("*.*") + inventory.glob(".DirIcon")
+
+        if level == LintSession.LEVEL_QUICK:
+            return root_files
+
+        return root_files + inventory.glob("usr/share/icons/**")
+
     def run(self):
         logger = self.get_logger()
 
-        with self._appimage.mount() as mountpoint:
-            # find desktop file, get name of icon and look for it in AppDir root
-            desktop_files = glob.glob(op.join(mountpoint, "*.desktop"))
+        inventory = self._session.inventory()
 
-            # we can of course check the validity of all icon files we find, but there's always one main icon that is
-            # referenced from the desktop file
-            main_icon_name = None
+        # find desktop file, get name of icon and look for it in AppDir root
+        desktop_files = inventory.glob("*.desktop")
 
-            if not desktop_files:
-                logger.error("Could not find desktop file in root directory")
+        # we can of course check the validity of all icon files we find, but there's always one main icon that is
+        # referenced from the desktop file
+        main_icon_name = None
 
-            else:
-                logger.debug("Found desktop files: %s", desktop_files)
+        if not desktop_files:
+            logger.error("Could not find desktop file in root directory")
 
-                desktop_file = desktop_files[0]
-                logger.info("Extracting icon name from desktop file: %s", desktop_file)
+        else:
+            logger.debug("Found desktop files: %s", desktop_files)
 
-                with open(desktop_file) as f:
-                    # find Icon= entry and get the name of the icon file to look for
-                    # we don't need to check things like "is there just one Icon entry" etc., that's the job of another
-                    # test
-                    desktop_file_contents = f.read()
+            desktop_file = desktop_files[0]
+            logger.info("Extracting icon name from desktop file: %s", desktop_file)
 
-                    # note for self: Python's re doesn't do multiline unless explicitly asked for with re.MULTILINE
-                    match = re.search(r"Icon=(.+)", desktop_file_contents)
+            with inventory.open(desktop_file) as f:
+                # find Icon= entry and get the name of the icon file to look for
+                # we don't need to check things like "is there just one Icon entry" etc., that's the job of another
+                # test
+                desktop_file_contents = f.read().decode(errors="replace")
 
-                    if not match:
-                        logger.error("Could not find Icon= entry in desktop file")
-                    else:
-                        main_icon_name = match.group(1)
+                # note for self: Python's re doesn't do multiline unless explicitly asked for with re.MULTILINE
+                match = re.search(r"Icon=(.+)", desktop_file_contents)
 
-            # to be able to filter out non-icon files with the same prefix in the AppDir root
-            known_image_exts = ("png", "xpm", "svg", "jpg")
+                if not match:
+                    logger.error("Could not find Icon= entry in desktop file")
+                else:
+                    main_icon_name = match.group(1)
 
-            # assuming test broke
-            # now prove me wrong!
-            root_icon_valid = False
+        # to be able to filter out non-icon files with the same prefix in the AppDir root
+        known_image_exts = ("png", "xpm", "svg", "jpg")
 
-            if main_icon_name is not None:
-                if "/" in main_icon_name:
-                    logger.error("main icon name is a path, not a filename (contains /)")
-                else:
-                    # properly escape some "magic" characters in the original filename so they won't be interpreted by glob
-                    fixed_main_icon_name = glob.escape(main_icon_name)
+        # assuming test broke
+        # now prove me wrong!
+        root_icon_valid = False
 
-                    # build glob pattern
-                    pattern = "{}.*".format(fixed_main_icon_name)
+        if main_icon_name is not None:
+            if "/" in main_icon_name:
+                logger.error("main icon name is a path, not a filename (contains /)")
+            else:
+                # properly escape some "magic" characters in the original filename so they won't be interpreted by glob
+                fixed_main_icon_name = glob.escape(main_icon_name)
 
-                    logger.debug("Trying to find main icon in AppDir root, pattern: {}".format(repr(pattern)))
+                # build glob pattern
+                pattern = "{}.*".format(fixed_main_icon_name)
 
-                    appdir_root_icons = glob.glob(op.join(mountpoint, pattern))
+                logger.debug("Trying to find main icon in AppDir root, pattern: {}".format(repr(pattern)))
 
-                    if not appdir_root_icons:
-                        logger.error("Could not find suitable icon for desktop file's Icon= entry")
+                appdir_root_icons = inventory.glob(pattern)
 
-                    else:
-                        # filter out all files with a not-well-known extension
-                        appdir_root_icons = [i for i in appdir_root_icons if
-                                             op.splitext(i)[-1].lstrip(".") in known_image_exts]
+                if not appdir_root_icons:
+                    logger.error("Could not find suitable icon for desktop file's Icon= entry")
 
-                        if len(appdir_root_icons) > 1:
-                            logger.warning("Multiple matching icons found in AppDir root, checking all")
+                else:
+                    # filter out all files with a not-well-known extension
+                    appdir_root_icons = [i for i in appdir_root_icons if
+                                         op.splitext(i)[-1].lstrip(".") in known_image_exts]
 
-                        main_icon_check_results = []
-                        for icon in appdir_root_icons:
-                            valid = self._check_icon_for_valid_resolution(icon)
-                            main_icon_check_results.append(valid)
+                    if len(appdir_root_icons) > 1:
+                        logger.warning("Multiple matching icons found in AppDir root, checking all")
 
-                        # if only one of the checks failed, we can't guarantee a working root icon
-                        root_icon_valid = all(main_icon_check_results)
+                    main_icon_check_results = []
+                    for icon in appdir_root_icons:
+                        valid = self._check_icon_for_valid_resolution(icon)
+                        main_icon_check_results.append(valid)
 
-            yield TestResult(root_icon_valid, "icons.valid_appdir_root_icon", "Valid icon in AppDir root")
+                    # if only one of the checks failed, we can't guarantee a working root icon
+                    root_icon_valid = all(main_icon_check_results)
 
-            # next, check that .DirIcon is available and valid
-            dotdiricon_valid = self._check_icon_for_valid_resolution(op.join(mountpoint, ".DirIcon"))
-            yield TestResult(dotdiricon_valid, "icons.valid_dotdiricon", "Valid icon file in .DirIcon")
+        yield TestResult(root_icon_valid, "icons.valid_appdir_root_icon", "Valid icon in AppDir root")
 
-            # now check all remaining icons in usr/share/icons/...
-            other_icons_root_path = op.join(mountpoint, "usr/share/icons/**/*.*")
-            other_icons = glob.glob(other_icons_root_path, recursive=True)
+        # next, check that .DirIcon is available and valid
+        dotdiricon_valid = self._check_icon_for_valid_resolution(".DirIcon")
+        yield TestResult(dotdiricon_valid, "icons.valid_dotdiricon", "Valid icon file in .DirIcon")
 
-            # assume everything works
-            # prove me wrong!
-            other_icons_checks_success = True
+        # the integration icons are spread all over usr/share/icons, which is too expensive for the quick level
+        if self._session.level() == LintSession.LEVEL_QUICK:
+            logger.info("Quick level, skipping check of other integration icons")
+            return
 
-            for abs_path in other_icons:
-                # check if this icon even belongs to here
-                rel_path = op.relpath(abs_path, op.join(mountpoint, "usr/share/icons"))
-                filename = op.basename(abs_path)
+        # now check all remaining icons in usr/share/icons/...
+        other_icons = inventory.glob("usr/share/icons/**/*.*")
 
-                split_fname = op.splitext(filename)
+        # assume everything works
+        # prove me wrong!
+        other_icons_checks_success = True
 
-                # not an error, but means we don't have to process that file any further
-                if split_fname[0] != main_icon_name:
-                    logger.warning("Icon found whose file name doesn't match the Icon= entry in desktop file: %s",
-                        rel_path)
+        for icon_path in other_icons:
+            # check if this icon even belongs to here
+            rel_path = op.relpath(icon_path, "usr/share/icons")
+            filename = op.basename(icon_path)
 
-                else:
-                    # also just a warning
-                    if split_fname[1].lstrip(".") not in known_image_exts:
-                       logger.warning("Icon has invalid extension: %s", split_fname[1])
+            split_fname = op.splitext(filename)
 
-                    logger.debug("checking whether icon has good resolution in general")
-                    if not self._check_icon_for_valid_resolution(abs_path):
-                        logger.warning("icon %s has invalid resolution", abs_path)
-                        other_icons_checks_success = False
+            # not an error, but means we don't have to process that file any further
+            if split_fname[0] != main_icon_name:
+                logger.warning("Icon found whose file name doesn't match the Icon= entry in desktop file: %s",
+                    rel_path)
+
+            else:
+                # also just a warning
+                if split_fname[1].lstrip(".") not in known_image_exts:
+                   logger.warning("Icon has invalid extension: %s", split_fname[1])
+
+                logger.debug("checking whether icon has good resolution in general")
+                if not self._check_icon_for_valid_resolution(icon_path):
+                    logger.warning("icon %s has invalid resolution", icon_path)
+                    other_icons_checks_success = False
 
-                    logger.debug("checking whether icon is in correct location")
+                logger.debug("checking whether icon is in correct location")
 
-                    # split path into the interesting components: icon theme, resolution and actual filename
-                    split_path = rel_path.split("/")
+                # split path into the interesting components: icon theme, resolution and actual filename
+                split_path = rel_path.split("/")
 
-                    # find resolution component in split path
-                    path_res = None
+                # find resolution component in split path
+                path_res = None
 
-                    def extract_res_from_path_component(s):
-                        if s == "scalable":
-                            return s
-                        return tuple([int(i) for i in s.split("x")])
+                def extract_res_from_path_component(s):
+                    if s == "scalable":
+                        return s
+                    return tuple([int(i) for i in s.split("x")])
 
-                    if len(split_path) != 4 or split_path[2] != "apps":
-                        logger.warning("Icon %s is in non-standard location", rel_path)
-                    else:
+                if len(split_path) != 4 or split_path[2] != "apps":
+                    logger.warning("Icon %s is in non-standard location", rel_path)
+                else:
+                    try:
+                        path_res = extract_res_from_path_component(split_path[1])
+                    except:
+                        pass
+
+                if not path_res:
+                    # something's definitely broken
+                    other_icons_checks_success = False
+
+                    logger.warning("Could not find icon resolution at expected position in path, "
+                                   "trying to guess from entire path")
+                    for comp in split_path:
                         try:
-                            path_res = extract_res_from_path_component(split_path[1])
+                            path_res = extract_res_from_path_component(comp)
                         except:
                             pass
+                        else:
+                            break
 
-                    if not path_res:
-                        # something's definitely broken
-                        other_icons_checks_success = False
+                if not path_res:
+                    other_icons_checks_success = False
+                    logger.error("Could not extract resolution from icon path,"
+                                 "should be usr/share/icons/<theme>/<res>/apps/<name>.<ext>")
 
-                        logger.warning("Could not find icon resolution at expected position in path, "
-                                       "trying to guess from entire path")
-                        for comp in split_path:
-                            try:
-                                path_res = extract_res_from_path_component(comp)
-                            except:
-                                pass
-                            else:
-                                break
-
-                    if not path_res:
+                else:
+                    # make sure extracted resolution corresponds to the file's resolution
+                    actual_res = self._get_icon_res(icon_path)
+                    if actual_res != path_res:
                         other_icons_checks_success = False
-                        logger.error("Could not extract resolution from icon path,"
-                                     "should be usr/share/icons/<theme>/<res>/apps/<name>.<ext>")
-
-                    else:
-                        # make sure extracted resolution corresponds to the file's resolution
-                        actual_res = self._get_icon_res(abs_path)
-                        if actual_res != path_res:
-                            other_icons_checks_success = False
-                            logger.error("Icon resolution doesn't match resolution in path: %s (file resolution is %s)",
-                                         path_res, actual_res)
+                        logger.error("Icon resolution doesn't match resolution in path: %s (file resolution is %s)",
+                                     path_res, actual_res)
 
-            if not other_icons_checks_success:
-                logger.warning("no other icons found")
+        if not other_icons_checks_success:
+            logger.warning("no other icons found")
 
-            yield TestResult(other_icons_checks_success, "icons.valid_other_icons", "Other integration icons valid")
+        yield TestResult(other_icons_checks_success, "icons.valid_other_icons", "Other integration icons valid")
 
     def _get_svg_icon_res(self, icon_path: str) -> Union[Tuple[float, float], None]:
-        with open(icon_path) as f:
+        with self._session.inventory().open(icon_path) as f:
             # own crappy SVG parsing just to get the height and width, if possible
             # only needed for the warning about non-square-ish icons
             et = ET.parse(f)
@@ -217,13 +236,19 @@ class IconsCheck(CheckBase):
         if op.splitext(icon_path)[-1] == ".svg":
             return True
 
+        # the inventory recognizes most raster images by their magic bytes, which saves us from reading the file
+        if self._session.inventory().magic(icon_path) in (
+            PayloadInventory.MAGIC_PNG, PayloadInventory.MAGIC_JPEG, PayloadInventory.MAGIC_XPM
+        ):
+            return False
+
         # for .DirIcon we actually have to look into the file to check if it's an SVG by guessing based on file
         # contents
-        with open(icon_path) as f:
+        with self._session.inventory().open(icon_path) as f:
             try:
                 data = f.read()
 
-                if not "svg" in data:
+                if not b"svg" in data:
                     return False
 
                 root: ET.Element = ET.fromstring(data)
@@ -263,10 +288,11 @@ class IconsCheck(CheckBase):
 
         else:
             try:
-                im = Image.open(icon_path)
+                with self._session.inventory().open(icon_path) as f:
+                    im = Image.open(f)
 
-                logger.debug("format: %s -- resolution: %s, mode: %s", im.format, im.size, im.mode)
-                return im.size
+                    logger.debug("format: %s -- resolution: %s, mode: %s", im.format, im.size, im.mode)
+                    return im.size
 
             except:  # noqa
                 logger.exception("Failed to identify icon %s", icon_path, )
@@ -3,13 +3,12 @@ import logging
 from . import GnuAbiCheckBase
 from .._logging import make_logger
 from ..cache.package_version_maps import DebianGlibcVersionsCache, UbuntuGlibcVersionsCache
-from ..models import AppImage
-from ..services import GnuLibVersionSymbolsFinder
+from ..services import LintSession
 
 
 class LibkeyfileABICheck(GnuAbiCheckBase):
-    def __init__(self, appimage: AppImage):
-        super().__init__(appimage)
+    def __init__(self, session: LintSession):
+        super().__init__(session)
 
     @staticmethod
     def get_logger() -> logging.Logger:
@@ -19,9 +18,9 @@ class LibkeyfileABICheck(GnuAbiCheckBase):
     def name():
         return "libkeyfile ABI check"
 
-    @classmethod
-    def _detect_versions_in_file(cls, path):
-        return GnuLibVersionSymbolsFinder.detect_gnu_lib_versions("KEYFILE_", path)
+    @staticmethod
+    def _version_prefix():
+        return "KEYFILE_"
 
     @classmethod
     def _get_debian_versions_map(cls):
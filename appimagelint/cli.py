@@ -1,17 +1,56 @@
 import argparse
+import json
 import logging
 import os
+import signal
 import sys
+import time
 
 from appimagelint.services.checks_manager import ChecksManager
+from .services import AppImageMounter, LintSession
+from .services.baseline_linter import BaselineLinter
+from .services.batch_linter import BatchLinter
+from .services.lint_client import LintClient
+from .services.lint_server import LintServer
+from .services.lint_watcher import LintWatcher
+from .services.work_queue import WorkQueue, WorkQueueWorker
+from .cache import BinaryVersionsCache, ResultCache
 from .cache.runtime_cache import AppImageRuntimeCache
-from .reports import JSONReport
+from .models import ResultVector
+from .reports import FleetSummary, JSONReport, NDJSONReport, ResultsDatabase
 from .services.result_formatter import ResultFormatter
-from .models import AppImage
 from . import _logging
 from .checks import IconsCheck, GlibcABICheck, GlibcxxABICheck, DesktopFilesCheck
 
 
+# options a running lint server doesn't support, as it uses its own settings or doesn't send the data needed, given as
+# (option, dest) tuples
+# if any of them is set, the AppImages are reviewed in this process
+_LOCAL_ONLY_OPTIONS = (
+    ("--jobs", "jobs"),
+    ("--no-binary-cache", "use_binary_cache"),
+    ("--result-cache", "use_result_cache"),
+    ("--workers", "workers"),
+    ("--max-mounts", "max_mounts"),
+    ("--prefetch-mounts", "prefetch_mounts"),
+    ("--mount-timeout", "mount_timeout"),
+    ("--sequential-checks", "concurrent_checks"),
+    # the server doesn't send the required versions
+    ("--results-db", "results_db"),
+)
+
+# options baseline mode doesn't support, as it reviews one AppImage at a time, reusing the baseline's state, given as
+# (option, dest) tuples
+_BASELINE_UNSUPPORTED_OPTIONS = (
+    ("--workers", "workers"),
+    ("--max-mounts", "max_mounts"),
+    ("--prefetch-mounts", "prefetch_mounts"),
+    ("--result-cache", "use_result_cache"),
+    ("--fail-fast", "fail_fast"),
+    ("--sequential-checks", "concurrent_checks"),
+)
+
+
 def get_version():
     try:
         import pkg_resources
@@ -35,19 +74,7 @@ def get_version():
     return version
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        prog="appimagelint",
-        description="Run compatibility and other checks on AppImages automatically, "
-                    "and provide human-understandable feedback"
-    )
-
-    parser.add_argument("--version",
-                        dest="display_version",
-                        action="version", version=get_version(),
-                        help="Display version and exit"
-    )
-
+def add_logging_arguments(parser: argparse.ArgumentParser):
     parser.add_argument("--debug",
                         dest="loglevel",
                         action="store_const", const=logging.DEBUG, default=logging.INFO,
@@ -68,26 +95,849 @@ def parse_args():
                         action="store_const", const=True, default=False,
                         help="Force colored output")
 
+
+def setup_logging(args):
+    _logging.setup(
+        args.loglevel,
+        with_timestamps=args.log_timestamps,
+        force_colors=args.force_colors,
+        log_locations=args.log_message_locations,
+    )
+
+
+REPORT_FORMAT_JSON = "json"
+REPORT_FORMAT_NDJSON = "ndjson"
+
+REPORT_FORMATS = (REPORT_FORMAT_JSON, REPORT_FORMAT_NDJSON)
+
+
+def add_report_format_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--report-format",
+                        dest="report_format", choices=REPORT_FORMATS, default=REPORT_FORMAT_JSON,
+                        help="Format of the machine-readable report: json writes a single document once all "
+                             "AppImages have been reviewed, ndjson writes a record per AppImage as soon as it has been "
+                             "reviewed, which keeps memory usage constant for any number of AppImages (see "
+                             "appimagelint convert-report; default: json)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="appimagelint",
+        description="Run compatibility and other checks on AppImages automatically, "
+                    "and provide human-understandable feedback"
+    )
+
+    parser.add_argument("--version",
+                        dest="display_version",
+                        action="version", version=get_version(),
+                        help="Display version and exit"
+    )
+
+    add_logging_arguments(parser)
+
     parser.add_argument("--json-report",
                         dest="json_report", nargs="?", default=None,
                         help="Write results to file in machine-readable form (JSON)")
 
+    add_report_format_argument(parser)
+
     parser.add_argument("--check",
                         dest="check_id", nargs="?", default=None,
                         help="Check to run (default: all)")
 
+    parser.add_argument("-j", "--jobs",
+                        dest="jobs", type=int, default=1,
+                        help="Number of worker processes to use for scanning binaries (default: 1)")
+
+    parser.add_argument("--no-binary-cache",
+                        dest="use_binary_cache",
+                        action="store_const", const=False, default=True,
+                        help="Do not cache the versioned dependencies of binaries in the user cache directory")
+
+    parser.add_argument("--result-cache",
+                        dest="use_result_cache",
+                        action="store_const", const=True, default=False,
+                        help="Cache results of unchanged AppImages in the user cache directory, and reuse them instead "
+                             "of running the checks again")
+
+    parser.add_argument("--paths-from",
+                        dest="paths_from", default=None,
+                        help="Read paths of AppImages (or AppDirs) to review from file, one per line (use - to read "
+                             "from stdin)")
+
+    parser.add_argument("--workers",
+                        dest="workers", type=int, default=1,
+                        help="Number of AppImages to review concurrently in worker processes (default: 1)")
+
+    parser.add_argument("--max-mounts",
+                        dest="max_mounts", type=int, default=None,
+                        help="Maximum number of AppImages mounted at the same time (default: no limit, i.e., up to one "
+                             "per worker)")
+
+    parser.add_argument("--backend",
+                        dest="backend", choices=LintSession.BACKENDS, default=LintSession.BACKEND_AUTO,
+                        help="How to access the AppImages' contents: mount them using their runtime, read their "
+                             "SquashFS images directly, which requires neither FUSE nor running the runtime, or "
+                             "extract the files the checks need into a temporary directory; auto selects one of them "
+                             "per AppImage based on the payload's size and number of files (default: auto)")
+
+    parser.add_argument("--prefetch-mounts",
+                        dest="prefetch_mounts", type=int, default=2,
+                        help="Number of AppImages to mount in the background while the current one is being checked, "
+                             "used only when reviewing AppImages in a single process (default: 2)")
+
+    parser.add_argument("--mount-timeout",
+                        dest="mount_timeout", type=float, default=AppImageMounter.DEFAULT_TIMEOUT,
+                        help="Maximum time in seconds to wait for an AppImage to be mounted "
+                             "(default: {})".format(AppImageMounter.DEFAULT_TIMEOUT))
+
+    parser.add_argument("--level",
+                        dest="level", choices=LintSession.LEVELS, default=LintSession.LEVEL_STANDARD,
+                        help="How thorough the review should be: quick checks only the runtime and the files in the "
+                             "AppDir root, which makes for a fast gate in CI, standard runs all regular checks, full "
+                             "includes expensive checks as well (default: standard)")
+
+    parser.add_argument("--fail-fast",
+                        dest="fail_fast",
+                        action="store_const", const=True, default=False,
+                        help="Stop scanning binaries as soon as the compatibility checks' results cannot change "
+                             "anymore, scanning the largest libraries first (the detected required versions are "
+                             "not necessarily the highest ones then)")
+
+    parser.add_argument("--sequential-checks",
+                        dest="concurrent_checks",
+                        action="store_const", const=False, default=True,
+                        help="Run the checks on an AppImage one after another instead of running independent checks "
+                             "(e.g., the icons check and the ABI checks scanning the binaries) concurrently")
+
+    parser.add_argument("--watch",
+                        dest="watch",
+                        action="store_const", const=True, default=False,
+                        help="Review the AppImage (or AppDir) again whenever it changes, running only the checks "
+                             "affected by the changed files, and print the changes in the results")
+
+    parser.add_argument("--watch-interval",
+                        dest="watch_interval", type=float, default=1.0,
+                        help="Time in seconds between checks for changes in watch mode (default: 1)")
+
+    parser.add_argument("--baseline",
+                        dest="baseline", default=None,
+                        help="Previous release of the AppImage to compare against; only new or changed files are "
+                             "checked, and regressions (e.g., binaries raising the required glibc version) are "
+                             "reported")
+
+    parser.add_argument("--socket",
+                        dest="socket", default=None,
+                        help="Socket of the lint server to use if it is running (see appimagelint serve; default: "
+                             "{})".format(LintServer.default_socket_path()))
+
+    parser.add_argument("--no-server",
+                        dest="use_server",
+                        action="store_const", const=False, default=True,
+                        help="Never send the AppImages to a running lint server, always review them in this process "
+                             "(a running server isn't used either if any options it doesn't support, like --jobs or "
+                             "--results-db, are given)")
+
+    parser.add_argument("--results-db",
+                        dest="results_db", default=None,
+                        help="Store results in SQLite database as soon as an AppImage has been reviewed, replacing "
+                             "earlier results of the same AppImage (see appimagelint query)")
+
+    parser.add_argument("--summary",
+                        dest="summary",
+                        action="store_const", const=True, default=False,
+                        help="Print a summary of all AppImages' results once they have been reviewed: pass rates per "
+                             "test (and thus per distribution release), most common failures, highest required "
+                             "glibc and libstdc++ versions and the slowest AppImages")
+
+    parser.add_argument("--summary-file",
+                        dest="summary_file", default=None,
+                        help="Write the summary to file in machine-readable form (JSON), which can be merged with the "
+                             "summaries of other shards using appimagelint merge-summaries (implies --summary)")
+
     parser.add_argument("path",
-                        nargs="+",
-                        help="AppImage to review")
+                        nargs="*",
+                        help="AppImage to review (may also be an AppDir, which is reviewed without packing it first)")
 
     args = parser.parse_args()
 
+    args.local_only_options = [
+        option for option, dest in _LOCAL_ONLY_OPTIONS if getattr(args, dest) != parser.get_default(dest)
+    ]
+
+    if not args.path and not args.paths_from:
+        parser.error("no AppImages specified")
+
+    if args.watch and (len(args.path) != 1 or args.paths_from):
+        parser.error("watch mode requires exactly one AppImage or AppDir")
+
+    if args.watch and args.baseline:
+        parser.error("watch mode cannot be combined with a baseline")
+
+    if args.baseline:
+        unsupported_options = [
+            option for option, dest in _BASELINE_UNSUPPORTED_OPTIONS if getattr(args, dest) != parser.get_default(dest)
+        ]
+
+        if unsupported_options:
+            parser.error("baseline mode cannot be combined with {}".format(", ".join(unsupported_options)))
+
+    if args.watch and args.results_db:
+        parser.error("watch mode cannot be combined with a results database")
+
+    # the report is rewritten whenever the results change
+    if args.watch and args.report_format != REPORT_FORMAT_JSON:
+        parser.error("watch mode supports JSON reports only")
+
+    if args.summary_file:
+        args.summary = True
+
+    if args.watch and args.summary:
+        parser.error("watch mode cannot be combined with a summary")
+
     return args
 
 
+def iter_paths(args):
+    yield from args.path
+
+    if not args.paths_from:
+        return
+
+    def read_paths(f):
+        for line in f:
+            line = line.strip()
+
+            if line:
+                yield line
+
+    # read lazily, the list of paths might be very long
+    if args.paths_from == "-":
+        yield from read_paths(sys.stdin)
+    else:
+        with open(args.paths_from) as f:
+            yield from read_paths(f)
+
+
+def watch(args, checks_ids, custom_runtime, formatter, binary_versions_cache):
+    path = args.path[0]
+
+    watcher = LintWatcher(
+        path,
+        checks_ids,
+        custom_runtime=custom_runtime,
+        formatter=formatter,
+        jobs=args.jobs,
+        binary_versions_cache=binary_versions_cache,
+        backend=args.backend,
+        level=args.level,
+        mount_timeout=args.mount_timeout,
+    )
+
+    # runs until interrupted by the user
+    for _ in watcher.watch(args.watch_interval):
+        # keep the report up to date
+        if args.json_report:
+            report = JSONReport({path: watcher.results()})
+            report.write(args.json_report)
+
+
+def lint_against_baseline(args, checks_ids, custom_runtime, formatter, binary_versions_cache,
+                          results_db: ResultsDatabase = None):
+    linter = BaselineLinter(
+        args.baseline,
+        checks_ids,
+        custom_runtime=custom_runtime,
+        formatter=formatter,
+        jobs=args.jobs,
+        binary_versions_cache=binary_versions_cache,
+        backend=args.backend,
+        level=args.level,
+        mount_timeout=args.mount_timeout,
+    )
+
+    for path in iter_paths(args):
+        results = linter.lint(path).results
+
+        if results_db is not None:
+            results_db.add(path, results)
+
+        yield path, results
+
+
+def add_to_summary(summary: FleetSummary, lint_results):
+    """
+    Add the results (and stats, if available) yielded by lint_results to the summary while passing the results on.
+    """
+
+    for path, check_results, stats in lint_results:
+        summary.add(path, check_results, stats)
+        yield path, check_results
+
+
+def write_summary(args, summary: FleetSummary):
+    if args.summary_file:
+        summary.write(args.summary_file)
+
+    print(summary.to_str())
+
+
+def write_report(args, lint_results):
+    """
+    Collect the results yielded by lint_results, and write the report requested by the user.
+    """
+
+    if not args.json_report:
+        # the results have been logged already
+        for _ in lint_results:
+            pass
+
+        return
+
+    if args.report_format == REPORT_FORMAT_NDJSON:
+        with NDJSONReport(args.json_report) as report:
+            for path, check_results in lint_results:
+                report.add(path, check_results)
+
+        return
+
+    results = {}
+
+    # the results of all AppImages must be kept until the end, therefore they're stored in compact form
+    for path, check_results in lint_results:
+        results[path] = ResultVector(check_results)
+
+    report = JSONReport(results)
+    report.write(args.json_report)
+
+
+# options of the subcommands which lint AppImages on behalf of others
+def add_linter_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("-j", "--jobs",
+                        dest="jobs", type=int, default=1,
+                        help="Number of worker processes to use for scanning binaries (default: 1)")
+
+    parser.add_argument("--no-binary-cache",
+                        dest="use_binary_cache",
+                        action="store_const", const=False, default=True,
+                        help="Do not cache the versioned dependencies of binaries in the user cache directory")
+
+    parser.add_argument("--result-cache",
+                        dest="use_result_cache",
+                        action="store_const", const=True, default=False,
+                        help="Cache results of unchanged AppImages in the user cache directory, and reuse them instead "
+                             "of running the checks again")
+
+    parser.add_argument("--mount-timeout",
+                        dest="mount_timeout", type=float, default=AppImageMounter.DEFAULT_TIMEOUT,
+                        help="Maximum time in seconds to wait for an AppImage to be mounted "
+                             "(default: {})".format(AppImageMounter.DEFAULT_TIMEOUT))
+
+
+def make_formatter(args) -> ResultFormatter:
+    kwargs = dict()
+    if args.force_colors:
+        kwargs["use_colors"] = True
+
+    return ResultFormatter(**kwargs)
+
+
+def make_caches(args):
+    binary_versions_cache = None
+    if args.use_binary_cache:
+        binary_versions_cache = BinaryVersionsCache()
+
+    result_cache = None
+    if args.use_result_cache:
+        result_cache = ResultCache()
+
+    return binary_versions_cache, result_cache
+
+
+def parse_serve_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="appimagelint serve",
+        description="Run a lint server, which keeps caches and runtime in memory, and reviews AppImages sent by "
+                    "clients over a Unix socket; appimagelint uses a running server automatically"
+    )
+
+    add_logging_arguments(parser)
+
+    parser.add_argument("--socket",
+                        dest="socket", default=None,
+                        help="Path of the socket to listen on (default: {})".format(LintServer.default_socket_path()))
+
+    parser.add_argument("--workers",
+                        dest="workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of AppImages to review concurrently in worker processes (default: number of "
+                             "CPUs)")
+
+    add_linter_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def serve(argv):
+    args = parse_serve_args(argv)
+
+    setup_logging(args)
+
+    logger = _logging.make_logger("cli")
+
+    # the clients may select any backend, therefore we need the runtime in any case
+    custom_runtime = AppImageRuntimeCache.get_data()
+
+    formatter = make_formatter(args)
+    binary_versions_cache, result_cache = make_caches(args)
+
+    server = LintServer(
+        args.socket,
+        custom_runtime=custom_runtime,
+        formatter=formatter,
+        workers=args.workers,
+        jobs=args.jobs,
+        binary_versions_cache=binary_versions_cache,
+        result_cache=result_cache,
+        mount_timeout=args.mount_timeout,
+    )
+
+    try:
+        with server:
+            # shut down cleanly when stopped by a service manager, too (the workers keep the default handler)
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+            server.serve_forever()
+
+    except RuntimeError as e:
+        logger.critical(str(e))
+        sys.exit(1)
+
+    except KeyboardInterrupt:
+        logger.info("Shutting down server")
+
+    finally:
+        for cache in (binary_versions_cache, result_cache):
+            if cache is not None:
+                cache.close()
+
+
+def lint_on_server(args, client: LintClient, formatter):
+    logger = _logging.make_logger("cli")
+
+    logger.info("Sending AppImages to lint server listening on {}".format(client.socket_path()))
+
+    checks_ids = None
+    if args.check_id:
+        checks_ids = [args.check_id]
+
+    lint_results = client.lint(iter_paths(args), checks_ids=checks_ids, level=args.level, backend=args.backend,
+                               fail_fast=args.fail_fast)
+
+    for path, check_results in lint_results:
+        logger.info("Results for AppImage {}".format(path))
+
+        for check_cls, check_cls_results in check_results.items():
+            for testres in check_cls_results:
+                check_cls.get_logger().info(formatter.format(testres))
+
+        yield path, check_results
+
+
+def parse_worker_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="appimagelint worker",
+        description="Review the AppImages in a work queue in a shared directory (e.g., on NFS); any number of workers "
+                    "on any number of machines may process the same queue"
+    )
+
+    add_logging_arguments(parser)
+
+    parser.add_argument("--queue",
+                        dest="queue", required=True,
+                        help="Directory of the work queue")
+
+    parser.add_argument("--lease-timeout",
+                        dest="lease_timeout", type=float, default=WorkQueue.DEFAULT_LEASE_TIMEOUT,
+                        help="Time in seconds after which jobs of workers which stopped renewing their leases (e.g., "
+                             "because they crashed) are handed to other workers (default: "
+                             "{})".format(WorkQueue.DEFAULT_LEASE_TIMEOUT))
+
+    parser.add_argument("--poll-interval",
+                        dest="poll_interval", type=float, default=10,
+                        help="Time in seconds to wait for new jobs when the queue is empty (default: 10)")
+
+    parser.add_argument("--exit-when-empty",
+                        dest="exit_when_empty",
+                        action="store_const", const=True, default=False,
+                        help="Exit as soon as there are no pending jobs instead of waiting for new ones")
+
+    add_linter_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def worker(argv):
+    args = parse_worker_args(argv)
+
+    setup_logging(args)
+
+    logger = _logging.make_logger("cli")
+
+    # the jobs may select any backend, therefore we need the runtime in any case
+    custom_runtime = AppImageRuntimeCache.get_data()
+
+    binary_versions_cache, result_cache = make_caches(args)
+
+    queue_worker = WorkQueueWorker(
+        WorkQueue(args.queue, lease_timeout=args.lease_timeout),
+        custom_runtime=custom_runtime,
+        formatter=make_formatter(args),
+        jobs=args.jobs,
+        binary_versions_cache=binary_versions_cache,
+        result_cache=result_cache,
+        mount_timeout=args.mount_timeout,
+    )
+
+    try:
+        queue_worker.run(poll_interval=args.poll_interval, exit_when_empty=args.exit_when_empty)
+
+    except KeyboardInterrupt:
+        # the job we were working on is reclaimed once the lease expires
+        logger.critical("process interrupted by user")
+        sys.exit(2)
+
+    finally:
+        for cache in (binary_versions_cache, result_cache):
+            if cache is not None:
+                cache.close()
+
+
+def parse_coordinate_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="appimagelint coordinate",
+        description="Add AppImages to a work queue processed by appimagelint worker, and merge the workers' results "
+                    "into a single report"
+    )
+
+    add_logging_arguments(parser)
+
+    parser.add_argument("--queue",
+                        dest="queue", required=True,
+                        help="Directory of the work queue")
+
+    parser.add_argument("--json-report",
+                        dest="json_report", default=None,
+                        help="Write the results of all jobs in the queue to file in machine-readable form (JSON)")
+
+    add_report_format_argument(parser)
+
+    parser.add_argument("--results-db",
+                        dest="results_db", default=None,
+                        help="Store the results of all finished jobs in the queue in SQLite database (see appimagelint "
+                             "query)")
+
+    parser.add_argument("--wait",
+                        dest="wait",
+                        action="store_const", const=True, default=False,
+                        help="Wait until all jobs in the queue are finished (reclaiming jobs of crashed workers) "
+                             "before writing the report")
+
+    parser.add_argument("--poll-interval",
+                        dest="poll_interval", type=float, default=10,
+                        help="Time in seconds between checks for finished jobs while waiting (default: 10)")
+
+    parser.add_argument("--lease-timeout",
+                        dest="lease_timeout", type=float, default=WorkQueue.DEFAULT_LEASE_TIMEOUT,
+                        help="Time in seconds after which jobs of workers which stopped renewing their leases are "
+                             "handed to other workers (default: {})".format(WorkQueue.DEFAULT_LEASE_TIMEOUT))
+
+    parser.add_argument("--check",
+                        dest="check_id", default=None,
+                        help="Check to run on the enqueued AppImages (default: all)")
+
+    parser.add_argument("--level",
+                        dest="level", choices=LintSession.LEVELS, default=LintSession.LEVEL_STANDARD,
+                        help="How thorough the review of the enqueued AppImages should be (default: standard)")
+
+    parser.add_argument("--backend",
+                        dest="backend", choices=LintSession.BACKENDS, default=LintSession.BACKEND_AUTO,
+                        help="How to access the enqueued AppImages' contents (default: auto)")
+
+    parser.add_argument("--fail-fast",
+                        dest="fail_fast",
+                        action="store_const", const=True, default=False,
+                        help="Stop scanning binaries as soon as the compatibility checks' results cannot change "
+                             "anymore")
+
+    parser.add_argument("--paths-from",
+                        dest="paths_from", default=None,
+                        help="Read paths of AppImages to enqueue from file, one per line (use - to read from stdin)")
+
+    parser.add_argument("path",
+                        nargs="*",
+                        help="AppImage to enqueue; the paths must be valid on all machines running workers")
+
+    args = parser.parse_args(argv)
+
+    # the workers would fail on every single job otherwise
+    if args.check_id:
+        try:
+            ChecksManager.get_class(args.check_id)
+        except KeyError as e:
+            parser.error(*e.args)
+
+    return args
+
+
+def coordinate(argv):
+    args = parse_coordinate_args(argv)
+
+    setup_logging(args)
+
+    logger = _logging.make_logger("cli")
+
+    work_queue = WorkQueue(args.queue, lease_timeout=args.lease_timeout)
+
+    # SQLite databases mustn't be shared on network filesystems, therefore the workers don't write to it themselves
+    results_db = None
+    if args.results_db:
+        results_db = ResultsDatabase(args.results_db)
+
+    try:
+        if args.path or args.paths_from:
+            checks_ids = [args.check_id] if args.check_id else None
+
+            work_queue.enqueue(iter_paths(args), checks_ids=checks_ids, level=args.level, backend=args.backend,
+                               fail_fast=args.fail_fast)
+
+        if args.wait:
+            while True:
+                # the workers do this, too, but there might not be any left
+                work_queue.reclaim_expired()
+
+                pending_jobs = [i for i, _ in work_queue.manifest() if not work_queue.is_done(i)]
+
+                if not pending_jobs:
+                    break
+
+                logger.info("Waiting for {} jobs to finish".format(len(pending_jobs)))
+                time.sleep(args.poll_interval)
+
+        unfinished = 0
+
+        def finished_results():
+            nonlocal unfinished
+
+            for path, check_results in work_queue.results():
+                if check_results is None:
+                    unfinished += 1
+                    continue
+
+                if results_db is not None:
+                    results_db.add(path, check_results)
+
+                yield path, check_results
+
+        write_report(args, finished_results())
+
+        if unfinished:
+            logger.warning("{} jobs haven't been finished yet, their results are missing".format(unfinished))
+
+    except KeyboardInterrupt:
+        logger.critical("process interrupted by user")
+        sys.exit(2)
+
+    finally:
+        if results_db is not None:
+            results_db.close()
+
+
+def parse_query_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="appimagelint query",
+        description="Query a results database written by appimagelint --results-db"
+    )
+
+    add_logging_arguments(parser)
+
+    parser.add_argument("--results-db",
+                        dest="results_db", required=True,
+                        help="Path to the results database")
+
+    parser.add_argument("--json",
+                        dest="json",
+                        action="store_const", const=True, default=False,
+                        help="Print the answer in machine-readable form (JSON)")
+
+    subparsers = parser.add_subparsers(dest="query", metavar="query")
+    subparsers.required = True
+
+    failing_parser = subparsers.add_parser("failing", help="List AppImages failing a test (default: any test)")
+
+    failing_parser.add_argument("--result",
+                                dest="result_id", default=None,
+                                help="ID of the test result, e.g., gnu_abi_glibc_debian_oldstable")
+
+    failing_parser.add_argument("--check",
+                                dest="check_id", default=None,
+                                help="ID of the check")
+
+    versions_parser = subparsers.add_parser("versions",
+                                            help="Show the distribution of the highest required versions of a "
+                                                 "library")
+
+    versions_parser.add_argument("--prefix",
+                                 dest="prefix", default="GLIBC_",
+                                 help="Prefix of the versioned symbols, e.g., GLIBCXX_ (default: GLIBC_)")
+
+    subparsers.add_parser("summary", help="Show how many AppImages pass and fail every test")
+
+    return parser.parse_args(argv)
+
+
+def query(argv):
+    args = parse_query_args(argv)
+
+    setup_logging(args)
+
+    logger = _logging.make_logger("cli")
+
+    if not os.path.exists(args.results_db):
+        logger.critical("no such results database: {}".format(args.results_db))
+        sys.exit(1)
+
+    results_db = ResultsDatabase(args.results_db)
+
+    try:
+        if args.query == "failing":
+            rows = results_db.failing(result_id=args.result_id, check_id=args.check_id)
+
+            if args.json:
+                data = [{"path": path, "id": result_id, "message": message} for path, result_id, message in rows]
+            else:
+                lines = ["{}: {}: {}".format(*row) for row in rows]
+
+        elif args.query == "versions":
+            rows = results_db.required_versions(args.prefix)
+
+            if args.json:
+                data = {version: count for version, count in rows}
+            else:
+                total = sum(count for _, count in rows)
+                lines = [
+                    "{}{}: {} ({:.1f}%)".format(args.prefix, version, count, count * 100 / total)
+                    for version, count in rows
+                ]
+
+        else:
+            rows = results_db.summary()
+
+            if args.json:
+                data = {result_id: {"passed": passed, "failed": failed} for result_id, passed, failed in rows}
+            else:
+                lines = ["{}: {} passed, {} failed".format(*row) for row in rows]
+
+    finally:
+        results_db.close()
+
+    if args.json:
+        print(json.dumps(data, indent=4))
+    else:
+        for line in lines:
+            print(line)
+
+
+def parse_convert_report_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="appimagelint convert-report",
+        description="Convert a report written with --report-format ndjson into a JSON report"
+    )
+
+    add_logging_arguments(parser)
+
+    parser.add_argument("ndjson_report",
+                        help="NDJSON report to convert")
+
+    parser.add_argument("json_report",
+                        help="Path to write JSON report to")
+
+    return parser.parse_args(argv)
+
+
+def convert_report(argv):
+    args = parse_convert_report_args(argv)
+
+    setup_logging(args)
+
+    logger = _logging.make_logger("cli")
+
+    try:
+        NDJSONReport.convert_to_json(args.ndjson_report, args.json_report)
+
+    except (OSError, ValueError, KeyError) as e:
+        logger.critical("failed to convert report: {}".format(e))
+        sys.exit(1)
+
+
+def parse_merge_summaries_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="appimagelint merge-summaries",
+        description="Merge summaries written by appimagelint --summary-file, e.g., by different shards of a catalogue, "
+                    "and print the merged summary"
+    )
+
+    add_logging_arguments(parser)
+
+    parser.add_argument("--summary-file",
+                        dest="summary_file", default=None,
+                        help="Write the merged summary to file in machine-readable form (JSON)")
+
+    parser.add_argument("summaries",
+                        nargs="+",
+                        help="Summary files to merge")
+
+    return parser.parse_args(argv)
+
+
+def merge_summaries(argv):
+    args = parse_merge_summaries_args(argv)
+
+    setup_logging(args)
+
+    logger = _logging.make_logger("cli")
+
+    summary = FleetSummary()
+
+    for path in args.summaries:
+        try:
+            summary.merge(FleetSummary.load(path))
+
+        except (OSError, ValueError, KeyError) as e:
+            logger.critical("failed to load summary {}: {}".format(path, e))
+            sys.exit(1)
+
+    write_summary(args, summary)
+
+
+# subcommands are selected by the first argument, all other arguments are passed to the subcommand
+# the main command takes AppImages as positional arguments, so argparse's subparsers can't be used
+_subcommands = {
+    "serve": serve,
+    "worker": worker,
+    "coordinate": coordinate,
+    "query": query,
+    "convert-report": convert_report,
+    "merge-summaries": merge_summaries,
+}
+
+
 def run():
     ChecksManager.init()
 
+    if len(sys.argv) > 1 and sys.argv[1] in _subcommands:
+        _subcommands[sys.argv[1]](sys.argv[2:])
+        return
+
     args = parse_args()
 
     if getattr(args, "display_version", False):
@@ -95,58 +945,110 @@ def run():
         return
 
     # setup
-    _logging.setup(
-        args.loglevel,
-        with_timestamps=args.log_timestamps,
-        force_colors=args.force_colors,
-        log_locations=args.log_message_locations,
-    )
+    setup_logging(args)
 
     # get logger for CLI
     logger = _logging.make_logger("cli")
 
+    formatter = make_formatter(args)
+
+    results_db = None
+    if args.results_db:
+        results_db = ResultsDatabase(args.results_db)
+
+    # a running server has everything loaded already, which saves us loading the caches and the runtime
+    # watch and baseline modes need state which is kept in this process, and the server doesn't send the stats needed
+    # for summaries
+    if args.use_server and not args.watch and not args.baseline and not args.summary:
+        client = LintClient(args.socket)
+
+        if client.is_available():
+            if args.local_only_options:
+                logger.info("Not using lint server listening on {}, which doesn't support {}".format(
+                    client.socket_path(), ", ".join(args.local_only_options)
+                ))
+
+            else:
+                try:
+                    write_report(args, lint_on_server(args, client, formatter))
+
+                except KeyboardInterrupt:
+                    logger.critical("process interrupted by user")
+                    sys.exit(2)
+
+                return
+
     # need up to date runtime to be able to read the mountpoint from stdout (was fixed only recently)
     # also, it's safer not to rely on the embedded runtime
-    custom_runtime = AppImageRuntimeCache.get_data()
+    # the runtime is not needed for reading the SquashFS images directly
+    custom_runtime = None
+    if args.backend != LintSession.BACKEND_SQUASHFS:
+        custom_runtime = AppImageRuntimeCache.get_data()
 
-    # results logs are written immediately, but maybe we want to generate additional reports
-    # for this purpose, we collect all results
-    results = {}
+    if args.check_id:
+        checks_ids = [args.check_id]
+    else:
+        checks_ids = ChecksManager.list_checks()
 
-    try:
-        for path in args.path:
-            results[path] = {}
-
-            logger.info("Checking AppImage {}".format(path))
+    binary_versions_cache, result_cache = make_caches(args)
 
-            appimage = AppImage(path, custom_runtime=custom_runtime)
+    linter = BatchLinter(
+        checks_ids,
+        custom_runtime=custom_runtime,
+        formatter=formatter,
+        workers=args.workers,
+        max_mounts=args.max_mounts,
+        jobs=args.jobs,
+        binary_versions_cache=binary_versions_cache,
+        result_cache=result_cache,
+        backend=args.backend,
+        prefetch_mounts=args.prefetch_mounts,
+        mount_timeout=args.mount_timeout,
+        level=args.level,
+        fail_fast=args.fail_fast,
+        results_db=results_db,
+        concurrent_checks=args.concurrent_checks,
+    )
 
-            kwargs = dict()
-            if args.force_colors:
-                kwargs["use_colors"] = True
+    summary = None
+    if args.summary:
+        summary = FleetSummary()
 
-            formatter = ResultFormatter(**kwargs)
+    # results logs are written immediately, but maybe we want to generate additional reports
+    # for this purpose, we collect all results (or stream them into the report)
+    try:
+        if args.watch:
+            watch(args, checks_ids, custom_runtime, formatter, binary_versions_cache)
+            return
 
-            if args.check_id:
-                checks_ids = [args.check_id]
-            else:
-                checks_ids = ChecksManager.list_checks()
+        if args.baseline:
+            lint_results = lint_against_baseline(
+                args, checks_ids, custom_runtime, formatter, binary_versions_cache, results_db
+            )
 
-            for check_id in checks_ids:
-                check = ChecksManager.get_instance(check_id, appimage)
+            if summary is not None:
+                # the baseline linter doesn't provide any stats
+                lint_results = add_to_summary(summary, ((path, results, None) for path, results in lint_results))
 
-                logger.info("Running check \"{}\"".format(check.name()))
+        elif summary is not None:
+            lint_results = add_to_summary(summary, linter.lint_with_stats(iter_paths(args)))
 
-                results[path][check] = []
+        else:
+            lint_results = linter.lint(iter_paths(args))
 
-                for testres in check.run():
-                    results[path][check].append(testres)
-                    check.get_logger().info(formatter.format(testres))
+        write_report(args, lint_results)
 
-        if args.json_report:
-            report = JSONReport(results)
-            report.write(args.json_report)
+        if summary is not None:
+            write_summary(args, summary)
 
     except KeyboardInterrupt:
         logger.critical("process interrupted by user")
         sys.exit(2)
+
+    finally:
+        for cache in (binary_versions_cache, result_cache):
+            if cache is not None:
+                cache.close()
+
+        if results_db is not None:
+            results_db.close()
@@ -1,5 +1,11 @@
 from .appimage import AppImage
 from .test_result import TestResult
+from .gnu_lib_version_requirements import GnuLibVersionRequirements
+from .distro_compat_index import DistroCompatIndex, SupportedRelease
+from .lint_stats import LintStats
+from .lint_report import LintReport
+from .result_vector import ResultVector
 
 
-__all__ = ("AppImage", "TestResult")
+__all__ = ("AppImage", "TestResult", "GnuLibVersionRequirements", "DistroCompatIndex", "SupportedRelease",
+           "LintStats", "LintReport", "ResultVector")
@@ -1,7 +1,13 @@
+import hashlib
 import os
+from typing import Optional
 
 
 class AppImage:
+    """
+    AppImage to lint. May also be an AppDir, i.e., an AppImage's payload before it is packed.
+    """
+
     def __init__(self, path: str, custom_runtime: str = None):
         if not os.path.exists(path):
             raise FileNotFoundError("file not found: {}".format(path))
@@ -13,8 +19,47 @@ class AppImage:
     def path(self):
         return self._path
 
-    def mount(self):
+    def is_appdir(self) -> bool:
+        """
+        :return: whether this is an unpacked AppDir, which doesn't have a runtime and can be accessed directly
+        """
+        return os.path.isdir(self._path)
+
+    def runtime_digest(self) -> Optional[str]:
+        """
+        Calculate a digest of the runtime, i.e., everything in front of the payload, which can be compared to find out
+        whether the runtime has changed.
+
+        :return: hex digest, or None for AppDirs and files whose payload cannot be located
+        """
+
+        # must not import near top of file to avoid problems with the circular dependency this helper method creates
+        from ..services import SquashfsReader
+
+        if self.is_appdir():
+            return None
+
+        with open(self._path, "rb") as f:
+            try:
+                offset = SquashfsReader.find_payload_offset(f.read(64))
+            except ValueError:
+                return None
+
+            f.seek(0)
+
+            return hashlib.blake2b(f.read(offset), digest_size=20).hexdigest()
+
+    def mount(self, timeout: float = None):
         # must not import near top of file to avoid problems with the circular dependency this helper method creates
         from ..services import AppImageMounter
 
-        return AppImageMounter(self, self._custom_runtime)
+        if timeout is None:
+            timeout = AppImageMounter.DEFAULT_TIMEOUT
+
+        return AppImageMounter(self, self._custom_runtime, timeout=timeout)
+
+    def extract(self):
+        # must not import near top of file to avoid problems with the circular dependency this helper method creates
+        from ..services import AppImageExtractor
+
+        return AppImageExtractor(self, self._custom_runtime)
@@ -0,0 +1,124 @@
+import bisect
+import packaging.version
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SupportedRelease:
+    """
+    A distribution release, and the highest version of a library it provides.
+    """
+
+    def __init__(self, distro: str, release: str, max_version: Optional[str], codename: str = None):
+        self.distro = distro
+        self.release = release
+
+        # some distros' releases are known by an alias (e.g., Debian's stable) as well as a codename
+        self.codename = codename
+
+        # None if the version is unknown, such releases don't support anything
+        self.max_version = max_version
+
+    def __repr__(self):
+        return "SupportedRelease({}, {}, max_version={})".format(repr(self.distro), repr(self.release),
+                                                                  repr(self.max_version))
+
+
+class DistroCompatIndex:
+    """
+    Index of the highest version of a library provided by distribution releases, compiled once from the version maps.
+
+    The releases are kept sorted by the version they provide, so finding the releases which support a required version
+    is a binary search rather than parsing and comparing every release's version for every AppImage.
+    """
+
+    def __init__(self, releases: Iterable[SupportedRelease]):
+        self._releases = list(releases)
+
+        self._distro_releases: Dict[str, List[SupportedRelease]] = {}
+        for release in self._releases:
+            self._distro_releases.setdefault(release.distro, []).append(release)
+
+        # releases with a known version, sorted by the version keys, per distro as well as across all distros
+        self._keys: List[Tuple[int, ...]] = []
+        self._sorted: List[SupportedRelease] = []
+        self._distro_keys: Dict[str, List[Tuple[int, ...]]] = {}
+        self._distro_sorted: Dict[str, List[SupportedRelease]] = {}
+
+        known = [(self.version_key(i.max_version), i) for i in self._releases if i.max_version is not None]
+
+        # sort is stable, so releases providing the same version keep the order they were passed in
+        known.sort(key=lambda i: i[0])
+
+        for key, release in known:
+            self._keys.append(key)
+            self._sorted.append(release)
+
+            self._distro_keys.setdefault(release.distro, []).append(key)
+            self._distro_sorted.setdefault(release.distro, []).append(release)
+
+    @staticmethod
+    def version_key(version: str) -> Tuple[int, ...]:
+        """
+        Convert version into a tuple of integers, which compares like the versions do.
+
+        Trailing zeros are dropped, so that, e.g., 2.35 and 2.35.0 are considered equal.
+        """
+
+        key = list(packaging.version.Version(version).release)
+
+        while len(key) > 1 and key[-1] == 0:
+            key.pop()
+
+        return tuple(key)
+
+    def releases(self, distro: str = None) -> List[SupportedRelease]:
+        """
+        :param distro: distro to return the releases of, or None for all distros
+        :return: releases in the order they were passed in
+        """
+
+        if distro is None:
+            return list(self._releases)
+
+        return list(self._distro_releases.get(distro, []))
+
+    def _lookup(self, distro: Optional[str]) -> Tuple[List[Tuple[int, ...]], List[SupportedRelease]]:
+        if distro is None:
+            return self._keys, self._sorted
+
+        return self._distro_keys.get(distro, []), self._distro_sorted.get(distro, [])
+
+    def supporting_releases(self, required_version: str, distro: str = None) -> List[SupportedRelease]:
+        """
+        :param required_version: version of the library required by an AppImage
+        :param distro: distro to limit the search to, or None for all distros
+        :return: releases which provide required_version or newer, sorted by the version they provide
+        """
+
+        keys, releases = self._lookup(distro)
+
+        return releases[bisect.bisect_left(keys, self.version_key(required_version)):]
+
+    def oldest_supporting_release(self, required_version: str, distro: str = None) -> Optional[SupportedRelease]:
+        """
+        :return: release providing the oldest version which satisfies required_version, or None if there is none
+        """
+
+        keys, releases = self._lookup(distro)
+
+        index = bisect.bisect_left(keys, self.version_key(required_version))
+
+        if index >= len(releases):
+            return None
+
+        return releases[index]
+
+    def newest_version(self) -> Optional[str]:
+        """
+        :return: highest version provided by any release, or None if no version is known
+        """
+
+        if not self._sorted:
+            return None
+
+        return self._sorted[-1].max_version
@@ -0,0 +1,75 @@
+from typing import Dict, Iterable, Mapping, Set
+
+from .._util import max_version
+
+
+class GnuLibVersionRequirements:
+    """
+    Table of the versioned dependencies (e.g., GLIBC_2.17, GLIBCXX_3.4.21, CXXABI_1.3, GCC_3.0) found in the runtime
+    and the payload of an AppImage, grouped by their prefix (e.g., GLIBC_).
+
+    The table is filled in a single pass over all the binaries in the AppImage, and can then be queried by all the
+    checks which are interested in a specific library.
+    """
+
+    def __init__(self):
+        self._runtime_versions: Dict[str, Set[str]] = {}
+        self._payload_versions: Dict[str, Set[str]] = {}
+
+        # per-file versions, keyed by file path and prefix
+        self._files: Dict[str, Dict[str, Set[str]]] = {}
+        self._payload_files: Set[str] = set()
+
+    @staticmethod
+    def _merge(target: Dict[str, Set[str]], versions: Mapping[str, Iterable[str]]):
+        for prefix, prefix_versions in versions.items():
+            target.setdefault(prefix, set()).update(prefix_versions)
+
+    def add_runtime_file(self, path: str, versions: Mapping[str, Iterable[str]]):
+        self._merge(self._runtime_versions, versions)
+        self._merge(self._files.setdefault(path, {}), versions)
+
+    def add_payload_file(self, path: str, versions: Mapping[str, Iterable[str]]):
+        self._merge(self._payload_versions, versions)
+        self._merge(self._files.setdefault(path, {}), versions)
+        self._payload_files.add(path)
+
+    def prefixes(self) -> Set[str]:
+        return set(self._runtime_versions) | set(self._payload_versions)
+
+    def runtime_versions(self, prefix: str) -> Set[str]:
+        return set(self._runtime_versions.get(prefix, set()))
+
+    def payload_versions(self, prefix: str) -> Set[str]:
+        return set(self._payload_versions.get(prefix, set()))
+
+    def max_versions(self) -> Dict[str, str]:
+        """
+        :return: highest version required by the runtime or the payload for every prefix
+        """
+
+        max_versions = {}
+
+        for prefix in self.prefixes():
+            versions = self.runtime_versions(prefix) | self.payload_versions(prefix)
+
+            if versions:
+                max_versions[prefix] = max_version(versions)
+
+        return max_versions
+
+    def files(self) -> Iterable[str]:
+        return list(self._files)
+
+    def payload_files(self) -> Iterable[str]:
+        return [i for i in self._files if i in self._payload_files]
+
+    def file_versions(self, path: str, prefix: str) -> Set[str]:
+        return set(self._files.get(path, {}).get(prefix, set()))
+
+    def all_file_versions(self, path: str) -> Dict[str, Set[str]]:
+        """
+        :return: versions found in a single file for all prefixes
+        """
+
+        return {prefix: set(versions) for prefix, versions in self._files.get(path, {}).items()}
@@ -0,0 +1,66 @@
+from typing import Dict, List, Optional
+
+from .lint_stats import LintStats
+from .test_result import TestResult
+
+
+class LintReport:
+    """
+    Results of linting a single AppImage, as returned by the Python API (see :mod:`appimagelint.api`).
+    """
+
+    def __init__(self, path: str, results: Dict[type, List[TestResult]], stats: LintStats = None,
+                 error: str = None):
+        self._path = path
+        self._results = results
+        self._stats = stats
+        self._error = error
+
+    def path(self) -> str:
+        return self._path
+
+    def results(self) -> Dict[type, List[TestResult]]:
+        """
+        :return: results keyed by check class, in the order the checks have been run
+        """
+
+        return self._results
+
+    def check_results(self, check_id: str) -> List[TestResult]:
+        """
+        :return: results of a single check (empty if the check hasn't been run)
+        """
+
+        for check_cls, check_results in self._results.items():
+            if check_cls.id() == check_id:
+                return check_results
+
+        return []
+
+    def all_results(self) -> List[TestResult]:
+        return [testres for check_results in self._results.values() for testres in check_results]
+
+    def failed_results(self) -> List[TestResult]:
+        return [testres for testres in self.all_results() if not testres.success()]
+
+    def stats(self) -> Optional[LintStats]:
+        return self._stats
+
+    def error(self) -> Optional[str]:
+        """
+        :return: description of the error if linting the AppImage failed, None otherwise
+        """
+
+        return self._error
+
+    def success(self) -> bool:
+        """
+        :return: whether the AppImage could be linted and passed all tests
+        """
+
+        return self._error is None and not self.failed_results()
+
+    def __repr__(self):
+        return "LintReport({}, {} results, {} failed)".format(
+            repr(self._path), len(self.all_results()), len(self.failed_results())
+        )
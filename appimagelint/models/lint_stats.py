@@ -0,0 +1,37 @@
+from typing import Dict, Optional
+
+
+class LintStats:
+    """
+    Information about linting a single AppImage which isn't part of the results, e.g., for summaries of large batches.
+    """
+
+    def __init__(self, duration: float, max_versions: Optional[Dict[str, str]] = None, error: Optional[str] = None):
+        self._duration = duration
+        self._max_versions = max_versions
+        self._error = error
+
+    def duration(self) -> float:
+        """
+        :return: time it took to lint the AppImage, in seconds
+        """
+
+        return self._duration
+
+    def max_versions(self) -> Optional[Dict[str, str]]:
+        """
+        :return: highest required version for every prefix (e.g., GLIBC_), or None if unknown (e.g., when none of the
+            checks needed the versions)
+        """
+
+        return self._max_versions
+
+    def error(self) -> Optional[str]:
+        """
+        :return: description of the error which prevented the AppImage from being linted, or None if it was linted
+        """
+
+        return self._error
+
+    def __repr__(self):
+        return "LintStats({}, {}, {})".format(self._duration, repr(self._max_versions), repr(self._error))
@@ -0,0 +1,125 @@
+import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterator, List, Tuple
+
+from .test_result import TestResult
+
+
+class ValueTable:
+    """
+    Assigns indices to values, so that they can be referred to by (small) integers instead of storing them over and
+    over again.
+    """
+
+    def __init__(self):
+        self._values = []
+        self._indices = {}
+
+    def index(self, value: Hashable) -> int:
+        try:
+            return self._indices[value]
+
+        except KeyError:
+            index = len(self._values)
+
+            self._values.append(value)
+            self._indices[value] = index
+
+            return index
+
+    def __getitem__(self, index: int):
+        return self._values[index]
+
+    def __len__(self):
+        return len(self._values)
+
+
+class ResultVector(Mapping):
+    """
+    Compact, read-only representation of the results of a single AppImage, for keeping the results of large batches
+    in memory.
+
+    Check classes, result IDs and messages are stored once in tables shared by all vectors of the process, the vector
+    itself is a single array of indices into these tables. The vector can be used like the dict of results (keyed by
+    check class) it has been made from; the results are recreated on demand.
+
+    Layout of the array: for every check, the index of the check class and the number of results, followed by the
+    index of the result ID and the index of the message (shifted by one bit, the lowest bit being the success) of
+    every result.
+    """
+
+    __slots__ = ("_data",)
+
+    _check_table = ValueTable()
+    _result_id_table = ValueTable()
+    _message_table = ValueTable()
+
+    def __init__(self, results: Mapping):
+        """
+        :param results: results, keyed by check class
+        """
+
+        data = array.array("I")
+
+        for check_cls, check_results in results.items():
+            data.append(self._check_table.index(check_cls))
+            data.append(len(check_results))
+
+            for testres in check_results:
+                data.append(self._result_id_table.index(testres.id()))
+                data.append(self._message_table.index(testres.message()) << 1 | bool(testres.success()))
+
+        self._data = data
+
+    def _iter_checks(self) -> Iterator[Tuple[type, int, int]]:
+        """
+        :return: iterator yielding check classes, and the offsets of their first result and after their last result
+        """
+
+        offset = 0
+
+        while offset < len(self._data):
+            check_cls = self._check_table[self._data[offset]]
+            count = self._data[offset + 1]
+
+            start = offset + 2
+            offset = start + 2 * count
+
+            yield check_cls, start, offset
+
+    def _make_results(self, start: int, end: int) -> List[TestResult]:
+        results = []
+
+        for i in range(start, end, 2):
+            result_id = self._result_id_table[self._data[i]]
+            message_and_success = self._data[i + 1]
+
+            message = self._message_table[message_and_success >> 1]
+            results.append(TestResult(bool(message_and_success & 1), result_id, message))
+
+        return results
+
+    def __getitem__(self, check_cls: type) -> List[TestResult]:
+        for other_check_cls, start, end in self._iter_checks():
+            if other_check_cls is check_cls:
+                return self._make_results(start, end)
+
+        raise KeyError(check_cls)
+
+    def __iter__(self) -> Iterator[type]:
+        for check_cls, _, _ in self._iter_checks():
+            yield check_cls
+
+    def __len__(self):
+        return sum(1 for _ in self._iter_checks())
+
+    def to_dict(self) -> Dict[type, List[TestResult]]:
+        return OrderedDict((check_cls, self._make_results(start, end)) for check_cls, start, end in self._iter_checks())
+
+    def __reduce__(self):
+        # the indices are valid only within this process
+        return type(self), (self.to_dict(),)
+
+    def __repr__(self):
+        return "ResultVector({})".format(repr(self.to_dict()))
@@ -1,8 +1,16 @@
+import sys
+
+
 class TestResult:
+    # large batches produce millions of results, which would need a dict each otherwise
+    __slots__ = ("_success", "_message", "_id")
+
     def __init__(self, success: bool, id: str, message: str):
         self._success = success
-        self._message = message
-        self._id = id
+
+        # the same IDs and messages occur for many AppImages, one copy of them is enough
+        self._message = sys.intern(message)
+        self._id = sys.intern(id)
 
     def success(self):
         return self._success
@@ -13,5 +21,9 @@ class TestResult:
     def id(self):
         return self._id
 
+    def __reduce__(self):
+        # makes sure results received from worker processes are interned, too
+        return type(self), (self._success, self._id, self._message)
+
     def __repr__(self):
         return "TestResult({}, {})".format(self._success, repr(self._message))
@@ -1,2 +1,5 @@
 from .report_base import ReportBase
 from .json_report import JSONReport
+from .results_database import ResultsDatabase
+from .ndjson_report import NDJSONReport
+from .fleet_summary import FleetSummary
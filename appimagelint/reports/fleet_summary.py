@@ -0,0 +1,278 @@
+import collections
+import heapq
+import json
+from typing import Dict, List, Optional, Tuple
+
+from appimagelint._logging import make_logger
+from appimagelint._util import get_version_key
+from appimagelint.models import LintStats, TestResult
+
+
+class FleetSummary:
+    """
+    Summary of the results of (potentially very many) AppImages, e.g., an entire catalogue.
+
+    The summary is updated incrementally while the AppImages are reviewed, and needs the same amount of memory no
+    matter how many AppImages are added: results are counted per result ID, required versions per prefix and version,
+    and only the slowest AppImages are remembered.
+
+    Summaries of different shards of a catalogue can be written to files and merged later on.
+    """
+
+    FORMAT_VERSION = 1
+
+    DEFAULT_TOP = 10
+
+    # prefixes of the libraries shown in the table, the file contains all of them
+    TABLE_PREFIXES = ("GLIBC_", "GLIBCXX_")
+
+    def __init__(self, top: int = DEFAULT_TOP):
+        # number of entries in the lists of the slowest AppImages and the most common failures
+        self._top = top
+
+        self._appimages = 0
+        self._failing_appimages = 0
+        self._appimages_without_results = 0
+        self._total_duration = 0.0
+
+        # numbers of passed and failed tests, keyed by result ID
+        self._results: Dict[str, List[int]] = {}
+
+        # numbers of AppImages requiring a version as their highest version, keyed by prefix and version
+        self._max_versions: Dict[str, collections.Counter] = {}
+        self._appimages_without_versions = 0
+
+        # min-heap of (duration, path) tuples
+        self._slowest: List[Tuple[float, str]] = []
+
+    @staticmethod
+    def _get_logger():
+        return make_logger("fleet_summary")
+
+    def _add_slow_appimage(self, duration: float, path: str):
+        if len(self._slowest) < self._top:
+            heapq.heappush(self._slowest, (duration, path))
+        else:
+            heapq.heappushpop(self._slowest, (duration, path))
+
+    def add(self, path: str, results: Dict[type, List[TestResult]], stats: Optional[LintStats] = None):
+        """
+        Add the results of an AppImage.
+
+        :param stats: stats of the AppImage, if available (they aren't when the results have been taken from a
+            baseline review, for instance)
+        """
+
+        self._appimages += 1
+
+        if not results:
+            self._appimages_without_results += 1
+
+        failing = False
+
+        for check_results in results.values():
+            for testres in check_results:
+                counts = self._results.setdefault(testres.id(), [0, 0])
+
+                if testres.success():
+                    counts[0] += 1
+                else:
+                    counts[1] += 1
+                    failing = True
+
+        if failing:
+            self._failing_appimages += 1
+
+        max_versions = None
+
+        if stats is not None:
+            self._total_duration += stats.duration()
+            self._add_slow_appimage(stats.duration(), path)
+
+            max_versions = stats.max_versions()
+
+        if max_versions is None:
+            self._appimages_without_versions += 1
+        else:
+            for prefix, version in max_versions.items():
+                self._max_versions.setdefault(prefix, collections.Counter())[version] += 1
+
+    def merge(self, other: "FleetSummary"):
+        """
+        Add the AppImages of another summary, e.g., of another shard.
+        """
+
+        self._appimages += other._appimages
+        self._failing_appimages += other._failing_appimages
+        self._appimages_without_results += other._appimages_without_results
+        self._total_duration += other._total_duration
+
+        for result_id, (passed, failed) in other._results.items():
+            counts = self._results.setdefault(result_id, [0, 0])
+            counts[0] += passed
+            counts[1] += failed
+
+        for prefix, counter in other._max_versions.items():
+            self._max_versions.setdefault(prefix, collections.Counter()).update(counter)
+        self._appimages_without_versions += other._appimages_without_versions
+
+        for duration, path in other._slowest:
+            self._add_slow_appimage(duration, path)
+
+    def appimages(self) -> int:
+        return self._appimages
+
+    def pass_rates(self) -> List[Tuple[str, int, int]]:
+        """
+        :return: result IDs (which include the distribution release for compatibility checks), and the numbers of
+            AppImages passing and failing them, sorted by result ID
+        """
+
+        return [(result_id, passed, failed) for result_id, (passed, failed) in sorted(self._results.items())]
+
+    def most_common_failures(self) -> List[Tuple[str, int]]:
+        """
+        :return: result IDs and the numbers of AppImages failing them, most common failures first
+        """
+
+        failures = [(result_id, failed) for result_id, (_, failed) in self._results.items() if failed > 0]
+
+        return sorted(failures, key=lambda i: (-i[1], i[0]))[:self._top]
+
+    def max_versions(self, prefix: str) -> List[Tuple[str, int]]:
+        """
+        :return: histogram of the highest required versions with the given prefix (e.g., GLIBC_), sorted by version
+        """
+
+        counter = self._max_versions.get(prefix, {})
+
+        return sorted(counter.items(), key=lambda i: get_version_key(i[0]))
+
+    def slowest(self) -> List[Tuple[str, float]]:
+        """
+        :return: paths of the slowest AppImages and the time it took to lint them, slowest first
+        """
+
+        return [(path, duration) for duration, path in sorted(self._slowest, reverse=True)]
+
+    def to_json(self) -> dict:
+        return {
+            "version": self.FORMAT_VERSION,
+            "appimages": self._appimages,
+            "failing_appimages": self._failing_appimages,
+            "appimages_without_results": self._appimages_without_results,
+            "total_duration": self._total_duration,
+            "results": {
+                result_id: {"passed": passed, "failed": failed} for result_id, passed, failed in self.pass_rates()
+            },
+            "max_versions": {
+                prefix: dict(self.max_versions(prefix)) for prefix in sorted(self._max_versions)
+            },
+            "appimages_without_versions": self._appimages_without_versions,
+            "slowest": [{"path": path, "duration": duration} for path, duration in self.slowest()],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict, top: int = DEFAULT_TOP) -> "FleetSummary":
+        if data.get("version") != cls.FORMAT_VERSION:
+            raise ValueError("unsupported summary format version: {}".format(data.get("version")))
+
+        summary = cls(top=top)
+
+        summary._appimages = data["appimages"]
+        summary._failing_appimages = data["failing_appimages"]
+        summary._appimages_without_results = data["appimages_without_results"]
+        summary._total_duration = data["total_duration"]
+
+        summary._results = {
+            result_id: [counts["passed"], counts["failed"]] for result_id, counts in data["results"].items()
+        }
+
+        summary._max_versions = {
+            prefix: collections.Counter(versions) for prefix, versions in data["max_versions"].items()
+        }
+        summary._appimages_without_versions = data["appimages_without_versions"]
+
+        for entry in data["slowest"]:
+            summary._add_slow_appimage(entry["duration"], entry["path"])
+
+        return summary
+
+    def write(self, path: str):
+        self._get_logger().info("Writing summary to {}".format(path))
+
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=4)
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str, top: int = DEFAULT_TOP) -> "FleetSummary":
+        with open(path) as f:
+            return cls.from_json(json.load(f), top=top)
+
+    @staticmethod
+    def _format_table(title: str, header: Tuple[str, ...], rows: List[Tuple]) -> List[str]:
+        rows = [tuple(str(i) for i in row) for row in rows]
+
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+
+        def format_row(row):
+            # the first column is left-aligned, the numbers are right-aligned
+            cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            return "  ".join(cells).rstrip()
+
+        lines = [title, "", format_row(header), format_row(tuple("-" * i for i in widths))]
+        lines += [format_row(row) for row in rows]
+        lines.append("")
+
+        return lines
+
+    def to_str(self) -> str:
+        lines = [
+            "AppImages: {} ({} failing at least one test, {} without results)".format(
+                self._appimages, self._failing_appimages, self._appimages_without_results
+            ),
+            "Total time: {:.1f}s".format(self._total_duration),
+            "",
+        ]
+
+        lines += self._format_table("Pass rates", ("Result", "Passed", "Failed", "Pass rate"), [
+            (result_id, passed, failed, "{:.1f}%".format(passed * 100 / (passed + failed)))
+            for result_id, passed, failed in self.pass_rates()
+        ])
+
+        failures = self.most_common_failures()
+
+        if failures:
+            lines += self._format_table("Most common failures", ("Result", "AppImages"), failures)
+
+        for prefix in self.TABLE_PREFIXES:
+            histogram = self.max_versions(prefix)
+
+            if not histogram:
+                continue
+
+            total = sum(count for _, count in histogram)
+
+            lines += self._format_table(
+                "Highest required {} versions".format(prefix.rstrip("_")), ("Version", "AppImages", "Share"), [
+                    (prefix + version, count, "{:.1f}%".format(count * 100 / total)) for version, count in histogram
+                ]
+            )
+
+        if self._appimages_without_versions:
+            lines += [
+                "Required versions unknown for {} AppImages (e.g., results taken from cache)".format(
+                    self._appimages_without_versions
+                ),
+                "",
+            ]
+
+        slowest = self.slowest()
+
+        if slowest:
+            lines += self._format_table("Slowest AppImages", ("AppImage", "Time"), [
+                (path, "{:.2f}s".format(duration)) for path, duration in slowest
+            ])
+
+        return "\n".join(lines).rstrip("\n")
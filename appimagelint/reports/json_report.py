@@ -1,6 +1,9 @@
 import json
+from collections import OrderedDict
+from typing import Dict, List
 
 from appimagelint._logging import make_logger
+from appimagelint.models import TestResult
 from . import ReportBase
 
 
@@ -9,22 +12,46 @@ class JSONReport(ReportBase):
     def _get_logger():
         return make_logger("json_report")
 
+    @staticmethod
+    def checks_to_json(checks: Dict[type, List[TestResult]]) -> list:
+        """
+        Convert the results of a single AppImage into the format used in the report.
+        """
+
+        return [
+            {
+                "name": check.name(),
+                "id": check.id(),
+                "results": [
+                    {
+                        "id": res.id(),
+                        "success": res.success(),
+                        "message": res.message()
+                    } for res in results
+                ]
+            } for check, results in checks.items()
+        ]
+
+    @staticmethod
+    def checks_from_json(data: list) -> Dict[type, List[TestResult]]:
+        """
+        Inverse of :meth:`checks_to_json`, e.g., for merging results stored separately.
+        """
+
+        # avoid circular import
+        from appimagelint.services.checks_manager import ChecksManager
+
+        return OrderedDict(
+            (
+                ChecksManager.get_class(check["id"]),
+                [TestResult(res["success"], res["id"], res["message"]) for res in check["results"]],
+            ) for check in data
+        )
+
     def _make_json(self):
         obj = {
             "results": {
-                path: [
-                    {
-                        "name": check.name(),
-                        "id": check.id(),
-                        "results": [
-                            {
-                                "id": res.id(),
-                                "success": res.success(),
-                                "message": res.message()
-                            } for res in results
-                        ]
-                    } for check, results in checks.items()
-                ] for path, checks in self._results.items()
+                path: self.checks_to_json(checks) for path, checks in self._results.items()
             }
         }
 
@@ -0,0 +1,129 @@
+import json
+import textwrap
+from typing import Dict, Iterator, List, Tuple
+
+from appimagelint._logging import make_logger
+from appimagelint.models import TestResult
+from .json_report import JSONReport
+
+
+class NDJSONReport:
+    """
+    Writes results as newline delimited JSON, one compact record per AppImage, as soon as the AppImage has been
+    reviewed. Unlike :class:`JSONReport`, nothing has to be kept in memory, and a crash loses no more than the results
+    of the AppImages which were being reviewed at that time.
+
+    Every record has the following form (the checks are in the same format as in the JSON report)::
+
+        {"path": "some.AppImage", "checks": [{"name": "...", "id": "...", "results": [...]}]}
+
+    If the orjson module is available, it is used for serializing the records (except for the few it rejects).
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+
+        self._dumps = self._make_dumps()
+
+    @staticmethod
+    def _get_logger():
+        return make_logger("ndjson_report")
+
+    @staticmethod
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    @classmethod
+    def _make_dumps(cls):
+        try:
+            import orjson
+        except ImportError:
+            return cls._json_dumps
+
+        def dumps(obj) -> bytes:
+            try:
+                return orjson.dumps(obj)
+
+            except TypeError:
+                # orjson rejects strings which aren't valid UTF-8, e.g., paths which aren't, decoded with
+                # surrogateescape; json escapes them, like JSONReport does
+                return cls._json_dumps(obj)
+
+        return dumps
+
+    def open(self):
+        self._get_logger().info("Writing NDJSON report to {}".format(self._path))
+
+        self._file = open(self._path, "wb")
+
+    def add(self, path: str, checks: Dict[type, List[TestResult]]):
+        record = {
+            "path": path,
+            "checks": JSONReport.checks_to_json(checks),
+        }
+
+        self._file.write(self._dumps(record) + b"\n")
+
+        # make sure the record survives a crash of the process
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "NDJSONReport":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def read(path: str) -> Iterator[Tuple[str, list]]:
+        """
+        Read the records of an NDJSON report one by one.
+
+        :return: iterator yielding (path, checks) tuples, checks in the format used in the JSON report (see
+            :meth:`JSONReport.checks_from_json`)
+        """
+
+        with open(path) as f:
+            for line in f:
+                # the last record might be incomplete if the process writing the report crashed
+                if not line.endswith("\n"):
+                    NDJSONReport._get_logger().warning("ignoring incomplete record at end of {}".format(path))
+                    break
+
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+
+                yield record["path"], record["checks"]
+
+    @classmethod
+    def convert_to_json(cls, ndjson_path: str, json_path: str):
+        """
+        Convert an NDJSON report into a JSON report, as written by :class:`JSONReport`. The records are converted one
+        at a time, therefore reports of any size can be converted.
+        """
+
+        cls._get_logger().info("Converting NDJSON report {} to JSON report {}".format(ndjson_path, json_path))
+
+        with open(json_path, "w") as f:
+            f.write("{\n    \"results\": {")
+
+            empty = True
+
+            for path, checks in cls.read(ndjson_path):
+                # produces exactly what json.dump() would produce for this entry as part of the entire report
+                entry = json.dumps({path: checks}, indent=4)[len("{\n"):-len("\n}")]
+
+                f.write("\n" if empty else ",\n")
+                f.write(textwrap.indent(entry, "    "))
+
+                empty = False
+
+            f.write("}\n}\n" if empty else "\n    }\n}\n")
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from appimagelint._util import get_version_key
+from appimagelint.models import TestResult
+
+
+class ResultsDatabase:
+    """
+    Stores results in an SQLite database, one AppImage at a time, so that the results of large audits can be queried
+    without loading them all into memory (or parsing huge JSON reports).
+
+    Linting an AppImage again replaces its previous results. Besides the results, the highest required version of
+    every GNU library (e.g., GLIBC_) is stored, where known.
+
+    Like the caches, the database may be used by multiple processes concurrently.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+
+        # connections must never be shared with forked processes
+        self._connection: sqlite3.Connection = None
+        self._connection_pid: int = None
+
+    def path(self) -> str:
+        return self._path
+
+    @staticmethod
+    def _create_tables(connection: sqlite3.Connection):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS appimages ("
+            "id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, linted_at REAL NOT NULL)"
+        )
+
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "appimage_id INTEGER NOT NULL REFERENCES appimages(id), check_id TEXT NOT NULL, result_id TEXT NOT NULL, "
+            "success INTEGER NOT NULL, message TEXT NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS results_appimage_id ON results (appimage_id)")
+        connection.execute("CREATE INDEX IF NOT EXISTS results_check_id ON results (check_id, success)")
+        connection.execute("CREATE INDEX IF NOT EXISTS results_result_id ON results (result_id, success)")
+        connection.execute("CREATE INDEX IF NOT EXISTS results_success ON results (success)")
+
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS requirements ("
+            "appimage_id INTEGER NOT NULL REFERENCES appimages(id), prefix TEXT NOT NULL, version TEXT NOT NULL, "
+            "PRIMARY KEY (appimage_id, prefix))"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS requirements_prefix ON requirements (prefix, version)")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self._path, timeout=60, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables(connection)
+
+        self._connection = connection
+        self._connection_pid = os.getpid()
+
+        return connection
+
+    def add(self, path: str, results: Dict[type, List[TestResult]],
+            max_versions: Optional[Dict[str, str]] = None):
+        """
+        Store the results of an AppImage, replacing earlier results.
+
+        :param path: path to AppImage
+        :param results: results, keyed by check class
+        :param max_versions: highest required version for every prefix (see
+            :meth:`GnuLibVersionRequirements.max_versions`); if None, the previously stored required versions (if any)
+            are kept
+        """
+
+        connection = self._connect()
+
+        path = os.path.abspath(path)
+
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            row = connection.execute("SELECT id FROM appimages WHERE path = ?", (path,)).fetchone()
+
+            if row is None:
+                appimage_id = connection.execute(
+                    "INSERT INTO appimages (path, linted_at) VALUES (?, ?)", (path, time.time())
+                ).lastrowid
+
+            else:
+                appimage_id, = row
+
+                connection.execute("UPDATE appimages SET linted_at = ? WHERE id = ?", (time.time(), appimage_id))
+                connection.execute("DELETE FROM results WHERE appimage_id = ?", (appimage_id,))
+
+            connection.executemany(
+                "INSERT INTO results (appimage_id, check_id, result_id, success, message) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (appimage_id, check_cls.id(), testres.id(), int(bool(testres.success())), testres.message())
+                    for check_cls, check_results in results.items() for testres in check_results
+                ]
+            )
+
+            if max_versions is not None:
+                connection.execute("DELETE FROM requirements WHERE appimage_id = ?", (appimage_id,))
+
+                connection.executemany(
+                    "INSERT INTO requirements (appimage_id, prefix, version) VALUES (?, ?, ?)",
+                    [(appimage_id, prefix, version) for prefix, version in sorted(max_versions.items())]
+                )
+
+        except:  # noqa
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+    def failing(self, result_id: str = None, check_id: str = None) -> List[Tuple[str, str, str]]:
+        """
+        Find failed results, optionally limited to a specific result or check.
+
+        :return: AppImage paths, result IDs and messages
+        """
+
+        query = "SELECT a.path, r.result_id, r.message FROM results r JOIN appimages a ON a.id = r.appimage_id " \
+                "WHERE r.success = 0"
+        params = []
+
+        if result_id is not None:
+            query += " AND r.result_id = ?"
+            params.append(result_id)
+
+        if check_id is not None:
+            query += " AND r.check_id = ?"
+            params.append(check_id)
+
+        query += " ORDER BY a.path, r.rowid"
+
+        return list(self._connect().execute(query, params))
+
+    def summary(self) -> List[Tuple[str, int, int]]:
+        """
+        :return: result IDs, and the numbers of AppImages passing and failing them
+        """
+
+        return list(self._connect().execute(
+            "SELECT result_id, SUM(success), SUM(1 - success) FROM results GROUP BY result_id ORDER BY result_id"
+        ))
+
+    def required_versions(self, prefix: str) -> List[Tuple[str, int]]:
+        """
+        Distribution of the highest required versions of a GNU library.
+
+        :param prefix: prefix of the versioned symbols, e.g., GLIBC_
+        :return: versions (sorted by version) and the numbers of AppImages requiring them
+        """
+
+        rows = self._connect().execute(
+            "SELECT version, COUNT(*) FROM requirements WHERE prefix = ? GROUP BY version", (prefix,)
+        )
+
+        return sorted(rows, key=lambda i: get_version_key(i[0]))
+
+    def prefixes(self) -> List[str]:
+        return [i for i, in self._connect().execute("SELECT DISTINCT prefix FROM requirements ORDER BY prefix")]
+
+    def paths(self) -> Iterable[str]:
+        return [i for i, in self._connect().execute("SELECT path FROM appimages ORDER BY path")]
+
+    def close(self):
+        if self._connection is not None and self._connection_pid == os.getpid():
+            self._connection.close()
+
+        self._connection = None
+        self._connection_pid = None
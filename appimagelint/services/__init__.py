@@ -1,6 +1,16 @@
 from .appimagemounter import AppImageMounter
+from .appimage_extractor import AppImageExtractor
+from .async_appimagemounter import AsyncAppImageMounter
 from .binarywalker import BinaryWalker
+from .payload_filesystem import DirectoryFilesystem, PayloadFilesystem, SquashfsFilesystem
+from .payload_inventory import PayloadEntry, PayloadInventory
 from .gnu_lib_versions_symbol_finder import GnuLibVersionSymbolsFinder
+from .lint_session import LintSession
+from .squashfs_reader import SquashfsReader
 
 
-__all__ = ("AppImageMounter", "BinaryWalker", "GnuLibVersionSymbolsFinder",)
+__all__ = (
+    "AppImageExtractor", "AppImageMounter", "AsyncAppImageMounter", "BinaryWalker", "DirectoryFilesystem",
+    "GnuLibVersionSymbolsFinder", "LintSession", "PayloadEntry", "PayloadFilesystem", "PayloadInventory",
+    "SquashfsFilesystem", "SquashfsReader",
+)
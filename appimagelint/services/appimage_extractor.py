@@ -0,0 +1,185 @@
+import os
+import re
+import shlex
+import shutil
+import subprocess
+from typing import Iterable, List
+
+from ..models import AppImage
+from .._logging import make_logger
+from .._util import make_tempdir
+from .payload_filesystem import SquashfsFilesystem
+from .squashfs_reader import SquashfsReader
+
+
+class AppImageExtractor:
+    """
+    Extracts (parts of) an AppImage's payload into a temporary directory, which is placed on a ramdisk if available.
+
+    Extracting only the files the checks need avoids the random read latency of FUSE mounts, which dominates for
+    AppImages containing thousands of small files.
+
+    unsquashfs is used if it is available. Otherwise, selected files are extracted using :class:`SquashfsReader`, and
+    the entire payload is extracted by the runtime (``--appimage-extract``).
+    """
+
+    _logger = make_logger("appimage_extractor")
+
+    def __init__(self, appimage: AppImage, custom_runtime_path: str = None):
+        self._appimage = appimage
+        self._custom_runtime = custom_runtime_path
+
+        self._tempdir = None
+        self._extract_dir: str = None
+
+    def extract_dir(self) -> str:
+        return self._extract_dir
+
+    def extract(self, paths: Iterable[str] = None):
+        """
+        Extract payload.
+
+        :param paths: paths relative to the payload root to extract (parent directories are created as needed);
+            if None, the entire payload is extracted
+        """
+
+        self._tempdir = make_tempdir()
+
+        try:
+            # unsquashfs and the runtime both insist on creating the target directory themselves
+            self._extract_dir = os.path.join(self._tempdir.name, "squashfs-root")
+
+            unsquashfs_path = shutil.which("unsquashfs")
+
+            if paths is not None:
+                paths = list(paths)
+
+                self._logger.debug("extracting {} files from AppImage {}".format(len(paths), self._appimage.path()))
+
+                # unsquashfs' extract files are line based, so we can't pass it paths containing newlines
+                if unsquashfs_path and not any("\n" in path for path in paths):
+                    self._extract_with_unsquashfs(unsquashfs_path, paths)
+                else:
+                    self._extract_with_reader(paths)
+
+            else:
+                self._logger.debug("extracting entire AppImage {}".format(self._appimage.path()))
+
+                if unsquashfs_path:
+                    self._extract_with_unsquashfs(unsquashfs_path, None)
+                else:
+                    self._extract_with_runtime()
+
+        except:  # noqa
+            self.cleanup()
+            raise
+
+        self._logger.debug("extracted to: {}".format(self._extract_dir))
+
+    @staticmethod
+    def _escape_pattern(path: str) -> str:
+        # unsquashfs treats the entries in extract files as wildcard patterns
+        return re.sub(r"([\\*?\[\]])", r"\\\1", path)
+
+    def _extract_with_unsquashfs(self, unsquashfs_path: str, paths: List[str] = None):
+        with open(self._appimage.path(), "rb") as f:
+            offset = SquashfsReader.find_payload_offset(f.read(64))
+
+        args = [
+            unsquashfs_path, "-no-progress", "-no-xattrs", "-o", str(offset), "-d", self._extract_dir,
+            self._appimage.path(),
+        ]
+
+        if paths is not None:
+            extract_file_path = os.path.join(self._tempdir.name, "extract-files")
+
+            with open(extract_file_path, "w") as f:
+                for path in paths:
+                    f.write(self._escape_pattern(path) + "\n")
+
+            # the extract file must be passed before the image, though
+            args[-1:-1] = ["-ef", extract_file_path]
+
+        self._logger.debug("calling {}".format(" ".join((shlex.quote(i) for i in args))))
+        subprocess.check_call(args, stdout=subprocess.DEVNULL)
+
+    def _extract_with_reader(self, paths: List[str]):
+        filesystem = SquashfsFilesystem(self._appimage.path())
+
+        try:
+            reader = filesystem.reader()
+
+            os.makedirs(self._extract_dir)
+
+            extract_dir = os.path.realpath(self._extract_dir)
+
+            for path in paths:
+                inode = reader.lookup(path, follow_symlinks=False)
+                target_path = os.path.join(self._extract_dir, path)
+
+                # the paths are derived from the payload (e.g., from symlinks' targets), and symlinks extracted before
+                # might be part of them, neither must make us write anywhere else
+                if os.path.commonpath([extract_dir, os.path.realpath(target_path)]) != extract_dir:
+                    self._logger.warning("not extracting {}, which points outside the payload".format(repr(path)))
+                    continue
+
+                if os.path.lexists(target_path):
+                    continue
+
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+                if inode.is_dir():
+                    os.makedirs(target_path, exist_ok=True)
+
+                elif inode.is_symlink():
+                    os.symlink(inode.symlink_target, target_path)
+
+                elif inode.is_file():
+                    with reader.open_file(inode) as src, open(target_path, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+
+                    # make sure we can read the files we extract
+                    os.chmod(target_path, (inode.mode & 0o777) | 0o400)
+
+                # device files, sockets and pipes are of no interest to any check
+
+        finally:
+            filesystem.close()
+
+    def _extract_with_runtime(self):
+        env = dict(os.environ)
+
+        if self._custom_runtime:
+            self._logger.debug("using custom runtime to extract AppImage")
+            env["TARGET_APPIMAGE"] = os.path.abspath(self._appimage.path())
+            args = [self._custom_runtime]
+        else:
+            args = [self._appimage.path()]
+
+        args.append("--appimage-extract")
+
+        # the runtime extracts into squashfs-root in the current working directory
+        self._logger.debug("calling {}".format(" ".join((shlex.quote(i) for i in args))))
+        subprocess.check_call(args, env=env, cwd=self._tempdir.name, stdout=subprocess.DEVNULL)
+
+        if not os.path.isdir(self._extract_dir):
+            raise OSError("runtime did not extract AppImage into {}".format(self._extract_dir))
+
+    def cleanup(self):
+        if self._tempdir is None:
+            return
+
+        self._logger.debug("removing extracted files")
+
+        tempdir = self._tempdir
+        self._tempdir = None
+        self._extract_dir = None
+
+        tempdir.cleanup()
+
+    def __enter__(self) -> str:
+        self.extract()
+        return self.extract_dir()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
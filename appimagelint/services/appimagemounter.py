@@ -1,17 +1,24 @@
 import os
+import selectors
 import shlex
 import subprocess
+import time
+from typing import Dict, Iterator, List, Tuple
 
 from ..models import AppImage
 from .._logging import make_logger
 
 
 class AppImageMounter:
+    # default time to wait for the runtime to report the mountpoint, in seconds
+    DEFAULT_TIMEOUT = 30
+
     _logger = make_logger("appimagemounter")
 
-    def __init__(self, appimage: AppImage, custom_runtime_path: str = None):
+    def __init__(self, appimage: AppImage, custom_runtime_path: str = None, timeout: float = DEFAULT_TIMEOUT):
         self._appimage = appimage
         self._custom_runtime = custom_runtime_path
+        self._timeout = timeout
 
         self._mountpoint: str = None
         self._proc: subprocess.Popen = None
@@ -19,39 +26,88 @@ class AppImageMounter:
     def mountpoint(self):
         return self._mountpoint
 
-    def mount(self):
-        self._logger.debug("mounting AppImage {}".format(self._appimage.path()))
+    @classmethod
+    def make_command(cls, appimage: AppImage, custom_runtime_path: str = None) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Build the command line and environment used to launch the runtime in mount mode.
+
+        :return: arguments and environment
+        """
 
         env = dict(os.environ)
 
-        if self._custom_runtime:
-            self._logger.debug("using custom runtime to mount AppImage")
-            env["TARGET_APPIMAGE"] = os.path.abspath(self._appimage.path())
-            args = [self._custom_runtime]
+        if custom_runtime_path:
+            cls._logger.debug("using custom runtime to mount AppImage")
+            env["TARGET_APPIMAGE"] = os.path.abspath(appimage.path())
+            args = [custom_runtime_path]
         else:
-            args = [self._appimage.path()]
+            args = [appimage.path()]
 
         args.append("--appimage-mount")
 
+        return args, env
+
+    def mount(self):
+        self._logger.debug("mounting AppImage {}".format(self._appimage.path()))
+
+        args, env = self.make_command(self._appimage, self._custom_runtime)
+
         self._logger.debug("calling {}".format(" ".join((shlex.quote(i) for i in args))))
         self._proc = subprocess.Popen(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         self._logger.debug("process ID: {}".format(self._proc.pid))
 
-        while True:
-            # it's an error if we couldn't read the mountpoint from stdout but the process terminated
-            if self._proc.poll() is not None:
-                raise OSError("process exited before we could read AppImage mountpoint"
-                              "(exit code {})".format(self._proc.poll()))
+        deadline = time.monotonic() + self._timeout
 
-            line = self._proc.stdout.readline().decode().strip(" \t\n")
-            self._logger.debug("read line from stdout: {}".format(line))
+        try:
+            for line in self._read_lines(deadline):
+                line = line.decode(errors="replace").strip(" \t\n")
+                self._logger.debug("read line from stdout: {}".format(line))
 
-            if os.path.exists(line):
-                self._mountpoint = line
-                break
+                if os.path.exists(line):
+                    self._mountpoint = line
+                    break
+
+            else:
+                # it's an error if we couldn't read the mountpoint from stdout but the process terminated
+                raise OSError("process exited before we could read AppImage mountpoint"
+                              "(exit code {})".format(self._proc.wait()))
+
+        except:  # noqa
+            self._proc.kill()
+            self._proc.wait()
+            raise
 
         self._logger.debug("mount path: {}".format(self._mountpoint))
 
+    def _read_lines(self, deadline: float) -> Iterator[bytes]:
+        # wait for output instead of polling, a hanging runtime must not block us forever
+        # we read from the file descriptor directly, a buffered reader might hold back lines the selector doesn't know
+        # about
+        fd = self._proc.stdout.fileno()
+        buffer = b""
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+
+            while True:
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    yield line
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0 or not selector.select(remaining):
+                    raise TimeoutError("runtime did not report mountpoint within {} seconds".format(self._timeout))
+
+                data = os.read(fd, 4096)
+
+                if not data:
+                    if buffer:
+                        yield buffer
+                    return
+
+                buffer += data
+
     def unmount(self):
         self._logger.debug("unmounting AppImage")
 
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import shlex
+
+from ..models import AppImage
+from .._logging import make_logger
+from .appimagemounter import AppImageMounter
+
+
+class AsyncAppImageMounter:
+    """
+    asyncio based variant of :class:`AppImageMounter`, which allows for mounting multiple AppImages concurrently.
+
+    Waiting for the runtime to report the mountpoint and tearing it down are bounded by deadlines, so a hanging
+    runtime can't block the event loop forever.
+
+    The runtime process is owned by the event loop the AppImage was mounted in, and must be unmounted in that loop as
+    well.
+    """
+
+    # time to wait for the runtime to exit after asking it to, before killing it, in seconds
+    _TERMINATE_TIMEOUT = 5
+    _KILL_TIMEOUT = 12
+
+    _logger = make_logger("async_appimagemounter")
+
+    def __init__(self, appimage: AppImage, custom_runtime_path: str = None,
+                 timeout: float = AppImageMounter.DEFAULT_TIMEOUT):
+        self._appimage = appimage
+        self._custom_runtime = custom_runtime_path
+        self._timeout = timeout
+
+        self._mountpoint: str = None
+        self._proc: asyncio.subprocess.Process = None
+
+    def appimage(self) -> AppImage:
+        return self._appimage
+
+    def mountpoint(self):
+        return self._mountpoint
+
+    async def _wait_for_mountpoint(self):
+        while True:
+            line = await self._proc.stdout.readline()
+
+            # it's an error if we couldn't read the mountpoint from stdout but the process terminated
+            if not line:
+                raise OSError("process exited before we could read AppImage mountpoint"
+                              "(exit code {})".format(await self._proc.wait()))
+
+            line = line.decode(errors="replace").strip(" \t\n")
+            self._logger.debug("read line from stdout: {}".format(line))
+
+            if os.path.exists(line):
+                return line
+
+    async def mount(self):
+        self._logger.debug("mounting AppImage {}".format(self._appimage.path()))
+
+        args, env = AppImageMounter.make_command(self._appimage, self._custom_runtime)
+
+        self._logger.debug("calling {}".format(" ".join((shlex.quote(i) for i in args))))
+        self._proc = await asyncio.create_subprocess_exec(
+            *args, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        self._logger.debug("process ID: {}".format(self._proc.pid))
+
+        try:
+            self._mountpoint = await asyncio.wait_for(self._wait_for_mountpoint(), self._timeout)
+
+        except asyncio.TimeoutError:
+            await self._kill()
+            raise TimeoutError("runtime did not report mountpoint within {} seconds".format(self._timeout))
+
+        except:  # noqa
+            await self._kill()
+            raise
+
+        self._logger.debug("mount path: {}".format(self._mountpoint))
+
+    async def _kill(self):
+        if self._proc.returncode is not None:
+            return
+
+        self._proc.kill()
+
+        try:
+            await asyncio.wait_for(self._proc.wait(), self._KILL_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._logger.debug("failed to kill process")
+            raise
+
+    async def unmount(self):
+        if self._proc is None:
+            return
+
+        self._logger.debug("unmounting AppImage {}".format(self._appimage.path()))
+
+        self._mountpoint = None
+
+        if self._proc.returncode is not None:
+            return
+
+        self._proc.terminate()
+
+        try:
+            await asyncio.wait_for(self._proc.wait(), self._TERMINATE_TIMEOUT)
+
+        except asyncio.TimeoutError:
+            self._logger.debug("failed to terminate process normally, killing")
+            await self._kill()
+
+    async def __aenter__(self) -> str:
+        await self.mount()
+        return self.mountpoint()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.unmount()
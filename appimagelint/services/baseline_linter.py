@@ -0,0 +1,345 @@
+import stat
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models import AppImage, GnuLibVersionRequirements, TestResult
+from .._logging import make_logger
+from .._util import get_version_key, max_version
+from .appimagemounter import AppImageMounter
+from .checks_manager import ChecksManager
+from .lint_session import LintSession
+from .payload_filesystem import DirectoryFilesystem, PayloadFilesystem, SquashfsFilesystem
+from .payload_inventory import PayloadInventory
+from .result_formatter import ResultFormatter
+from .results_differ import ResultChange, ResultsDiffer
+
+
+class RequirementRegression:
+    """
+    A file which raises the required version of a GNU library compared to the baseline.
+    """
+
+    # the runtime, a file in the payload which is not part of the baseline, or one which has changed
+    KIND_RUNTIME = "runtime"
+    KIND_NEW = "new binary"
+    KIND_CHANGED = "changed binary"
+
+    def __init__(self, prefix: str, path: str, kind: str, old_version: Optional[str], new_version: str):
+        self.prefix = prefix
+        self.path = path
+        self.kind = kind
+        self.old_version = old_version
+        self.new_version = new_version
+
+    def message(self) -> str:
+        return "{} raises {} requirement from {} to {} — file {}".format(
+            self.kind, self.prefix.rstrip("_"), self.old_version or "<none>", self.new_version, self.path
+        )
+
+    def __repr__(self):
+        return "RequirementRegression({})".format(repr(self.message()))
+
+
+class BaselineComparison:
+    """
+    Results of linting an AppImage compared to a baseline, usually the previous release of the same application.
+    """
+
+    def __init__(self, results: Dict[type, List[TestResult]], changes: List[ResultChange],
+                 regressions: List[RequirementRegression], changed_files: Optional[Set[str]]):
+        self.results = results
+        self.changes = changes
+        self.regressions = regressions
+
+        # None if the payloads couldn't be compared
+        self.changed_files = changed_files
+
+
+class BaselineLinter:
+    """
+    Lints AppImages against a baseline, usually the previous release of the same application.
+
+    Most files in the payload are the same in consecutive releases. The payloads' inventories are compared, and only
+    new or changed binaries are scanned, the versions of all other binaries are taken from the baseline. Checks which
+    don't need any of the changed files aren't run at all, the baseline's results are reused instead.
+
+    Besides the results, changes compared to the baseline are reported, including the files which raise the required
+    version of a GNU library.
+    """
+
+    _logger = make_logger("baseline_linter")
+
+    def __init__(self, baseline_path: str, checks_ids: Iterable[str], custom_runtime: str = None,
+                 formatter: ResultFormatter = None, jobs: int = 1, binary_versions_cache=None,
+                 backend: str = LintSession.BACKEND_AUTO, level: str = LintSession.LEVEL_STANDARD,
+                 mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT):
+        self._baseline_path = baseline_path
+        self._checks_ids = [i for i in checks_ids if level in ChecksManager.get_class(i).supported_levels()]
+        self._custom_runtime = custom_runtime
+        self._formatter = formatter or ResultFormatter()
+        self._jobs = jobs
+        self._binary_versions_cache = binary_versions_cache
+        self._backend = backend
+        self._level = level
+        self._mount_timeout = mount_timeout
+
+        # the baseline is linted on first use, and reused for every AppImage compared to it
+        self._baseline_results: Dict[type, List[TestResult]] = None
+        self._baseline_runtime_digest: str = None
+        self._baseline_is_appdir = False
+        self._baseline_requirements: GnuLibVersionRequirements = None
+        self._baseline_file_states: Optional[Dict[str, Tuple[int, int, Optional[str]]]] = None
+        self._baseline_required_files: Dict[str, Optional[Set[str]]] = None
+
+    def _make_session(self, appimage: AppImage, checks_ids: List[str], **kwargs) -> LintSession:
+        return LintSession(
+            appimage, jobs=self._jobs, binary_versions_cache=self._binary_versions_cache, backend=self._backend,
+            check_classes=[ChecksManager.get_class(i) for i in checks_ids], mount_timeout=self._mount_timeout,
+            level=self._level, **kwargs
+        )
+
+    @staticmethod
+    def _open_index_filesystem(appimage: AppImage) -> PayloadFilesystem:
+        # the SquashFS image is indexed directly regardless of the backend, so we don't have to mount the AppImage
+        if appimage.is_appdir():
+            return DirectoryFilesystem(appimage.path())
+
+        return SquashfsFilesystem(appimage.path())
+
+    @staticmethod
+    def _content_states(
+        inventory: PayloadInventory, baseline_states: Optional[Dict[str, Tuple[int, int, Optional[str]]]] = None
+    ) -> Dict[str, Tuple[int, int, Optional[str]]]:
+        """
+        Collect the states of all files in the payload, which reflect the files' contents rather than their
+        modification times (see :meth:`PayloadFilesystem.file_digest`).
+
+        Regular files are hashed only if the baseline contains a file of the same type and size, files which differ in
+        either have changed anyway.
+
+        :param baseline_states: states of the baseline's files, or None to hash all regular files
+        :return: (mode, size, digest or symlink target) tuples, keyed by path
+        """
+
+        states = {}
+
+        for path, (mode, size, _) in inventory.file_states().items():
+            content = None
+
+            if stat.S_ISLNK(mode):
+                content = inventory.readlink(path)
+
+            elif stat.S_ISREG(mode):
+                baseline_state = baseline_states.get(path) if baseline_states is not None else None
+
+                if baseline_states is None or (baseline_state is not None and baseline_state[:2] == (mode, size)):
+                    content = inventory.file_digest(path)
+
+            states[path] = (mode, size, content)
+
+        return states
+
+    def _index(
+        self, appimage: AppImage, baseline_states: Optional[Dict[str, Tuple[int, int, Optional[str]]]] = None
+    ) -> Tuple[Optional[Dict[str, Tuple[int, int, Optional[str]]]], Optional[Dict[str, Optional[Set[str]]]]]:
+        """
+        Collect the states of all files in the payload (see :meth:`_content_states`), and the files every check needs.
+
+        :param baseline_states: see :meth:`_content_states`
+        :return: file states and required files keyed by check ID, or (None, None) if the payload cannot be indexed
+        """
+
+        filesystem = self._open_index_filesystem(appimage)
+
+        try:
+            inventory = PayloadInventory(filesystem)
+
+            file_states = self._content_states(inventory, baseline_states)
+
+            required_files = {}
+
+            # GNU ABI checks share their implementation, and don't need to walk the payload more than once
+            required_files_by_function = {}
+
+            for check_id in self._checks_ids:
+                function = ChecksManager.get_class(check_id).required_files
+
+                if function not in required_files_by_function:
+                    paths = function(inventory, self._level)
+                    required_files_by_function[function] = set(paths) if paths is not None else None
+
+                required_files[check_id] = required_files_by_function[function]
+
+            return file_states, required_files
+
+        except (OSError, ValueError, ImportError):
+            self._logger.debug("could not index payload of {}".format(appimage.path()), exc_info=True)
+            return None, None
+
+        finally:
+            filesystem.close()
+
+    def _lint_baseline(self):
+        if self._baseline_results is not None:
+            return
+
+        self._logger.info("Checking baseline AppImage {}".format(self._baseline_path))
+
+        appimage = AppImage(self._baseline_path, custom_runtime=self._custom_runtime)
+
+        self._baseline_file_states, self._baseline_required_files = self._index(appimage)
+        self._baseline_runtime_digest = appimage.runtime_digest()
+        self._baseline_is_appdir = appimage.is_appdir()
+
+        results = OrderedDict()
+
+        with self._make_session(appimage, self._checks_ids) as session:
+            for check_id in self._checks_ids:
+                check = ChecksManager.get_instance(check_id, session)
+                results[type(check)] = list(check.run())
+
+            # needed for the comparison, even if none of the checks needs them
+            self._baseline_requirements = session.gnu_lib_version_requirements()
+
+        self._baseline_results = results
+
+    @staticmethod
+    def _is_newer(version: str, other_version: Optional[str]) -> bool:
+        return other_version is None or get_version_key(version) > get_version_key(other_version)
+
+    def _find_regressions(self, requirements: GnuLibVersionRequirements) -> List[RequirementRegression]:
+        baseline_requirements = self._baseline_requirements
+        baseline_payload_files = set(baseline_requirements.payload_files())
+        payload_files = set(requirements.payload_files())
+
+        regressions = []
+
+        for prefix in sorted(requirements.prefixes()):
+            old_versions = baseline_requirements.runtime_versions(prefix) | \
+                baseline_requirements.payload_versions(prefix)
+            new_versions = requirements.runtime_versions(prefix) | requirements.payload_versions(prefix)
+
+            old_max = max_version(old_versions) if old_versions else None
+
+            if not new_versions or not self._is_newer(max_version(new_versions), old_max):
+                continue
+
+            # report every file which requires a newer version than the baseline did, not just the newest one
+            for path in requirements.files():
+                file_versions = requirements.file_versions(path, prefix)
+
+                if not file_versions:
+                    continue
+
+                file_max = max_version(file_versions)
+
+                if not self._is_newer(file_max, old_max):
+                    continue
+
+                if path not in payload_files:
+                    kind = RequirementRegression.KIND_RUNTIME
+                elif path in baseline_payload_files:
+                    kind = RequirementRegression.KIND_CHANGED
+                else:
+                    kind = RequirementRegression.KIND_NEW
+
+                regressions.append(RequirementRegression(prefix, path, kind, old_max, file_max))
+
+        return regressions
+
+    def lint(self, path: str) -> BaselineComparison:
+        """
+        Lint AppImage, reusing as much of the baseline's results as possible, and compare the results to the
+        baseline's.
+
+        :param path: path to AppImage (or AppDir)
+        :return: results and changes compared to the baseline
+        """
+
+        self._lint_baseline()
+
+        self._logger.info("Checking AppImage {} against baseline {}".format(path, self._baseline_path))
+
+        appimage = AppImage(path, custom_runtime=self._custom_runtime)
+
+        # nothing needs to be hashed if the baseline couldn't be indexed, as the payloads can't be compared anyway
+        file_states, required_files = self._index(appimage, self._baseline_file_states or {})
+
+        changed_files = None
+        if file_states is not None and self._baseline_file_states is not None:
+            changed_files = {
+                i for i in set(file_states) | set(self._baseline_file_states)
+                if file_states.get(i) != self._baseline_file_states.get(i)
+            }
+
+            self._logger.info("{} files differ from baseline".format(len(changed_files)))
+
+        # we can't tell which checks depend on the runtime (AppDirs don't have one)
+        rerun_all = False
+
+        if not (appimage.is_appdir() and self._baseline_is_appdir):
+            runtime_digest = appimage.runtime_digest()
+
+            if runtime_digest is None or runtime_digest != self._baseline_runtime_digest:
+                self._logger.info("Runtime differs from baseline, running all checks")
+                rerun_all = True
+
+        checks_to_run = []
+
+        for check_id in self._checks_ids:
+            if changed_files is None or rerun_all:
+                checks_to_run.append(check_id)
+                continue
+
+            check_required_files = required_files[check_id]
+            baseline_required_files = self._baseline_required_files[check_id]
+
+            if check_required_files is None or baseline_required_files is None or \
+                    changed_files & (check_required_files | baseline_required_files):
+                checks_to_run.append(check_id)
+
+        # reuse the versions of the binaries which haven't changed
+        known_payload_versions = {}
+        if changed_files is not None:
+            known_payload_versions = {
+                i: self._baseline_requirements.all_file_versions(i)
+                for i in self._baseline_requirements.payload_files() if i not in changed_files
+            }
+
+        results = OrderedDict()
+
+        with self._make_session(appimage, checks_to_run, known_payload_versions=known_payload_versions) as session:
+            for check_id in self._checks_ids:
+                check_cls = ChecksManager.get_class(check_id)
+
+                if check_id in checks_to_run:
+                    check = ChecksManager.get_instance(check_id, session)
+
+                    self._logger.info("Running check \"{}\"".format(check.name()))
+
+                    results[check_cls] = list(check.run())
+
+                else:
+                    self._logger.info("Reusing baseline's results for check \"{}\"".format(check_cls.name()))
+
+                    results[check_cls] = list(self._baseline_results[check_cls])
+
+                for testres in results[check_cls]:
+                    check_cls.get_logger().info(self._formatter.format(testres))
+
+            requirements = session.gnu_lib_version_requirements()
+
+        changes = ResultsDiffer.diff(self._baseline_results, results)
+        regressions = self._find_regressions(requirements)
+
+        if not changes and not regressions:
+            self._logger.info("No changes compared to baseline")
+
+        for change, old_result, new_result in changes:
+            log = self._logger.warning if change == ResultsDiffer.CHANGE_REGRESSED else self._logger.info
+            log("{}: {}".format(change, self._formatter.format(new_result or old_result)))
+
+        for regression in regressions:
+            self._logger.warning(regression.message())
+
+        return BaselineComparison(results, changes, regressions, changed_files)
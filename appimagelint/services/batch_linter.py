@@ -0,0 +1,327 @@
+import collections
+import multiprocessing
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..cache import BinaryVersionsCache, ResultCache, get_metadata_caches
+from ..models import AppImage, LintStats, TestResult
+from .._logging import make_logger
+from .._util import parallel_map
+from ..reports import ResultsDatabase
+from .appimagemounter import AppImageMounter
+from .check_scheduler import CheckScheduler
+from .checks_manager import ChecksManager
+from .lint_session import LintSession
+from .mount_prefetcher import MountPrefetcher, PrefetchedMount
+from .result_formatter import ResultFormatter
+
+
+# state of worker processes, set up by _init_worker
+_worker_linter: "BatchLinter" = None
+_worker_mount_slots = None
+
+
+def _init_worker(linter: "BatchLinter", mount_slots):
+    global _worker_linter, _worker_mount_slots
+    _worker_linter = linter
+    _worker_mount_slots = mount_slots
+
+
+def _lint_in_worker(path: str):
+    return (path,) + _worker_linter.lint_one_with_stats(path, mount_slots=_worker_mount_slots)
+
+
+class BatchLinter:
+    """
+    Lints a (potentially very long) stream of AppImages, optionally running multiple AppImages concurrently in worker
+    processes.
+
+    The number of AppImages mounted at the same time can be limited separately from the number of worker processes,
+    since FUSE mounts are a lot more expensive than the CPU bound parts of the checks.
+
+    When linting in a single process, the next AppImages can be mounted in the background while the current one is
+    being checked, which hides the mount latency.
+    """
+
+    _logger = make_logger("batch_linter")
+
+    def __init__(self, checks_ids: Iterable[str], custom_runtime: str = None, formatter: ResultFormatter = None,
+                 workers: int = 1, max_mounts: int = None, jobs: int = 1,
+                 binary_versions_cache: BinaryVersionsCache = None, result_cache: ResultCache = None,
+                 backend: str = LintSession.BACKEND_MOUNT, prefetch_mounts: int = 0,
+                 mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT, level: str = LintSession.LEVEL_STANDARD,
+                 fail_fast: bool = False, results_db: ResultsDatabase = None, concurrent_checks: bool = True):
+        if level not in LintSession.LEVELS:
+            raise ValueError("unknown level: {}".format(level))
+
+        self._level = level
+
+        self._checks_ids = []
+
+        for check_id in checks_ids:
+            if level not in ChecksManager.get_class(check_id).supported_levels():
+                self._logger.info("Check {} doesn't support level {}, skipping".format(check_id, level))
+                continue
+
+            self._checks_ids.append(check_id)
+
+        self._custom_runtime = custom_runtime
+        self._formatter = formatter or ResultFormatter()
+
+        self._workers = workers
+        self._max_mounts = max_mounts
+
+        # number of worker processes used to scan the binaries within a single AppImage
+        self._jobs = jobs
+
+        self._binary_versions_cache = binary_versions_cache
+        self._result_cache = result_cache
+
+        # how to access the AppImages' contents, see LintSession
+        self._backend = backend
+
+        # number of AppImages to mount in the background ahead of time
+        self._prefetch_mounts = prefetch_mounts
+        self._mount_timeout = mount_timeout
+
+        # stop scanning binaries once the results cannot change anymore
+        self._fail_fast = fail_fast
+
+        # results are stored as soon as an AppImage is finished, by whichever process linted it
+        self._results_db = results_db
+
+        # run independent checks on the same AppImage concurrently, see CheckScheduler
+        self._concurrent_checks = concurrent_checks
+
+    @staticmethod
+    def _warm_up_caches():
+        # caches keep their data in memory once loaded, therefore workers forked afterwards won't have to load and
+        # validate the cache files again
+        for cache in get_metadata_caches():
+            cache.get_data()
+
+    def _result_cache_variant(self) -> str:
+        # the levels produce different sets of results
+        return "level={}".format(self._level)
+
+    def _get_cached_results(
+        self, appimage_digest: str
+    ) -> Optional[Tuple[Dict[type, List[TestResult]], Optional[Dict[str, str]]]]:
+        """
+        :return: cached results for all configured checks and the highest required versions stored along with them, or
+            None unless there are results for every check
+        """
+
+        results = OrderedDict()
+
+        for check_id in self._checks_ids:
+            check_results = self._result_cache.get(appimage_digest, check_id, variant=self._result_cache_variant())
+
+            if check_results is None:
+                return None
+
+            results[ChecksManager.get_class(check_id)] = check_results
+
+        try:
+            max_versions = self._result_cache.get_max_versions(appimage_digest, variant=self._result_cache_variant())
+
+        except KeyError:
+            # the summary and the results database would lack the versions
+            return None
+
+        return results, max_versions
+
+    def lint_one(self, path: str, mount_slots=None,
+                 prefetched_mount: PrefetchedMount = None) -> Dict[type, List[TestResult]]:
+        """
+        Run all configured checks on a single AppImage.
+
+        Errors are logged instead of raised, so that a single broken AppImage doesn't abort an entire batch.
+
+        :param path: path to AppImage
+        :param mount_slots: optional semaphore limiting the number of concurrent mounts
+        :param prefetched_mount: optional mount started in the background, which is unmounted in any case
+        :return: results, keyed by check class (empty if linting the AppImage failed)
+        """
+
+        return self.lint_one_with_stats(path, mount_slots=mount_slots, prefetched_mount=prefetched_mount)[0]
+
+    def lint_one_with_stats(self, path: str, mount_slots=None,
+                            prefetched_mount: PrefetchedMount = None) -> Tuple[Dict[type, List[TestResult]], LintStats]:
+        """
+        Like :meth:`lint_one`, but returns stats like the time it took to lint the AppImage as well.
+
+        :return: results (see :meth:`lint_one`) and stats, which describe the error if linting the AppImage failed
+        """
+
+        self._logger.info("Checking AppImage {}".format(path))
+
+        start_time = time.monotonic()
+
+        results = OrderedDict()
+
+        # the session takes care of unmounting the prefetched mount, unless we don't get to creating one
+        pending_mount = prefetched_mount
+
+        try:
+            appimage = AppImage(path, custom_runtime=self._custom_runtime)
+
+            appimage_digest = None
+            if self._result_cache is not None:
+                appimage_digest = self._result_cache.appimage_digest(path)
+
+                cached = self._get_cached_results(appimage_digest)
+
+                if cached is not None:
+                    self._logger.info("Found cached results for AppImage, skipping checks")
+
+                    cached_results, max_versions = cached
+
+                    for check_cls, check_results in cached_results.items():
+                        for testres in check_results:
+                            check_cls.get_logger().info(self._formatter.format(testres))
+
+                    self._store_results(path, cached_results, max_versions)
+
+                    return cached_results, LintStats(time.monotonic() - start_time, max_versions)
+
+            # all checks share the same session, which makes sure the AppImage is mounted only once
+            session = LintSession(
+                appimage, jobs=self._jobs, mount_slots=mount_slots, binary_versions_cache=self._binary_versions_cache,
+                backend=self._backend, check_classes=[ChecksManager.get_class(i) for i in self._checks_ids],
+                mount_timeout=self._mount_timeout, prefetched_mount=prefetched_mount, level=self._level,
+                fail_fast=self._fail_fast,
+            )
+            pending_mount = None
+
+            with session:
+                scheduler = CheckScheduler(session, self._checks_ids, concurrent=self._concurrent_checks)
+
+                for check_cls, check_results in scheduler.run():
+                    results[check_cls] = check_results
+
+                    for testres in check_results:
+                        check_cls.get_logger().info(self._formatter.format(testres))
+
+                requirements = session.cached_gnu_lib_version_requirements()
+
+            max_versions = None
+            if requirements is not None:
+                max_versions = requirements.max_versions()
+
+            if appimage_digest is not None:
+                for check_cls, check_results in results.items():
+                    self._result_cache.put(
+                        appimage_digest, check_cls.id(), check_results, variant=self._result_cache_variant()
+                    )
+
+                self._result_cache.put_max_versions(
+                    appimage_digest, max_versions, variant=self._result_cache_variant()
+                )
+
+        except KeyboardInterrupt:
+            raise
+
+        except Exception as e:
+            self._logger.exception("failed to lint AppImage {}".format(path))
+            return OrderedDict(), LintStats(time.monotonic() - start_time, error="{}: {}".format(type(e).__name__, e))
+
+        finally:
+            if pending_mount is not None:
+                pending_mount.unmount()
+
+        self._store_results(path, results, max_versions)
+
+        return results, LintStats(time.monotonic() - start_time, max_versions)
+
+    def _store_results(self, path: str, results: Dict[type, List[TestResult]],
+                       max_versions: Dict[str, str] = None):
+        if self._results_db is None:
+            return
+
+        try:
+            self._results_db.add(path, results, max_versions)
+
+        except Exception:
+            # the results are still reported otherwise
+            self._logger.exception("failed to store results of AppImage {} in database".format(path))
+
+    def _prefetch_mount(self, prefetcher: MountPrefetcher, path: str) -> Optional[PrefetchedMount]:
+        try:
+            appimage = AppImage(path, custom_runtime=self._custom_runtime)
+
+            if LintSession.resolve_backend(appimage, self._backend, self._level) != LintSession.BACKEND_MOUNT:
+                return None
+
+        except Exception:
+            # will be reported when linting the AppImage
+            return None
+
+        return prefetcher.prefetch(appimage)
+
+    def _lint_with_prefetching(
+        self, paths: Iterable[str]
+    ) -> Iterator[Tuple[str, Dict[type, List[TestResult]], LintStats]]:
+        with MountPrefetcher(self._custom_runtime, timeout=self._mount_timeout) as prefetcher:
+            pending = collections.deque()
+
+            try:
+                for path in paths:
+                    pending.append((path, self._prefetch_mount(prefetcher, path)))
+
+                    if len(pending) > self._prefetch_mounts:
+                        path, prefetched_mount = pending.popleft()
+                        yield (path,) + self.lint_one_with_stats(path, prefetched_mount=prefetched_mount)
+
+                while pending:
+                    path, prefetched_mount = pending.popleft()
+                    yield (path,) + self.lint_one_with_stats(path, prefetched_mount=prefetched_mount)
+
+            finally:
+                # the caller might stop iterating early, or an error might occur
+                for _, prefetched_mount in pending:
+                    if prefetched_mount is not None:
+                        prefetched_mount.unmount()
+
+    def lint(self, paths: Iterable[str]) -> Iterator[Tuple[str, Dict[type, List[TestResult]]]]:
+        """
+        Lint all AppImages in paths. Paths are read lazily, so that the input can be streamed.
+
+        :param paths: paths to AppImages
+        :return: iterator yielding (path, results) tuples in the order of paths
+        """
+
+        for path, results, _ in self.lint_with_stats(paths):
+            yield path, results
+
+    def lint_with_stats(self, paths: Iterable[str]) -> Iterator[Tuple[str, Dict[type, List[TestResult]], LintStats]]:
+        """
+        Like :meth:`lint`, but yields the stats of every AppImage as well.
+
+        :return: iterator yielding (path, results, stats) tuples in the order of paths
+        """
+
+        if self._workers <= 1:
+            if self._prefetch_mounts > 0 and self._backend in (LintSession.BACKEND_MOUNT, LintSession.BACKEND_AUTO):
+                yield from self._lint_with_prefetching(paths)
+                return
+
+            for path in paths:
+                yield (path,) + self.lint_one_with_stats(path)
+            return
+
+        self._warm_up_caches()
+
+        # AppImages are Linux-only anyway, and forking lets workers inherit the logging setup, the registered checks
+        # and the cached data without having to reload them
+        mp_context = multiprocessing.get_context("fork")
+
+        mount_slots = None
+        if self._max_mounts is not None:
+            mount_slots = mp_context.BoundedSemaphore(self._max_mounts)
+
+        yield from parallel_map(
+            _lint_in_worker, paths, self._workers,
+            mp_context=mp_context, initializer=_init_worker, initargs=(self, mount_slots),
+        )
@@ -1,38 +1,39 @@
 import os
+import posixpath
+from typing import Iterator, Union
+
+from .payload_filesystem import DirectoryFilesystem, PayloadFilesystem
 
 
 class BinaryWalker:
     """
-    Walks a directory using os.walk() and yields all ELF binaries within.
-    """
-
-    def __init__(self, path: str):
-        self._root_path = path
-        self._walk_res = os.walk(self._root_path)
-        self._last_res = next(self._walk_res)
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        def is_elf(path):
-            with open(path, "rb") as f:
-                sig = f.read(4)
-                return sig == b"\x7fELF"
+    Walks a directory or a :class:`PayloadFilesystem` and yields all ELF binaries within.
 
-        while self._last_res is not None:
-            while self._last_res[2]:
-                to_test = self._last_res[2].pop()
-
-                abspath = os.path.join(self._last_res[0], to_test)
-
-                if os.path.isfile(abspath):
-                    if not os.path.islink(abspath):
-                        if is_elf(abspath):
-                            return abspath
-
-            self._last_res = next(self._walk_res)
+    When walking a directory, absolute paths are yielded. When walking a filesystem, the paths are relative to its
+    root.
+    """
 
-        # just a fallback, calling next(self._walk_res) throws a StopIteration once done anyway, which will be
-        # propagated to this function's caller
-        raise StopIteration
+    def __init__(self, path: Union[str, PayloadFilesystem]):
+        if isinstance(path, PayloadFilesystem):
+            self._filesystem = path
+            self._root_path = None
+        else:
+            self._filesystem = DirectoryFilesystem(path)
+            self._root_path = path
+
+    def _is_elf(self, path: str) -> bool:
+        with self._filesystem.open(path) as f:
+            sig = f.read(4)
+            return sig == b"\x7fELF"
+
+    def __iter__(self) -> Iterator[str]:
+        for dirpath, _, filenames in self._filesystem.walk():
+            for filename in filenames:
+                path = posixpath.join(dirpath, filename)
+
+                if self._filesystem.is_file(path) and not self._filesystem.is_link(path):
+                    if self._is_elf(path):
+                        if self._root_path is not None:
+                            yield os.path.join(self._root_path, path)
+                        else:
+                            yield path
@@ -0,0 +1,229 @@
+import contextlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from ..cache import get_metadata_caches
+from ..models import TestResult
+from .._logging import make_logger
+from .checks_manager import ChecksManager
+from .lint_session import LintSession
+
+
+class _LogBuffer(logging.Filter):
+    """
+    Holds back the log records of threads while they are capturing, so that the records can be emitted in one piece
+    later on, rather than interleaved with other threads' records.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self._local = threading.local()
+        self._handlers = []
+
+    def install(self):
+        # records are passed to the handlers of the logger which created them and of all its ancestors
+        logger = make_logger()
+
+        while logger is not None:
+            for handler in logger.handlers:
+                handler.addFilter(self)
+                self._handlers.append(handler)
+
+            if not logger.propagate:
+                break
+
+            logger = logger.parent
+
+    def uninstall(self):
+        for handler in self._handlers:
+            handler.removeFilter(self)
+
+        self._handlers = []
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        records = getattr(self._local, "records", None)
+
+        if records is None:
+            return True
+
+        # the filter is called once per handler
+        if not records or records[-1] is not record:
+            records.append(record)
+
+        return False
+
+    @contextlib.contextmanager
+    def capture(self) -> Iterator[List[logging.LogRecord]]:
+        records = self._local.records = []
+
+        try:
+            yield records
+
+        except BaseException:
+            # the messages might explain the error
+            self._local.records = None
+            self.emit(records)
+            raise
+
+        finally:
+            self._local.records = None
+
+    @staticmethod
+    def emit(records: Iterable[logging.LogRecord]):
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+
+
+class CheckScheduler:
+    """
+    Runs checks on a session, computing the artifacts they need (see :meth:`CheckBase.required_artifacts`) ahead of
+    time.
+
+    The checks and artifacts form a dependency graph: every check depends on the artifacts it needs, and artifacts
+    may depend on other artifacts (see :meth:`LintSession.artifact_dependencies`). Every node is run in a thread as
+    soon as all its dependencies are available, so that, e.g., the icons are decoded while the binaries are being
+    scanned, and an AppImage takes roughly as long as its slowest check rather than as long as all checks together.
+    Every artifact is computed exactly once.
+
+    The results are nevertheless returned in the order of the checks. The checks' log messages are held back until
+    their results are returned, so that the output is the same as if the checks were run one after another.
+    """
+
+    _logger = make_logger("check_scheduler")
+
+    _ARTIFACT_NODE_PREFIX = "artifact:"
+    _CHECK_NODE_PREFIX = "check:"
+
+    def __init__(self, session: LintSession, checks_ids: Iterable[str], concurrent: bool = True):
+        """
+        :param session: session to run checks on
+        :param checks_ids: checks to run
+        :param concurrent: run independent checks concurrently; otherwise, the checks are run one after another, and
+            compute the artifacts they need themselves
+        """
+
+        self._session = session
+        self._checks_ids = list(checks_ids)
+        self._concurrent = concurrent
+
+    def graph(self) -> "OrderedDict[str, Set[str]]":
+        """
+        :return: dependencies of every node; nodes are named artifact:<name> and check:<ID>
+        """
+
+        graph = OrderedDict()
+
+        def add_artifact(artifact):
+            node = self._ARTIFACT_NODE_PREFIX + artifact
+
+            if node in graph:
+                return node
+
+            graph[node] = {add_artifact(i) for i in self._session.artifact_dependencies(artifact)}
+
+            return node
+
+        for check_id in self._checks_ids:
+            check_cls = ChecksManager.get_class(check_id)
+
+            graph[self._CHECK_NODE_PREFIX + check_id] = {add_artifact(i) for i in check_cls.required_artifacts()}
+
+        return graph
+
+    def _run_check(self, check_id: str) -> List[TestResult]:
+        check = ChecksManager.get_instance(check_id, self._session)
+
+        self._logger.info("Running check \"{}\"".format(check.name()))
+
+        return list(check.run())
+
+    def _run_check_buffered(
+        self, check_id: str, log_buffer: _LogBuffer
+    ) -> Tuple[List[logging.LogRecord], List[TestResult]]:
+        with log_buffer.capture() as records:
+            return records, self._run_check(check_id)
+
+    def _make_task(self, node: str, log_buffer: _LogBuffer) -> Callable:
+        if node.startswith(self._CHECK_NODE_PREFIX):
+            check_id = node[len(self._CHECK_NODE_PREFIX):]
+            return lambda: self._run_check_buffered(check_id, log_buffer)
+
+        artifact = node[len(self._ARTIFACT_NODE_PREFIX):]
+        return lambda: self._session.artifact(artifact)
+
+    def _run_sequentially(self) -> Iterator[Tuple[type, List[TestResult]]]:
+        for check_id in self._checks_ids:
+            yield ChecksManager.get_class(check_id), self._run_check(check_id)
+
+    def _run_concurrently(self) -> Iterator[Tuple[type, List[TestResult]]]:
+        graph = self.graph()
+
+        # the checks would all try to load (or even download) the same data at the same time otherwise
+        for cache in get_metadata_caches():
+            cache.get_data()
+
+        # the binaries are scanned while other checks are running, the worker processes must not be forked then
+        if self._ARTIFACT_NODE_PREFIX + LintSession.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS in graph:
+            self._session.start_workers()
+
+        pending = list(graph)
+        finished: Set[str] = set()
+        running = {}
+
+        # log records and results of the checks, keyed by check ID
+        results: Dict[str, Tuple[List[logging.LogRecord], List[TestResult]]] = {}
+        next_check = 0
+
+        log_buffer = _LogBuffer()
+        log_buffer.install()
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(graph)) as executor:
+                while pending or running:
+                    for node in [i for i in pending if graph[i] <= finished]:
+                        pending.remove(node)
+                        running[executor.submit(self._make_task(node, log_buffer))] = node
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        node = running.pop(future)
+
+                        # errors abort the entire run, like they would if the checks were run one after another
+                        # the executor waits for the nodes which are still running
+                        rv = future.result()
+
+                        if node.startswith(self._CHECK_NODE_PREFIX):
+                            results[node[len(self._CHECK_NODE_PREFIX):]] = rv
+
+                        finished.add(node)
+
+                    # pass on results in the order of the checks, as soon as they are available, right after the
+                    # checks' log messages
+                    while next_check < len(self._checks_ids) and self._checks_ids[next_check] in results:
+                        check_id = self._checks_ids[next_check]
+                        records, check_results = results.pop(check_id)
+
+                        log_buffer.emit(records)
+
+                        yield ChecksManager.get_class(check_id), check_results
+                        next_check += 1
+
+        finally:
+            log_buffer.uninstall()
+
+    def run(self) -> Iterator[Tuple[type, List[TestResult]]]:
+        """
+        Run all checks.
+
+        :return: iterator yielding check classes and their results, in the order of the checks
+        """
+
+        if self._concurrent and len(self._checks_ids) > 1:
+            return self._run_concurrently()
+
+        return self._run_sequentially()
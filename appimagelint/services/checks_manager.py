@@ -2,7 +2,7 @@ from collections import OrderedDict
 from typing import Iterable
 
 from appimagelint.checks import CheckBase, GlibcABICheck, GlibcxxABICheck, IconsCheck, DesktopFilesCheck
-from appimagelint.models import AppImage
+from appimagelint.services import LintSession
 
 
 class ChecksManager:
@@ -15,24 +15,34 @@ class ChecksManager:
 
         check_id = check_cls.id()
 
-        if id in cls._registered_checks:
-            raise KeyError("check with ID {} already registered".format(id))
+        if check_id in cls._registered_checks:
+            raise KeyError("check with ID {} already registered".format(check_id))
 
         cls._registered_checks[check_id] = check_cls
 
     @classmethod
     def init(cls):
         for check_cls in [GlibcABICheck, GlibcxxABICheck, IconsCheck, DesktopFilesCheck]:
-            cls.register_check(check_cls)
+            # init() may be called more than once, e.g., when appimagelint is used as a library
+            if check_cls.id() not in cls._registered_checks:
+                cls.register_check(check_cls)
 
     @classmethod
     def list_checks(cls) -> Iterable:
         return list(cls._registered_checks)
 
     @classmethod
-    def get_instance(cls, check_id: str, appimage: AppImage) -> CheckBase:
+    def get_class(cls, check_id: str) -> type:
         try:
-            return cls._registered_checks[check_id](appimage)
+            return cls._registered_checks[check_id]
+
+        except KeyError:
+            raise KeyError("could not find check with ID {}".format(check_id))
+
+    @classmethod
+    def get_instance(cls, check_id: str, session: LintSession) -> CheckBase:
+        try:
+            return cls._registered_checks[check_id](session)
 
         except KeyError:
             raise KeyError("could not find check with ID {}".format(check_id))
@@ -0,0 +1,329 @@
+import hashlib
+import mmap
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+from .._logging import make_logger
+
+
+class ElfVersionReader:
+    """
+    Reads the GNU symbol versioning information (i.e., the contents of the .gnu.version_r and .gnu.version_d sections)
+    from ELF files in process, which is a lot cheaper than calling readelf for every single file.
+
+    Supports 32-bit and 64-bit ELF files of either endianness. If the section headers are missing (e.g., because they
+    have been stripped), the dynamic segment is used to locate the version information instead.
+
+    Files are memory mapped by default. Alternatively, any bytes-like object supporting len(), slicing, find() and
+    close() can be passed in (see :meth:`PayloadFilesystem.open_buffer`).
+    """
+
+    _SHT_GNU_VERDEF = 0x6ffffffd
+    _SHT_GNU_VERNEED = 0x6ffffffe
+
+    _PT_LOAD = 1
+    _PT_DYNAMIC = 2
+
+    _DT_NULL = 0
+    _DT_STRTAB = 5
+    _DT_VERDEF = 0x6ffffffc
+    _DT_VERDEFNUM = 0x6ffffffd
+    _DT_VERNEED = 0x6ffffffe
+    _DT_VERNEEDNUM = 0x6fffffff
+
+    @staticmethod
+    def _get_logger():
+        return make_logger("elf_version_reader")
+
+    def __init__(self, path: str, buffer=None):
+        """
+        :param path: path to ELF file
+        :param buffer: optional buffer holding the file's contents; the reader takes ownership, i.e., closes it
+        """
+
+        self._path = path
+        self._buffer = buffer
+
+        self._file = None
+        self._data: mmap.mmap = None
+
+        # set when parsing the ELF header
+        self._endianness: str = None
+        self._is_64bit: bool = None
+
+        # maps section type to (offset of section, number of entries, offset of associated string table)
+        self._version_sections = {}
+
+        # maps section type to (size of section, size of associated string table), only available if the section
+        # headers could be read
+        self._version_section_sizes = {}
+
+    def open(self):
+        if self._buffer is not None:
+            self._data = self._buffer
+            self._buffer = None
+
+        else:
+            self._file = open(self._path, "rb")
+
+        try:
+            if self._data is None:
+                self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self._parse_headers()
+        except:  # noqa
+            self.close()
+            raise
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ElfVersionReader":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _unpack(self, fmt: str, offset: int) -> Tuple:
+        fmt = self._endianness + fmt
+        size = struct.calcsize(fmt)
+
+        # slicing works with all kinds of buffers, unlike struct.unpack_from()
+        data = self._data[offset:offset + size] if offset >= 0 else b""
+
+        if len(data) != size:
+            raise ValueError("truncated or corrupt ELF file: {}".format(self._path))
+
+        return struct.unpack(fmt, data)
+
+    def _read_string(self, offset: int) -> str:
+        end = self._data.find(b"\x00", offset)
+
+        if offset >= len(self._data) or end < 0:
+            raise ValueError("invalid string table offset in ELF file: {}".format(self._path))
+
+        return self._data[offset:end].decode(errors="replace")
+
+    def _parse_headers(self):
+        ident = self._data[:16]
+
+        if len(ident) < 16 or ident[:4] != b"\x7fELF":
+            raise ValueError("not an ELF file: {}".format(self._path))
+
+        ei_class, ei_data = ident[4], ident[5]
+
+        if ei_class not in (1, 2):
+            raise ValueError("invalid ELF class {} in file {}".format(ei_class, self._path))
+        if ei_data not in (1, 2):
+            raise ValueError("invalid ELF data encoding {} in file {}".format(ei_data, self._path))
+
+        self._is_64bit = ei_class == 2
+        self._endianness = "<" if ei_data == 1 else ">"
+
+        if self._is_64bit:
+            e_phoff, e_shoff = self._unpack("QQ", 32)
+            e_phentsize, e_phnum, e_shentsize, e_shnum = self._unpack("HHHH", 54)
+        else:
+            e_phoff, e_shoff = self._unpack("II", 28)
+            e_phentsize, e_phnum, e_shentsize, e_shnum = self._unpack("HHHH", 42)
+
+        if e_shoff:
+            self._parse_section_headers(e_shoff, e_shentsize, e_shnum)
+
+        # the section headers are optional at runtime, and may have been stripped from the file
+        if not self._version_sections and e_phoff:
+            self._parse_dynamic_segment(e_phoff, e_phentsize, e_phnum)
+
+    def _section_header(self, offset: int) -> Tuple[int, int, int, int, int, int]:
+        """
+        :return: sh_type, sh_addr, sh_offset, sh_size, sh_link, sh_info
+        """
+
+        if self._is_64bit:
+            sh_type, _, sh_addr, sh_offset, sh_size, sh_link, sh_info = self._unpack("IQQQQII", offset + 4)
+        else:
+            sh_type, _, sh_addr, sh_offset, sh_size, sh_link, sh_info = self._unpack("IIIIIII", offset + 4)
+
+        return sh_type, sh_addr, sh_offset, sh_size, sh_link, sh_info
+
+    def _parse_section_headers(self, e_shoff: int, e_shentsize: int, e_shnum: int):
+        # in case there are too many sections to store their number in the ELF header, the first section header's
+        # sh_size field holds the actual value
+        if e_shnum == 0:
+            e_shnum = self._section_header(e_shoff)[3]
+
+        headers = [self._section_header(e_shoff + i * e_shentsize) for i in range(e_shnum)]
+
+        for sh_type, _, sh_offset, sh_size, sh_link, sh_info in headers:
+            if sh_type not in (self._SHT_GNU_VERDEF, self._SHT_GNU_VERNEED):
+                continue
+
+            try:
+                _, _, strtab_offset, strtab_size, _, _ = headers[sh_link]
+            except IndexError:
+                raise ValueError("invalid string table reference in ELF file: {}".format(self._path))
+
+            self._version_sections[sh_type] = (sh_offset, sh_info, strtab_offset)
+            self._version_section_sizes[sh_type] = (sh_size, strtab_size)
+
+    def _parse_dynamic_segment(self, e_phoff: int, e_phentsize: int, e_phnum: int):
+        loads = []
+        dynamic = None
+
+        for i in range(e_phnum):
+            offset = e_phoff + i * e_phentsize
+
+            if self._is_64bit:
+                p_type, _, p_offset, p_vaddr, _, p_filesz = self._unpack("IIQQQQ", offset)
+            else:
+                p_type, p_offset, p_vaddr, _, p_filesz = self._unpack("IIIII", offset)
+
+            if p_type == self._PT_LOAD:
+                loads.append((p_vaddr, p_offset, p_filesz))
+            elif p_type == self._PT_DYNAMIC:
+                dynamic = (p_offset, p_filesz)
+
+        if dynamic is None:
+            return
+
+        def vaddr_to_offset(vaddr):
+            for p_vaddr, p_offset, p_filesz in loads:
+                if p_vaddr <= vaddr < p_vaddr + p_filesz:
+                    return vaddr - p_vaddr + p_offset
+
+            raise ValueError("could not map address {} to file offset in ELF file: {}".format(hex(vaddr), self._path))
+
+        entry_fmt, entry_size = ("qQ", 16) if self._is_64bit else ("iI", 8)
+
+        tags = {}
+
+        offset, size = dynamic
+        for entry_offset in range(offset, offset + size, entry_size):
+            d_tag, d_val = self._unpack(entry_fmt, entry_offset)
+
+            if d_tag == self._DT_NULL:
+                break
+
+            tags[d_tag] = d_val
+
+        if self._DT_STRTAB not in tags:
+            return
+
+        strtab_offset = vaddr_to_offset(tags[self._DT_STRTAB])
+
+        for section_type, addr_tag, num_tag in (
+            (self._SHT_GNU_VERDEF, self._DT_VERDEF, self._DT_VERDEFNUM),
+            (self._SHT_GNU_VERNEED, self._DT_VERNEED, self._DT_VERNEEDNUM),
+        ):
+            if addr_tag in tags:
+                section_offset = vaddr_to_offset(tags[addr_tag])
+                self._version_sections[section_type] = (section_offset, tags.get(num_tag, 0), strtab_offset)
+
+    def fingerprint(self) -> Optional[str]:
+        """
+        Calculate a cheap fingerprint of the file, which covers everything the version information is decoded from
+        (the ELF identification, the file size, the version sections and their string tables).
+
+        Files with the same fingerprint are guaranteed to yield the same version information, which makes the
+        fingerprint suitable as a cache key.
+
+        :return: hex digest, or None if the sections' sizes are unknown (e.g., because section headers are missing)
+        """
+
+        if set(self._version_sections) != set(self._version_section_sizes):
+            return None
+
+        d = hashlib.blake2b(digest_size=20)
+
+        d.update(self._data[:16])
+        d.update(struct.pack("<Q", len(self._data)))
+
+        hashed_strtabs = set()
+
+        for section_type in sorted(self._version_sections):
+            offset, count, strtab_offset = self._version_sections[section_type]
+            size, strtab_size = self._version_section_sizes[section_type]
+
+            d.update(struct.pack("<IQQ", section_type, count, size))
+            d.update(self._data[offset:offset + size])
+
+            # both sections usually share .dynstr
+            if strtab_offset not in hashed_strtabs:
+                d.update(struct.pack("<Q", strtab_size))
+                d.update(self._data[strtab_offset:strtab_offset + strtab_size])
+                hashed_strtabs.add(strtab_offset)
+
+        return d.hexdigest()
+
+    def _iter_entries(self, section_type: int) -> Iterator[int]:
+        try:
+            offset, count, _ = self._version_sections[section_type]
+        except KeyError:
+            return
+
+        # the layout of the version structures is the same in 32-bit and 64-bit ELF files, their vd_next/vn_next
+        # fields are stored at different offsets, though
+        next_field_offset = 12 if section_type == self._SHT_GNU_VERNEED else 16
+
+        for _ in range(count):
+            yield offset
+
+            next_offset, = self._unpack("I", offset + next_field_offset)
+
+            if not next_offset:
+                break
+
+            offset += next_offset
+
+    def version_requirements(self) -> List[str]:
+        """
+        Names of all the versions required from other libraries (.gnu.version_r), e.g., ``GLIBC_2.14``.
+        """
+
+        strtab_offset = self._version_sections.get(self._SHT_GNU_VERNEED, (None, None, None))[2]
+
+        rv = []
+
+        for verneed_offset in self._iter_entries(self._SHT_GNU_VERNEED):
+            vn_cnt, = self._unpack("H", verneed_offset + 2)
+            vn_aux, = self._unpack("I", verneed_offset + 8)
+
+            vernaux_offset = verneed_offset + vn_aux
+
+            for _ in range(vn_cnt):
+                vna_name, vna_next = self._unpack("II", vernaux_offset + 8)
+                rv.append(self._read_string(strtab_offset + vna_name))
+
+                if not vna_next:
+                    break
+
+                vernaux_offset += vna_next
+
+        return rv
+
+    def version_definitions(self) -> List[str]:
+        """
+        Names of all the versions defined by the file itself (.gnu.version_d), e.g., ``GLIBCXX_3.4.21``.
+        """
+
+        strtab_offset = self._version_sections.get(self._SHT_GNU_VERDEF, (None, None, None))[2]
+
+        rv = []
+
+        for verdef_offset in self._iter_entries(self._SHT_GNU_VERDEF):
+            vd_cnt, = self._unpack("H", verdef_offset + 6)
+            vd_aux, = self._unpack("I", verdef_offset + 12)
+
+            # further auxiliary entries only name the parent versions, which are defined in their own entries anyway
+            if vd_cnt:
+                vda_name, = self._unpack("I", verdef_offset + vd_aux)
+                rv.append(self._read_string(strtab_offset + vda_name))
+
+        return rv
@@ -1,9 +1,14 @@
+import functools
 import os
-import subprocess
-from typing import List
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 from .._logging import make_logger
+from .._util import parallel_map
 from ..services import BinaryWalker
+from .elf_version_reader import ElfVersionReader
+from .payload_filesystem import PayloadFilesystem
 
 
 class GnuLibVersionSymbolsFinder:
@@ -11,60 +16,132 @@ class GnuLibVersionSymbolsFinder:
     def _get_logger(self):
         return make_logger("gnu_lib_versions_symbols_finder")
 
-    def __init__(self, query_reqs: bool = True, query_deps: bool = False):
+    # matches versioned symbols like GLIBC_2.2.5 or CXXABI_1.3, the prefix includes the trailing underscore
+    _versioned_symbol_pattern = re.compile(r"^(.+_)([0-9.]+)$")
+
+    def __init__(self, query_reqs: bool = True, query_deps: bool = False, jobs: int = 1, cache=None,
+                 filesystem: PayloadFilesystem = None):
         self._query_reqs = query_reqs
         self._query_deps = query_deps
 
-    def detect_gnu_lib_versions(self, pattern, path):
-        env = dict(os.environ)
-        env["LC_ALL"] = "C"
-        env["LANGUAGE"] = "C"
+        # number of worker processes used to scan multiple files
+        self._jobs = jobs
 
-        versions = []
+        # optional BinaryVersionsCache, used to skip decoding files whose version information has been seen before
+        self._cache = cache
+
+        # if set, paths are relative to this filesystem's root instead of paths in the local filesystem
+        self._filesystem = filesystem
+
+    def _open_reader(self, path) -> ElfVersionReader:
+        if self._filesystem is None:
+            return ElfVersionReader(path)
 
-        data: str = subprocess.check_output(["readelf", "-V", path], env=env).decode()
-        lines: List[str] = data.splitlines()
+        return ElfVersionReader(path, buffer=self._filesystem.open_buffer(path))
+
+    def _read_symbols_from_reader(self, reader: ElfVersionReader) -> List[str]:
+        symbols = []
 
-        elf_sections = []
         if self._query_deps:
-            elf_sections.append(".gnu.version_d")
+            symbols += reader.version_definitions()
         if self._query_reqs:
-            elf_sections.append(".gnu.version_r")
-
-        for elf_section_name in elf_sections:
-            in_req_section = False
-            for line in lines:
-                if elf_section_name in line:
-                    in_req_section = True
-                elif not in_req_section:
-                    continue
-
-                # end of section
-                if not line.strip():
-                    break
-
-                parts = line.split()
-
-                for index, part in enumerate(parts):
-                    try:
-                        if part.lower() != "name:":
-                            continue
-                    except IndexError:
-                        continue
-
-                    symbol = parts[index+1]
-
-                    if pattern in symbol:
-                        version = symbol.split(pattern)[1]
-
-                        for c in version:
-                            if c not in "0123456789.":
-                                self._get_logger().debug("ignoring invalid version {} (parsed from {})".format(
-                                    repr(version), repr(symbol))
-                                )
-                                break
-                        else:
-                            versions.append(version)
+            symbols += reader.version_requirements()
+
+        return symbols
+
+    def _read_symbols(self, path) -> List[str]:
+        with self._open_reader(path) as reader:
+            return self._read_symbols_from_reader(reader)
+
+    def detect_all_gnu_lib_versions(self, path) -> Dict[str, List[str]]:
+        """
+        Detect versions for all prefixes (GLIBC_, GLIBCXX_, CXXABI_, GCC_, ...) at once, which requires reading the
+        file only once.
+
+        :param path: path to ELF file
+        :return: versions found in file, keyed by prefix (e.g., {"GLIBC_": ["2.2.5", "2.17"]})
+        """
+
+        with self._open_reader(path) as reader:
+            fingerprint = None
+            cache_variant = "all:reqs={}:deps={}".format(int(self._query_reqs), int(self._query_deps))
+
+            if self._cache is not None:
+                fingerprint = reader.fingerprint()
+
+            if fingerprint is not None:
+                cached_versions = self._cache.get(fingerprint, variant=cache_variant)
+
+                if cached_versions is not None:
+                    return cached_versions
+
+            symbols = self._read_symbols_from_reader(reader)
+
+        versions = {}
+
+        for symbol in symbols:
+            match = self._versioned_symbol_pattern.match(symbol)
+
+            if not match:
+                self._get_logger().debug("ignoring symbol without valid version: {}".format(repr(symbol)))
+                continue
+
+            prefix, version = match.groups()
+            versions.setdefault(prefix, []).append(version)
+
+        if fingerprint is not None:
+            self._cache.put(fingerprint, versions, variant=cache_variant)
+
+        return versions
+
+    def _detect_all_gnu_lib_versions_with_path(self, path) -> Tuple[str, Dict[str, List[str]]]:
+        # a single broken file must not prevent the rest of the AppImage from being linted, like readelf, which just
+        # prints a warning
+        try:
+            return path, self.detect_all_gnu_lib_versions(path)
+
+        except (OSError, ValueError) as e:
+            self._get_logger().warning("could not read versions from {}, ignoring file: {}".format(path, e))
+            return path, {}
+
+    def detect_all_gnu_lib_versions_in_files(
+        self, paths: Iterable[str], executor: ProcessPoolExecutor = None
+    ) -> Iterator[Tuple[str, Dict[str, List[str]]]]:
+        """
+        Run :meth:`detect_all_gnu_lib_versions` on many files, using the configured number of worker processes.
+
+        Files which cannot be read (e.g., truncated ones) are logged and reported to have no versions.
+
+        :param paths: paths to ELF files, may be a stream like a :class:`BinaryWalker`
+        :param executor: pool with the configured number of worker processes to use (see :func:`parallel_map`)
+        :return: iterator yielding (path, versions) tuples in the order of paths
+        """
+
+        return parallel_map(self._detect_all_gnu_lib_versions_with_path, paths, self._jobs, executor=executor)
+
+    def _detect_gnu_lib_versions_with_path(self, pattern, path) -> Tuple[str, List[str]]:
+        try:
+            return path, self.detect_gnu_lib_versions(pattern, path)
+
+        except (OSError, ValueError) as e:
+            self._get_logger().warning("could not read versions from {}, ignoring file: {}".format(path, e))
+            return path, []
+
+    def detect_gnu_lib_versions(self, pattern, path):
+        versions = []
+
+        for symbol in self._read_symbols(path):
+            if pattern in symbol:
+                version = symbol.split(pattern)[1]
+
+                for c in version:
+                    if c not in "0123456789.":
+                        self._get_logger().debug("ignoring invalid version {} (parsed from {})".format(
+                            repr(version), repr(symbol))
+                        )
+                        break
+                else:
+                    versions.append(version)
 
         return versions
 
@@ -76,8 +153,9 @@ class GnuLibVersionSymbolsFinder:
 
         versions = set()
 
-        for binary in BinaryWalker(dirpath):
-            binary_versions = self.detect_gnu_lib_versions(prefix, binary)
+        detect = functools.partial(self._detect_gnu_lib_versions_with_path, prefix)
+
+        for binary, binary_versions in parallel_map(detect, BinaryWalker(dirpath), self._jobs):
             logger.debug(f"versions in {binary} (prefix {prefix}): {binary_versions}")
             versions.update(binary_versions)
         else:
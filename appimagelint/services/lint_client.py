@@ -0,0 +1,155 @@
+import collections
+import json
+import os
+import socket
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from ..models import TestResult
+from .._logging import make_logger
+from .checks_manager import ChecksManager
+from .lint_server import LintServer
+from .lint_session import LintSession
+
+
+class LintClient:
+    """
+    Sends lint jobs to a :class:`LintServer`, and collects the results.
+    """
+
+    _logger = make_logger("lint_client")
+
+    def __init__(self, socket_path: str = None):
+        self._socket_path = socket_path or LintServer.default_socket_path()
+
+    def socket_path(self) -> str:
+        return self._socket_path
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(self._socket_path)
+
+            # anyone could have created the socket (e.g., in a shared temporary directory), and send back fake results
+            uid = LintServer.peer_uid(sock)
+
+            if uid != os.getuid():
+                raise PermissionError("lint server listening on {} is run by another user (uid {})".format(
+                    self._socket_path, uid
+                ))
+
+        except:  # noqa
+            sock.close()
+            raise
+
+        return sock
+
+    def is_available(self) -> bool:
+        """
+        :return: whether a server is listening on the socket
+        """
+
+        if not os.path.exists(self._socket_path):
+            return False
+
+        try:
+            self._connect().close()
+
+        except PermissionError as e:
+            self._logger.warning("{}, not using it".format(e))
+            return False
+
+        except OSError:
+            return False
+
+        return True
+
+    def _send_jobs(self, sock: socket.socket, jobs: Iterable[Dict]):
+        try:
+            with sock.makefile("wb") as f:
+                for job in jobs:
+                    f.write(json.dumps(job).encode() + b"\n")
+
+                    # the server starts working on the job right away
+                    f.flush()
+
+            # signals the server there are no more jobs
+            sock.shutdown(socket.SHUT_WR)
+
+        except OSError:
+            # the reader notices the server is gone as well
+            self._logger.debug("failed to send jobs to server", exc_info=True)
+
+    def lint(self, paths: Iterable[str], checks_ids: List[str] = None, level: str = LintSession.LEVEL_STANDARD,
+             backend: str = LintSession.BACKEND_AUTO,
+             fail_fast: bool = False) -> Iterator[Tuple[str, Dict[type, List[TestResult]]]]:
+        """
+        Lint AppImages on the server. Paths are read lazily, so that the input can be streamed.
+
+        :param paths: paths to AppImages
+        :param checks_ids: checks to run (default: all)
+        :return: iterator yielding (path, results) tuples in the order of paths, like :meth:`BatchLinter.lint`
+        """
+
+        sock = self._connect()
+
+        # paths of the jobs sent so far, whose results haven't been received yet
+        # the server runs in a different working directory, but the results must be reported for the paths we got
+        pending_paths = collections.deque()
+
+        def jobs():
+            for path in paths:
+                pending_paths.append(path)
+
+                yield {
+                    "path": os.path.abspath(path),
+                    "checks": checks_ids,
+                    "level": level,
+                    "backend": backend,
+                    "fail_fast": fail_fast,
+                }
+
+        # the jobs are sent while the results are read, otherwise both sides might end up waiting for each other to
+        # read some data once the socket's buffers are full
+        writer = threading.Thread(target=self._send_jobs, args=(sock, jobs()), daemon=True)
+        writer.start()
+
+        try:
+            with sock.makefile("rb") as f:
+                # results of the current job, keyed by check ID
+                results = {}
+
+                for line in f:
+                    message = json.loads(line.decode())
+
+                    if message["type"] == LintServer.MESSAGE_RESULT:
+                        result = message["result"]
+                        testres = TestResult(result["success"], result["id"], result["message"])
+
+                        results.setdefault(message["check"], []).append(testres)
+
+                    elif message["type"] == LintServer.MESSAGE_DONE:
+                        path = pending_paths.popleft()
+
+                        if message["error"] is not None:
+                            self._logger.error("failed to lint AppImage {}: {}".format(path, message["error"]))
+
+                        yield path, OrderedDict(
+                            (ChecksManager.get_class(i), results.get(i, [])) for i in message["checks"]
+                        )
+
+                        results = {}
+
+            if pending_paths:
+                raise OSError("server closed connection before sending all results")
+
+        finally:
+            # wakes up the writer, in case it's still sending jobs
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            sock.close()
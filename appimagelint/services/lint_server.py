@@ -0,0 +1,383 @@
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+from typing import Dict, List
+
+from ..cache import BinaryVersionsCache, ResultCache, get_metadata_caches
+from .._logging import make_logger
+from .._util import start_process_pool
+from .appimagemounter import AppImageMounter
+from .batch_linter import BatchLinter
+from .checks_manager import ChecksManager
+from .lint_session import LintSession
+from .result_formatter import ResultFormatter
+
+
+# state of worker processes, set up by _init_worker
+_worker_server: "LintServer" = None
+
+
+def _init_worker(server: "LintServer"):
+    global _worker_server
+    _worker_server = server
+
+
+def _run_job_in_worker(job: Dict) -> List[Dict]:
+    return _worker_server.run_job(job)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    _logger = make_logger("lint_server")
+
+    def handle(self):
+        lint_server = self.server.lint_server
+
+        # the socket's permissions should keep others out already, but the jobs are run with our permissions
+        uid = LintServer.peer_uid(self.request)
+
+        if uid != os.getuid():
+            self._logger.warning("rejecting connection from other user (uid {})".format(uid))
+            return
+
+        lint_server.handle_connection(self.rfile, self.wfile)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, lint_server: "LintServer"):
+        self.lint_server = lint_server
+        super().__init__(path, _RequestHandler)
+
+
+class LintServer:
+    """
+    Long-running lint daemon, which keeps the metadata caches, the runtime and the registered checks in memory, so
+    that clients don't have to pay for loading them over and over again.
+
+    Clients connect to a Unix socket and send lint jobs as JSON objects, one per line::
+
+        {"path": "/abs/path/to/some.AppImage", "checks": ["glibc_abi_check"], "level": "standard"}
+
+    Only "path" is required, "checks" (default: all), "level", "backend" and "fail_fast" are optional. The jobs are
+    run in a pool of worker processes. For every job, the server sends a "result" message per test result, followed
+    by a "done" message, again as JSON objects one per line, in the order the jobs were received::
+
+        {"type": "result", "path": "...", "check": "glibc_abi_check", "result": {"id": "...", "success": true, ...}}
+        {"type": "done", "path": "...", "checks": ["glibc_abi_check"], "error": null}
+    """
+
+    MESSAGE_RESULT = "result"
+    MESSAGE_DONE = "done"
+
+    _logger = make_logger("lint_server")
+
+    def __init__(self, socket_path: str = None, custom_runtime: str = None, formatter: ResultFormatter = None,
+                 workers: int = 1, jobs: int = 1, binary_versions_cache: BinaryVersionsCache = None,
+                 result_cache: ResultCache = None, mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT):
+        self._socket_path = socket_path or self.default_socket_path()
+        self._custom_runtime = custom_runtime
+        self._formatter = formatter or ResultFormatter()
+        self._workers = workers
+        self._jobs = jobs
+        self._binary_versions_cache = binary_versions_cache
+        self._result_cache = result_cache
+        self._mount_timeout = mount_timeout
+
+        self._executor = None
+        self._server: _UnixServer = None
+
+    @staticmethod
+    def _fallback_socket_dir() -> str:
+        return os.path.join(tempfile.gettempdir(), "appimagelint-{}".format(os.getuid()))
+
+    @classmethod
+    def default_socket_path(cls) -> str:
+        # the runtime directory is private to the user, and cleaned up when they log out
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+
+        # the temporary directory is shared with other users, who could create the socket before us, therefore we
+        # use a directory only we may access
+        if not runtime_dir:
+            runtime_dir = cls._fallback_socket_dir()
+
+        return os.path.join(runtime_dir, "appimagelint-{}.sock".format(os.getuid()))
+
+    @staticmethod
+    def peer_uid(sock: socket.socket) -> int:
+        """
+        :return: ID of the user running the process on the other end of a connected Unix socket
+        """
+
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", creds)
+
+        return uid
+
+    def socket_path(self) -> str:
+        return self._socket_path
+
+    @staticmethod
+    def _validate_job(job) -> Dict:
+        if not isinstance(job, dict) or not isinstance(job.get("path"), str):
+            raise ValueError("job must be an object with a path")
+
+        checks_ids = job.get("checks")
+
+        if checks_ids is not None:
+            if not isinstance(checks_ids, list):
+                raise ValueError("checks must be a list of check IDs")
+
+            for check_id in checks_ids:
+                try:
+                    ChecksManager.get_class(check_id)
+                except KeyError as e:
+                    raise ValueError(*e.args)
+
+        if job.get("level", LintSession.LEVEL_STANDARD) not in LintSession.LEVELS:
+            raise ValueError("unknown level: {}".format(job["level"]))
+
+        if job.get("backend", LintSession.BACKEND_AUTO) not in LintSession.BACKENDS:
+            raise ValueError("unknown backend: {}".format(job["backend"]))
+
+        return job
+
+    def run_job(self, job: Dict) -> List[Dict]:
+        """
+        Lint a single AppImage. Called in the worker processes.
+
+        :return: messages to send to the client
+        """
+
+        path = job["path"]
+        level = job.get("level", LintSession.LEVEL_STANDARD)
+
+        checks_ids = job.get("checks") or ChecksManager.list_checks()
+
+        linter = BatchLinter(
+            checks_ids,
+            custom_runtime=self._custom_runtime,
+            formatter=self._formatter,
+            jobs=self._jobs,
+            binary_versions_cache=self._binary_versions_cache,
+            result_cache=self._result_cache,
+            backend=job.get("backend", LintSession.BACKEND_AUTO),
+            mount_timeout=self._mount_timeout,
+            level=level,
+            fail_fast=bool(job.get("fail_fast", False)),
+        )
+
+        results, stats = linter.lint_one_with_stats(path)
+
+        messages = []
+
+        for check_cls, check_results in results.items():
+            for testres in check_results:
+                messages.append({
+                    "type": self.MESSAGE_RESULT,
+                    "path": path,
+                    "check": check_cls.id(),
+                    "result": {
+                        "id": testres.id(),
+                        "success": testres.success(),
+                        "message": testres.message(),
+                    },
+                })
+
+        # checks might not yield any results, the client needs to know which ones have been run nevertheless
+        messages.append({
+            "type": self.MESSAGE_DONE, "path": path, "checks": [i.id() for i in results], "error": stats.error(),
+        })
+
+        return messages
+
+    @classmethod
+    def _make_error_message(cls, path: str, e: Exception) -> Dict:
+        return {"type": cls.MESSAGE_DONE, "path": path, "checks": [], "error": "{}: {}".format(type(e).__name__, e)}
+
+    def _read_jobs(self, rfile, pending: queue.Queue):
+        try:
+            for line in rfile:
+                line = line.strip()
+
+                if not line:
+                    continue
+
+                try:
+                    job = self._validate_job(json.loads(line.decode()))
+
+                except ValueError as e:
+                    path = None
+
+                    try:
+                        path = json.loads(line.decode()).get("path")
+                    except (ValueError, AttributeError):
+                        pass
+
+                    pending.put([{"type": self.MESSAGE_DONE, "path": path, "checks": [], "error": str(e)}])
+                    continue
+
+                try:
+                    future = self._executor.submit(_run_job_in_worker, job)
+
+                except RuntimeError as e:
+                    # e.g., BrokenProcessPool after a worker has crashed
+                    self._logger.error("failed to run job for {}: {}".format(job["path"], e))
+                    pending.put([self._make_error_message(job["path"], e)])
+                    continue
+
+                # the path is needed to report the job's failure
+                pending.put((job["path"], future))
+
+        except (OSError, ValueError):
+            self._logger.debug("failed to read from client", exc_info=True)
+
+        finally:
+            pending.put(None)
+
+    def handle_connection(self, rfile, wfile):
+        """
+        Run the jobs sent by a client, and send back the results. Jobs are read (and run) ahead while the results of
+        earlier jobs are sent, but only so far that slow clients can't make us pile up results.
+        """
+
+        pending = queue.Queue(maxsize=self._workers * 4)
+
+        reader = threading.Thread(target=self._read_jobs, args=(rfile, pending), daemon=True)
+        reader.start()
+
+        finished = False
+
+        try:
+            while True:
+                item = pending.get()
+
+                if item is None:
+                    finished = True
+                    break
+
+                if isinstance(item, list):
+                    messages = item
+
+                else:
+                    path, future = item
+
+                    # a failed job (or a crashed worker) must not cost the client the results of the other jobs
+                    try:
+                        messages = future.result()
+
+                    except Exception as e:
+                        self._logger.error("failed to lint {}: {}".format(path, e))
+                        messages = [self._make_error_message(path, e)]
+
+                for message in messages:
+                    wfile.write(json.dumps(message).encode() + b"\n")
+
+                wfile.flush()
+
+        except (BrokenPipeError, ConnectionResetError):
+            self._logger.debug("client disconnected")
+
+        finally:
+            # the reader must not block forever on a full queue
+            if not finished:
+                while pending.get() is not None:
+                    pass
+
+    def _make_socket_dir(self):
+        socket_dir = os.path.dirname(os.path.abspath(self._socket_path))
+
+        try:
+            os.mkdir(socket_dir, 0o700)
+        except FileExistsError:
+            pass
+
+        if socket_dir != self._fallback_socket_dir():
+            return
+
+        # someone else might have created the directory in the shared temporary directory before us
+        dir_stat = os.lstat(socket_dir)
+
+        if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+            raise RuntimeError("{} must be a directory only the current user may access".format(socket_dir))
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self._socket_path):
+            return
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(self._socket_path)
+
+        except OSError:
+            # nobody is listening anymore, probably a leftover of a server which was killed
+            self._logger.debug("removing stale socket {}".format(self._socket_path))
+            os.unlink(self._socket_path)
+
+        else:
+            raise RuntimeError("another server is listening on {} already".format(self._socket_path))
+
+        finally:
+            sock.close()
+
+    def start(self):
+        self._make_socket_dir()
+        self._remove_stale_socket()
+
+        # load everything before forking the workers, so that they don't have to load it again
+        for cache in get_metadata_caches():
+            cache.get_data()
+
+        # AppImages are Linux-only anyway, and forking lets workers inherit the logging setup, the registered checks
+        # and the cached data
+        # unlike multiprocessing.Pool's, the executor's workers are not daemonic, and may start worker processes for
+        # scanning binaries themselves
+        # the workers are started before any connection is handled, as forking while other threads are running is
+        # prone to deadlocks
+        mp_context = multiprocessing.get_context("fork")
+        self._executor = start_process_pool(
+            self._workers, mp_context=mp_context, initializer=_init_worker, initargs=(self,)
+        )
+
+        # the jobs are run with the user's permissions, nobody else must be able to send any
+        # the socket is created with these permissions right away, changing them after binding it would be racy
+        old_umask = os.umask(0o177)
+
+        try:
+            self._server = _UnixServer(self._socket_path, self)
+        finally:
+            os.umask(old_umask)
+
+    def serve_forever(self):
+        self._logger.info("Listening on {}".format(self._socket_path))
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+
+            try:
+                os.unlink(self._socket_path)
+            except FileNotFoundError:
+                pass
+
+        if self._executor is not None:
+            # jobs which are running already are finished, as killing them would leave their AppImages mounted
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "LintServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
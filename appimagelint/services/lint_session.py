@@ -0,0 +1,551 @@
+import posixpath
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import packaging.version
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ..models import AppImage, GnuLibVersionRequirements
+from .._logging import make_logger
+from .._util import start_process_pool
+from .appimage_extractor import AppImageExtractor
+from .appimagemounter import AppImageMounter
+from .gnu_lib_versions_symbol_finder import GnuLibVersionSymbolsFinder
+from .payload_filesystem import DirectoryFilesystem, PayloadFilesystem, SquashfsFilesystem
+from .payload_inventory import PayloadInventory
+from .squashfs_reader import SquashfsReader
+
+
+class LintSession:
+    """
+    Holds per-AppImage state which is shared by all checks run on the same AppImage.
+
+    The payload is accessed through a :class:`PayloadFilesystem`. Depending on the backend, the AppImage is either
+    mounted lazily the first time a check needs its contents, and stays mounted until the session is closed, so that
+    the runtime has to be launched only once per AppImage, its SquashFS image is read directly without mounting, or
+    the files the checks need are extracted into a temporary directory. The auto backend picks one of them based on
+    the payload's size and number of files.
+
+    Expensive data needed by more than one check (e.g., the versioned dependencies of all binaries) are computed once
+    on first use and cached for the rest of the session. Checks declare which of these artifacts they need (see
+    :meth:`CheckBase.required_artifacts`), so that they can be computed ahead of time while other checks are running.
+    The session may be used by multiple threads concurrently.
+    """
+
+    _logger = make_logger("lint_session")
+
+    # mount the AppImage using its runtime
+    BACKEND_MOUNT = "mount"
+    # read the SquashFS image directly, which requires neither FUSE nor running the runtime
+    BACKEND_SQUASHFS = "squashfs"
+    # extract the files the checks need into a temporary directory
+    BACKEND_EXTRACT = "extract"
+    # select one of the above per AppImage
+    BACKEND_AUTO = "auto"
+
+    # used for AppDirs, which can be accessed directly (cannot be selected)
+    BACKEND_DIRECTORY = "directory"
+
+    BACKENDS = (BACKEND_AUTO, BACKEND_MOUNT, BACKEND_SQUASHFS, BACKEND_EXTRACT)
+
+    # fast gate which reads only the runtime and the entries in the AppDir root
+    LEVEL_QUICK = "quick"
+    # regular checks, which scan the entire payload
+    LEVEL_STANDARD = "standard"
+    # includes checks which are too expensive for regular use
+    LEVEL_FULL = "full"
+
+    LEVELS = (LEVEL_QUICK, LEVEL_STANDARD, LEVEL_FULL)
+
+    # shared data the checks may depend on, see artifact()
+    # access to the payload (including mounting or extracting the AppImage)
+    ARTIFACT_FILESYSTEM = "filesystem"
+    # index of the payload's metadata
+    ARTIFACT_INVENTORY = "inventory"
+    # versioned dependencies of the runtime and all binaries in the payload
+    ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS = "gnu_lib_version_requirements"
+
+    ARTIFACTS = (ARTIFACT_FILESYSTEM, ARTIFACT_INVENTORY, ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS)
+
+    # the auto backend extracts payloads with at least this many files, as long as unsquashfs is available and the
+    # payload is small enough to fit in a ramdisk comfortably
+    # with many small files, per file overhead dominates, and unsquashfs is a lot faster at that than reading the
+    # files one by one, either in Python or through FUSE
+    _AUTO_EXTRACT_MIN_FILES = 1000
+    _AUTO_EXTRACT_MAX_PAYLOAD_SIZE = 512 * 1024 * 1024
+
+    def __init__(self, appimage: AppImage, jobs: int = 1, mount_slots=None, binary_versions_cache=None,
+                 backend: str = BACKEND_MOUNT, check_classes: Iterable[type] = None,
+                 mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT, prefetched_mount=None,
+                 level: str = LEVEL_STANDARD, known_payload_versions: Mapping[str, Mapping[str, Iterable[str]]] = None,
+                 fail_fast: bool = False):
+        if backend not in self.BACKENDS:
+            raise ValueError("unknown backend: {}".format(backend))
+
+        if level not in self.LEVELS:
+            raise ValueError("unknown level: {}".format(level))
+
+        self._appimage = appimage
+        self._backend = backend
+        self._level = level
+
+        # classes of the checks which will be run in this session, used to select the files to extract
+        # if None, the entire payload is extracted
+        self._check_classes = list(check_classes) if check_classes is not None else None
+
+        # number of worker processes to use for scanning binaries
+        self._jobs = jobs
+
+        # pool of these worker processes, if started ahead of time (see start_workers())
+        self._executor: ProcessPoolExecutor = None
+
+        # optional BinaryVersionsCache shared by all sessions
+        self._binary_versions_cache = binary_versions_cache
+
+        # optional semaphore shared by multiple processes to limit the number of concurrent mounts
+        self._mount_slots = mount_slots
+        self._mount_timeout = mount_timeout
+
+        # optional mount started in the background (see MountPrefetcher), used instead of mounting the AppImage
+        self._prefetched_mount = prefetched_mount
+
+        self._mounter: AppImageMounter = None
+        self._holds_mount_slot = False
+        self._extractor: AppImageExtractor = None
+        self._filesystem: PayloadFilesystem = None
+        self._inventory: PayloadInventory = None
+
+        # versions of payload files which are known not to have changed since they were scanned last (see LintWatcher),
+        # keyed by path and prefix, which are not scanned again
+        self._known_payload_versions: Dict[str, Mapping[str, Iterable[str]]] = dict(known_payload_versions or {})
+
+        # stop scanning binaries as soon as the checks' results cannot change anymore
+        # the requirements table is incomplete then, and contains only the binaries scanned up to that point
+        self._fail_fast = fail_fast
+
+        self._gnu_lib_version_requirements: GnuLibVersionRequirements = None
+
+        # every artifact is computed by exactly one thread, while the others wait for it
+        # the locks are reentrant, since mounting the AppImage is part of creating the filesystem
+        self._artifact_locks = {artifact: threading.RLock() for artifact in self.ARTIFACTS}
+
+    def appimage(self) -> AppImage:
+        return self._appimage
+
+    def level(self) -> str:
+        return self._level
+
+    def backend(self) -> str:
+        """
+        :return: backend used to access the payload (never auto, the actual backend is selected on first call)
+        """
+
+        self._backend = self.resolve_backend(self._appimage, self._backend, self._level)
+        return self._backend
+
+    @classmethod
+    def resolve_backend(cls, appimage: AppImage, backend: str, level: str = LEVEL_STANDARD) -> str:
+        """
+        Determine the backend actually used for an AppImage, i.e., select one if backend is auto.
+        """
+
+        if appimage.is_appdir():
+            return cls.BACKEND_DIRECTORY
+
+        if backend == cls.BACKEND_AUTO:
+            backend = cls._select_backend(appimage, level)
+            cls._logger.debug("selected backend {} for AppImage {}".format(backend, appimage.path()))
+
+        return backend
+
+    @classmethod
+    def _select_backend(cls, appimage: AppImage, level: str) -> str:
+        try:
+            with SquashfsReader(appimage.path()) as reader:
+                file_count = reader.inode_count()
+                payload_size = reader.bytes_used()
+
+        except (OSError, ValueError, ImportError) as e:
+            # e.g., type 1 AppImages or unsupported compression, the runtime knows how to deal with them
+            cls._logger.debug("cannot read SquashFS image directly, falling back to mounting: {}".format(e))
+            return cls.BACKEND_MOUNT
+
+        # quick checks read only a handful of files, extracting them wouldn't pay off
+        if level != cls.LEVEL_QUICK and file_count >= cls._AUTO_EXTRACT_MIN_FILES and \
+                payload_size <= cls._AUTO_EXTRACT_MAX_PAYLOAD_SIZE and shutil.which("unsquashfs"):
+            return cls.BACKEND_EXTRACT
+
+        # reading the image directly avoids the mount latency, and only the few blocks the checks actually need are
+        # decompressed
+        return cls.BACKEND_SQUASHFS
+
+    def artifact_dependencies(self, artifact: str) -> Tuple[str, ...]:
+        """
+        :return: artifacts needed to compute the given artifact
+        """
+
+        if artifact == self.ARTIFACT_INVENTORY:
+            return self.ARTIFACT_FILESYSTEM,
+
+        if artifact == self.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS:
+            # only the runtime is scanned on the quick level, which doesn't need access to the payload
+            if self._level == self.LEVEL_QUICK:
+                return ()
+
+            return self.ARTIFACT_INVENTORY,
+
+        if artifact == self.ARTIFACT_FILESYSTEM:
+            return ()
+
+        raise ValueError("unknown artifact: {}".format(artifact))
+
+    def artifact(self, artifact: str):
+        """
+        Compute an artifact (or get it from the session, if it has been computed already).
+        """
+
+        if artifact == self.ARTIFACT_FILESYSTEM:
+            return self.filesystem()
+
+        if artifact == self.ARTIFACT_INVENTORY:
+            return self.inventory()
+
+        if artifact == self.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS:
+            return self.gnu_lib_version_requirements()
+
+        raise ValueError("unknown artifact: {}".format(artifact))
+
+    def start_workers(self):
+        """
+        Start the worker processes used for scanning binaries now, rather than when the binaries are scanned.
+
+        Forking while other threads are running is prone to deadlocks in the child processes (e.g., if another thread
+        holds the logging lock at that moment), therefore this must be called before the session is used by multiple
+        threads.
+        """
+
+        if self._jobs > 1 and self._executor is None:
+            self._executor = start_process_pool(self._jobs)
+
+    def mountpoint(self) -> str:
+        # AppDirs are already "mounted"
+        if self.backend() == self.BACKEND_DIRECTORY:
+            return self._appimage.path()
+
+        if self.backend() != self.BACKEND_MOUNT:
+            raise ValueError("mountpoint not available with backend {}".format(self._backend))
+
+        with self._artifact_locks[self.ARTIFACT_FILESYSTEM]:
+            return self._mount()
+
+    def _mount(self) -> str:
+        if self._mounter is None and self._prefetched_mount is not None:
+            mounter = self._prefetched_mount
+            self._prefetched_mount = None
+
+            # waits for the mount to finish, there's nothing to clean up if it failed
+            mounter.mount()
+
+            self._mounter = mounter
+
+        if self._mounter is None:
+            if self._mount_slots is not None:
+                self._logger.debug("waiting for free mount slot")
+                self._mount_slots.acquire()
+
+            mounter = self._appimage.mount(timeout=self._mount_timeout)
+
+            try:
+                mounter.mount()
+            except:  # noqa
+                if self._mount_slots is not None:
+                    self._mount_slots.release()
+                raise
+
+            self._mounter = mounter
+            self._holds_mount_slot = self._mount_slots is not None
+
+        return self._mounter.mountpoint()
+
+    def filesystem(self) -> PayloadFilesystem:
+        """
+        Access the AppImage's payload. Paths are relative to the payload's root.
+        """
+
+        with self._artifact_locks[self.ARTIFACT_FILESYSTEM]:
+            if self._filesystem is None:
+                backend = self.backend()
+
+                if backend == self.BACKEND_DIRECTORY:
+                    self._filesystem = DirectoryFilesystem(self._appimage.path())
+                elif backend == self.BACKEND_SQUASHFS:
+                    self._filesystem = SquashfsFilesystem(self._appimage.path())
+                elif backend == self.BACKEND_EXTRACT:
+                    self._filesystem = DirectoryFilesystem(self._extract())
+                else:
+                    self._filesystem = DirectoryFilesystem(self.mountpoint())
+
+            return self._filesystem
+
+    def inventory(self) -> PayloadInventory:
+        """
+        Index of the payload's metadata shared by all checks, which should be preferred over :meth:`filesystem` for
+        anything but reading the files' contents.
+        """
+
+        with self._artifact_locks[self.ARTIFACT_INVENTORY]:
+            if self._inventory is None:
+                self._inventory = PayloadInventory(self.filesystem())
+
+            return self._inventory
+
+    def _files_to_extract(self) -> Optional[List[str]]:
+        if self._check_classes is None:
+            return None
+
+        filesystem = SquashfsFilesystem(self._appimage.path())
+
+        try:
+            inventory = PayloadInventory(filesystem)
+
+            paths = []
+
+            for check_cls in self._check_classes:
+                check_paths = check_cls.required_files(inventory, self._level)
+
+                if check_paths is None:
+                    return None
+
+                paths += [path for path in check_paths if inventory.is_link(path) or not inventory.is_dir(path)]
+
+            # symlinks are useless without their targets
+            for path in list(paths):
+                for _ in range(SquashfsReader.MAX_SYMLINK_DEPTH):
+                    if not inventory.is_link(path):
+                        break
+
+                    target = inventory.readlink(path)
+
+                    # absolute symlinks point outside the payload
+                    if target.startswith("/"):
+                        break
+
+                    path = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+                    paths.append(path)
+
+            return list(dict.fromkeys(paths))
+
+        finally:
+            filesystem.close()
+
+    def _extract(self) -> str:
+        try:
+            paths = self._files_to_extract()
+
+        except (OSError, ValueError, ImportError) as e:
+            self._logger.debug("cannot select files to extract, extracting entire payload: {}".format(e))
+            paths = None
+
+        extractor = self._appimage.extract()
+        extractor.extract(paths)
+
+        self._extractor = extractor
+
+        return extractor.extract_dir()
+
+    def gnu_lib_version_requirements(self) -> GnuLibVersionRequirements:
+        """
+        Scan the runtime and all binaries in the payload for versioned dependencies on GNU libraries.
+        All prefixes are collected in a single pass, so adding checks for more libraries doesn't cause more I/O.
+
+        On the quick level, only the runtime is scanned.
+
+        In fail-fast mode, scanning stops once the verdicts of all checks are settled (see
+        :meth:`CheckBase.verdict_settling_versions`). The binaries most likely to settle them, i.e., the largest ones
+        and those in usr/lib, are scanned first.
+
+        :return: requirements table for this AppImage
+        """
+
+        with self._artifact_locks[self.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS]:
+            if self._gnu_lib_version_requirements is None:
+                self._gnu_lib_version_requirements = self._scan_gnu_lib_version_requirements()
+
+            return self._gnu_lib_version_requirements
+
+    def _scan_gnu_lib_version_requirements(self) -> GnuLibVersionRequirements:
+        requirements = GnuLibVersionRequirements()
+
+        # AppDirs don't have a runtime yet
+        if not self._appimage.is_appdir():
+            runtime_finder = GnuLibVersionSymbolsFinder(
+                query_reqs=True, query_deps=False, cache=self._binary_versions_cache
+            )
+
+            runtime_path = self._appimage.path()
+            requirements.add_runtime_file(runtime_path, runtime_finder.detect_all_gnu_lib_versions(runtime_path))
+        else:
+            self._logger.debug("AppDir has no runtime, skipping runtime scan")
+
+        if self._level == self.LEVEL_QUICK:
+            self._logger.debug("quick level, skipping payload scan")
+            return requirements
+
+        filesystem = self.filesystem()
+
+        settling_versions = None
+        if self._fail_fast:
+            settling_versions = self._get_settling_versions()
+
+        # versions which haven't been exceeded yet, keyed by prefix
+        unsettled_versions = None
+        if settling_versions is not None:
+            unsettled_versions = {
+                prefix: version for prefix, version in settling_versions.items()
+                if not self._exceeds(requirements.runtime_versions(prefix), version)
+            }
+
+            if not unsettled_versions:
+                self._logger.info("Results cannot change anymore, skipping payload scan")
+                return requirements
+
+        finder = GnuLibVersionSymbolsFinder(
+            query_reqs=True, query_deps=False, jobs=self._jobs, cache=self._binary_versions_cache,
+            filesystem=filesystem
+        )
+
+        # this check takes advantage of libc embedding static symbols into the binary depending on what
+        # features are used
+        # even binaries built on newer platforms may be running on older systems unless such features are used
+        # example: a simple hello world built on bionic can run fine on trusty just fine
+        inventory = self.inventory()
+        binaries = inventory.binaries()
+
+        if unsettled_versions is not None:
+            binaries = self._sort_for_fail_fast(inventory, binaries)
+
+        def executables():
+            for path in binaries:
+                try:
+                    known_versions = self._known_payload_versions[path]
+                except KeyError:
+                    yield path
+                else:
+                    requirements.add_payload_file(path, known_versions)
+
+        for executable, versions in finder.detect_all_gnu_lib_versions_in_files(executables(), self._executor):
+            requirements.add_payload_file(executable, versions)
+
+            if unsettled_versions is None:
+                continue
+
+            for prefix, version in list(unsettled_versions.items()):
+                if self._exceeds(versions.get(prefix, ()), version):
+                    del unsettled_versions[prefix]
+
+            if not unsettled_versions:
+                self._logger.info("Results cannot change anymore, skipping remaining binaries")
+                break
+
+        return requirements
+
+    def _get_settling_versions(self) -> Optional[Dict[str, str]]:
+        """
+        Combine the versions settling the verdicts of all checks run in this session.
+
+        :return: versions keyed by prefix, or None if they are unknown
+        """
+
+        if self._check_classes is None:
+            return None
+
+        settling_versions = {}
+
+        for check_cls in self._check_classes:
+            check_versions = check_cls.verdict_settling_versions()
+
+            if check_versions is None:
+                continue
+
+            for prefix, version in check_versions.items():
+                if prefix not in settling_versions or \
+                        packaging.version.parse(version) > packaging.version.parse(settling_versions[prefix]):
+                    settling_versions[prefix] = version
+
+        if not settling_versions:
+            return None
+
+        return settling_versions
+
+    @staticmethod
+    def _exceeds(versions: Iterable[str], settling_version: str) -> bool:
+        settling_version = packaging.version.parse(settling_version)
+
+        for version in versions:
+            try:
+                if packaging.version.Version(version) > settling_version:
+                    return True
+            except packaging.version.InvalidVersion:
+                continue
+
+        return False
+
+    @staticmethod
+    def _sort_for_fail_fast(inventory: PayloadInventory, paths: Iterable[str]) -> List[str]:
+        # large libraries in usr/lib are the most likely to require new versions, and to settle the verdicts early
+        def key(path):
+            return not path.startswith("usr/lib/"), -inventory.entry(path).size()
+
+        return sorted(paths, key=key)
+
+    def cached_gnu_lib_version_requirements(self) -> Optional[GnuLibVersionRequirements]:
+        """
+        :return: requirements table if it has been calculated in this session already, None otherwise
+        """
+
+        return self._gnu_lib_version_requirements
+
+    def close(self):
+        self._inventory = None
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        if self._filesystem is not None:
+            self._filesystem.close()
+            self._filesystem = None
+
+        if self._extractor is not None:
+            extractor = self._extractor
+            self._extractor = None
+            extractor.cleanup()
+
+        # prefetched mounts must be torn down even if no check needed them
+        if self._prefetched_mount is not None:
+            prefetched_mount = self._prefetched_mount
+            self._prefetched_mount = None
+            prefetched_mount.unmount()
+
+        if self._mounter is None:
+            return
+
+        self._logger.debug("closing session for AppImage {}".format(self._appimage.path()))
+
+        # make sure we don't try to unmount twice, even if unmounting fails
+        mounter = self._mounter
+        self._mounter = None
+
+        try:
+            mounter.unmount()
+        finally:
+            if self._holds_mount_slot:
+                self._holds_mount_slot = False
+                self._mount_slots.release()
+
+    def __enter__(self) -> "LintSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,279 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..models import AppImage, TestResult
+from .._logging import make_logger
+from .appimagemounter import AppImageMounter
+from .checks_manager import ChecksManager
+from .lint_session import LintSession
+from .payload_filesystem import DirectoryFilesystem, SquashfsFilesystem
+from .payload_inventory import PayloadInventory
+from .result_formatter import ResultFormatter
+from .results_differ import ResultChange, ResultsDiffer
+
+
+class LintWatcher:
+    """
+    Lints a single AppImage or AppDir again whenever it changes, which is useful while working on the packaging.
+
+    Keeps an index of the state (mode, size and modification time) of every file in the payload. When files change,
+    only the checks which need these files (see :meth:`CheckBase.required_files`) are run again, and the others'
+    results are reused. The versioned dependencies of unchanged binaries are reused as well, so only changed ELF files
+    are parsed again.
+    """
+
+    _logger = make_logger("lint_watcher")
+
+    def __init__(self, path: str, checks_ids: Iterable[str], custom_runtime: str = None,
+                 formatter: ResultFormatter = None, jobs: int = 1, binary_versions_cache=None,
+                 backend: str = LintSession.BACKEND_AUTO, level: str = LintSession.LEVEL_STANDARD,
+                 mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT):
+        self._path = path
+        self._checks_ids = [i for i in checks_ids if level in ChecksManager.get_class(i).supported_levels()]
+        self._custom_runtime = custom_runtime
+        self._formatter = formatter or ResultFormatter()
+        self._jobs = jobs
+        self._binary_versions_cache = binary_versions_cache
+        self._backend = backend
+        self._level = level
+        self._mount_timeout = mount_timeout
+
+        # state of the AppImage file itself, used to skip indexing the payload as long as the file doesn't change
+        self._appimage_state: Tuple[int, int, int] = None
+        self._runtime_digest: str = None
+
+        # maps path to (mode, size, modification time)
+        self._index: Dict[str, Tuple[int, int, float]] = None
+
+        # files each check needed in the last run, keyed by check ID
+        self._required_files: Dict[str, Set[str]] = {}
+
+        # versions found in the payload's binaries in the last run, keyed by path and prefix
+        self._payload_versions: Dict[str, Dict[str, Set[str]]] = {}
+
+        self._results: Dict[type, List[TestResult]] = OrderedDict()
+
+        # set after a failed run, which might have left the state incomplete
+        self._needs_full_run = True
+
+    def results(self) -> Dict[type, List[TestResult]]:
+        """
+        :return: results of the last run, keyed by check class (like :meth:`BatchLinter.lint_one`)
+        """
+
+        return OrderedDict(self._results)
+
+    def _index_appimage(self, inventory: PayloadInventory) -> Optional[Dict[str, Tuple[int, int, float]]]:
+        try:
+            return inventory.file_states()
+
+        except (OSError, ValueError, ImportError):
+            self._logger.debug("could not index payload, all checks will be run again", exc_info=True)
+            return None
+
+    def _get_changed_files(self, index: Optional[Dict[str, Tuple[int, int, float]]]) -> Optional[Set[str]]:
+        """
+        :return: paths of added, removed and modified files, or None if all files must be considered changed
+        """
+
+        if self._needs_full_run or index is None or self._index is None:
+            return None
+
+        return {path for path in set(index) | set(self._index) if index.get(path) != self._index.get(path)}
+
+    def _select_checks(self, inventory: Optional[PayloadInventory], changed_files: Optional[Set[str]]) -> List[str]:
+        checks_to_run = []
+
+        # GNU ABI checks share their implementation, and don't need to walk the payload more than once
+        required_files_by_function = {}
+
+        for check_id in self._checks_ids:
+            check_cls = ChecksManager.get_class(check_id)
+
+            required_files = None
+
+            if inventory is not None:
+                function = check_cls.required_files
+
+                if function not in required_files_by_function:
+                    paths = function(inventory, self._level)
+
+                    if paths is not None:
+                        paths = set(paths)
+
+                    required_files_by_function[function] = paths
+
+                required_files = required_files_by_function[function]
+
+            previous_required_files = self._required_files.pop(check_id, None)
+
+            if required_files is not None:
+                self._required_files[check_id] = required_files
+
+            if changed_files is None or required_files is None or previous_required_files is None:
+                checks_to_run.append(check_id)
+                continue
+
+            # removed files might have been relevant to a check as well as new ones
+            if changed_files & (required_files | previous_required_files):
+                checks_to_run.append(check_id)
+
+        return checks_to_run
+
+    def update(self) -> Optional[List[ResultChange]]:
+        """
+        Check whether the AppImage has changed since the last run, and run the affected checks again.
+
+        :return: changes in the results (see :meth:`ResultsDiffer.diff`), or None if nothing has changed or the run
+            failed
+        """
+
+        appimage = AppImage(self._path, custom_runtime=self._custom_runtime)
+
+        index_filesystem = None
+        inventory = None
+
+        # the state is stored only once the run has succeeded, so that failed runs (e.g., because the AppImage was
+        # still being written) are retried even if the AppImage doesn't change anymore
+        appimage_state = None
+        runtime_digest = None
+
+        try:
+            if appimage.is_appdir():
+                index_filesystem = DirectoryFilesystem(self._path)
+                inventory = PayloadInventory(index_filesystem)
+                index = inventory.file_states()
+
+                if index == self._index:
+                    return None
+
+                runtime_changed = False
+
+            else:
+                stat = os.stat(self._path)
+                appimage_state = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+                if appimage_state == self._appimage_state:
+                    return None
+
+                runtime_digest = appimage.runtime_digest()
+                runtime_changed = runtime_digest is None or runtime_digest != self._runtime_digest
+
+                # the index is built from the SquashFS image regardless of the backend, so we don't have to mount
+                # the AppImage
+                index_filesystem = SquashfsFilesystem(self._path)
+                inventory = PayloadInventory(index_filesystem)
+                index = self._index_appimage(inventory)
+
+                if index is None:
+                    inventory = None
+
+            changed_files = self._get_changed_files(index)
+
+            # we can't tell which checks depend on the runtime
+            if runtime_changed:
+                changed_files = None
+
+            if changed_files is not None:
+                self._logger.info("Detected {} changed files".format(len(changed_files)))
+
+            checks_to_run = self._select_checks(inventory, changed_files)
+
+            # reuse the versions of the binaries which haven't changed
+            known_payload_versions = {}
+            if changed_files is not None:
+                known_payload_versions = {
+                    path: versions for path, versions in self._payload_versions.items() if path not in changed_files
+                }
+
+            results = OrderedDict(self._results)
+
+            # discards the versions of changed files, unless the binaries are scanned again
+            self._payload_versions = known_payload_versions
+
+            if checks_to_run:
+                session = LintSession(
+                    appimage, jobs=self._jobs, binary_versions_cache=self._binary_versions_cache,
+                    backend=self._backend, check_classes=[ChecksManager.get_class(i) for i in checks_to_run],
+                    mount_timeout=self._mount_timeout, level=self._level,
+                    known_payload_versions=known_payload_versions,
+                )
+
+                with session:
+                    for check_id in checks_to_run:
+                        check = ChecksManager.get_instance(check_id, session)
+
+                        self._logger.info("Running check \"{}\"".format(check.name()))
+
+                        results[type(check)] = list(check.run())
+
+                    requirements = session.cached_gnu_lib_version_requirements()
+
+                    if requirements is not None:
+                        self._payload_versions = {
+                            path: requirements.all_file_versions(path) for path in requirements.payload_files()
+                        }
+
+            else:
+                self._logger.info("Changed files are irrelevant to all checks")
+
+            # keep the order of the checks stable
+            results = OrderedDict(
+                (ChecksManager.get_class(i), results[ChecksManager.get_class(i)]) for i in self._checks_ids
+            )
+
+        except KeyboardInterrupt:
+            raise
+
+        except Exception:
+            self._logger.exception("failed to lint AppImage {}".format(self._path))
+            self._needs_full_run = True
+            return None
+
+        finally:
+            if index_filesystem is not None:
+                index_filesystem.close()
+
+        first_run = not self._results
+
+        changes = ResultsDiffer.diff(self._results, results)
+
+        self._appimage_state = appimage_state
+        self._runtime_digest = runtime_digest
+        self._index = index
+        self._results = results
+        self._needs_full_run = False
+
+        if first_run:
+            for check_cls, check_results in results.items():
+                for testres in check_results:
+                    check_cls.get_logger().info(self._formatter.format(testres))
+
+        elif not changes:
+            self._logger.info("No changes in results")
+
+        else:
+            for change, old_result, new_result in changes:
+                self._logger.info("{}: {}".format(change, self._formatter.format(new_result or old_result)))
+
+        return changes
+
+    def watch(self, interval: float = 1.0) -> Iterator[List[ResultChange]]:
+        """
+        Poll the AppImage for changes forever.
+
+        :param interval: time to wait between two polls, in seconds
+        :return: iterator yielding the changes in the results of every run (see :meth:`update`)
+        """
+
+        self._logger.info("Watching {} for changes".format(self._path))
+
+        while True:
+            changes = self.update()
+
+            if changes is not None:
+                yield changes
+
+            time.sleep(interval)
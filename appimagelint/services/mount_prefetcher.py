@@ -0,0 +1,109 @@
+import asyncio
+import concurrent.futures
+import threading
+
+from ..models import AppImage
+from .._logging import make_logger
+from .appimagemounter import AppImageMounter
+from .async_appimagemounter import AsyncAppImageMounter
+
+
+class PrefetchedMount:
+    """
+    Handle for an AppImage mounted in the background by a :class:`MountPrefetcher`. Provides the same interface as
+    :class:`AppImageMounter`, so it can be passed to a :class:`LintSession`.
+    """
+
+    def __init__(self, prefetcher: "MountPrefetcher", mounter: AsyncAppImageMounter,
+                 future: concurrent.futures.Future):
+        self._prefetcher = prefetcher
+        self._mounter = mounter
+        self._future = future
+
+    def appimage(self) -> AppImage:
+        return self._mounter.appimage()
+
+    def mount(self):
+        """
+        Wait until the AppImage is mounted. Raises the error which occurred while mounting, if any.
+        """
+
+        self._future.result()
+
+    def mountpoint(self) -> str:
+        return self._mounter.mountpoint()
+
+    def unmount(self):
+        # the mount may still be in progress, and must be torn down once it has finished
+        try:
+            self._future.result()
+        except Exception:
+            # there is nothing to unmount, and the error has been reported to whoever waited for the mount
+            return
+
+        self._prefetcher.run(self._mounter.unmount())
+
+
+class MountPrefetcher:
+    """
+    Mounts AppImages in the background while earlier ones are being linted, which hides the mount latency behind
+    useful work.
+
+    Runs an asyncio event loop in a background thread, which allows for mounting any number of AppImages concurrently
+    without blocking the thread running the checks.
+    """
+
+    _logger = make_logger("mount_prefetcher")
+
+    def __init__(self, custom_runtime: str = None, timeout: float = AppImageMounter.DEFAULT_TIMEOUT):
+        self._custom_runtime = custom_runtime
+        self._timeout = timeout
+
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mount-prefetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+        self._loop.close()
+
+        self._loop = None
+        self._thread = None
+
+    def run(self, coro):
+        """
+        Run coroutine in the background event loop, and wait for its result.
+        """
+
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def prefetch(self, appimage: AppImage) -> PrefetchedMount:
+        """
+        Start mounting an AppImage in the background.
+
+        The mount must be unmounted by calling :meth:`PrefetchedMount.unmount`, even if it's not used at all.
+        """
+
+        self._logger.debug("prefetching mount of AppImage {}".format(appimage.path()))
+
+        mounter = AsyncAppImageMounter(appimage, self._custom_runtime, timeout=self._timeout)
+        future = asyncio.run_coroutine_threadsafe(mounter.mount(), self._loop)
+
+        return PrefetchedMount(self, mounter, future)
+
+    def __enter__(self) -> "MountPrefetcher":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,346 @@
+import contextlib
+import fnmatch
+import hashlib
+import mmap
+import os
+import posixpath
+import shutil
+from typing import BinaryIO, ContextManager, Dict, Iterator, List, Tuple
+
+from .._util import make_tempdir
+from .squashfs_reader import SquashfsInode, SquashfsReader
+
+
+class PayloadFilesystem:
+    """
+    Read-only access to the files in an AppImage's payload (i.e., the AppDir), regardless of how the payload is
+    accessed (e.g., a mounted AppImage, or reading the SquashFS image directly).
+
+    All paths are relative to the root of the payload, and use / as separator. The root is represented by an empty
+    string.
+    """
+
+    def listdir(self, path: str = "") -> List[str]:
+        raise NotImplementedError
+
+    def is_dir(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def is_file(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def is_link(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def exists(self, path: str) -> bool:
+        return self.is_dir(path) or self.is_file(path)
+
+    def readlink(self, path: str) -> str:
+        raise NotImplementedError
+
+    def lstat(self, path: str) -> os.stat_result:
+        """
+        Like os.lstat(). Only the mode, size and modification time are guaranteed to be meaningful.
+        """
+
+        raise NotImplementedError
+
+    def open(self, path: str) -> BinaryIO:
+        """
+        Open regular file for reading in binary mode. Symlinks are followed.
+        """
+
+        raise NotImplementedError
+
+    def open_buffer(self, path: str):
+        """
+        Get read-only, bytes-like view of a regular file, which supports len(), slicing, find() and close(). Suitable
+        for :class:`ElfVersionReader`.
+        """
+
+        raise NotImplementedError
+
+    def local_path(self, path: str) -> ContextManager[str]:
+        """
+        Get a path in the local filesystem to pass to external tools. Might be a temporary copy of the file, which is
+        removed once the context manager exits.
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def walk(self, path: str = "") -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Like os.walk(), top-down, without following symlinks to directories.
+        """
+
+        dirnames, filenames = [], []
+
+        for name in self.listdir(path):
+            if self.is_dir(posixpath.join(path, name)):
+                dirnames.append(name)
+            else:
+                filenames.append(name)
+
+        yield path, dirnames, filenames
+
+        for dirname in dirnames:
+            dirpath = posixpath.join(path, dirname)
+
+            if not self.is_link(dirpath):
+                yield from self.walk(dirpath)
+
+    def file_states(self) -> Dict[str, Tuple[int, int, float]]:
+        """
+        Collect the state of every file (including symlinks, but excluding directories) in the payload, which can be
+        compared to find out which files have changed.
+
+        Directories are left out on purpose, their modification times change whenever entries are added or removed,
+        which are noticed anyway.
+
+        :return: (mode, size, modification time) tuples, keyed by path
+        """
+
+        states = {}
+
+        for dirpath, dirnames, filenames in self.walk():
+            # symlinks to directories are listed among the directories, but not followed by walk()
+            for name in dirnames + filenames:
+                path = posixpath.join(dirpath, name)
+
+                if name in dirnames and not self.is_link(path):
+                    continue
+
+                stat = self.lstat(path)
+                states[path] = (stat.st_mode, stat.st_size, stat.st_mtime)
+
+        return states
+
+    def file_digest(self, path: str) -> str:
+        """
+        Calculate a digest of a regular file's contents. Unlike the states returned by :meth:`file_states`, it reflects
+        changes which leave the size alone even if the modification times are the same, like they are in reproducible
+        builds, which set them all to SOURCE_DATE_EPOCH.
+
+        :return: hex digest
+        """
+
+        d = hashlib.blake2b(digest_size=20)
+
+        with self.open(path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                d.update(chunk)
+
+        return d.hexdigest()
+
+    def glob(self, pattern: str, include_hidden: bool = False) -> List[str]:
+        """
+        Like glob.glob() with recursive=True, i.e., ** matches any files and zero or more directories.
+
+        :param pattern: pattern relative to the root of the payload
+        :param include_hidden: whether wildcards match names starting with a dot (like pathlib does)
+        :return: matching paths
+        """
+
+        def matches(name, part):
+            if not include_hidden and name.startswith(".") and not part.startswith("."):
+                return False
+
+            return fnmatch.fnmatchcase(name, part)
+
+        candidates = [""]
+
+        for part in pattern.split("/"):
+            if part == "":
+                continue
+
+            next_candidates = []
+
+            for candidate in candidates:
+                if candidate and not self.is_dir(candidate):
+                    continue
+
+                if part == "**":
+                    next_candidates.append(candidate)
+
+                    for dirpath, dirnames, filenames in self.walk(candidate):
+                        dirnames[:] = [i for i in dirnames if matches(i, "*")]
+
+                        for name in dirnames + filenames:
+                            if matches(name, "*"):
+                                next_candidates.append(posixpath.join(dirpath, name))
+
+                else:
+                    for name in self.listdir(candidate):
+                        if matches(name, part):
+                            next_candidates.append(posixpath.join(candidate, name))
+
+            # ** may yield the same path more than once
+            candidates = list(dict.fromkeys(next_candidates))
+
+        return [i for i in candidates if i]
+
+
+class DirectoryFilesystem(PayloadFilesystem):
+    """
+    Payload stored in a local directory, e.g., the mountpoint of an AppImage.
+    """
+
+    def __init__(self, root: str):
+        self._root = root
+
+    def root(self) -> str:
+        return self._root
+
+    def _abspath(self, path: str) -> str:
+        return os.path.join(self._root, path)
+
+    def listdir(self, path: str = "") -> List[str]:
+        return os.listdir(self._abspath(path))
+
+    def is_dir(self, path: str) -> bool:
+        return os.path.isdir(self._abspath(path))
+
+    def is_file(self, path: str) -> bool:
+        return os.path.isfile(self._abspath(path))
+
+    def is_link(self, path: str) -> bool:
+        return os.path.islink(self._abspath(path))
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self._abspath(path))
+
+    def readlink(self, path: str) -> str:
+        return os.readlink(self._abspath(path))
+
+    def lstat(self, path: str) -> os.stat_result:
+        return os.lstat(self._abspath(path))
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self._abspath(path), "rb")
+
+    def open_buffer(self, path: str):
+        with open(self._abspath(path), "rb") as f:
+            # the mapping keeps a reference to the file on its own
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @contextlib.contextmanager
+    def local_path(self, path: str):
+        yield self._abspath(path)
+
+
+class SquashfsFilesystem(PayloadFilesystem):
+    """
+    Payload read directly from the SquashFS image within an AppImage using :class:`SquashfsReader`, which doesn't
+    require mounting the AppImage.
+
+    Instances can be passed to worker processes. Every process opens its own reader on first use.
+    """
+
+    # readers are shared by all instances for the same image within a process (instances may be unpickled for every
+    # task in worker processes), but must never be shared with forked processes
+    # maps image path to (process ID, reader)
+    _readers: Dict[str, Tuple[int, SquashfsReader]] = {}
+
+    def __init__(self, path: str, offset: int = None):
+        """
+        :param path: path to AppImage or SquashFS image
+        :param offset: offset of SquashFS image within the file, calculated automatically if None
+        """
+
+        self._path = os.path.abspath(path)
+        self._offset = offset
+
+    def reader(self) -> SquashfsReader:
+        try:
+            pid, reader = self._readers[self._path]
+
+            if pid == os.getpid():
+                return reader
+
+        except KeyError:
+            pass
+
+        reader = SquashfsReader(self._path, self._offset)
+        reader.open()
+
+        self._readers[self._path] = (os.getpid(), reader)
+
+        return reader
+
+    def close(self):
+        try:
+            pid, reader = self._readers.pop(self._path)
+
+        except KeyError:
+            return
+
+        if pid == os.getpid():
+            reader.close()
+
+    def _lookup(self, path: str, follow_symlinks: bool = True) -> SquashfsInode:
+        return self.reader().lookup(path, follow_symlinks=follow_symlinks)
+
+    def listdir(self, path: str = "") -> List[str]:
+        reader = self.reader()
+        return reader.listdir(reader.lookup(path))
+
+    def is_dir(self, path: str) -> bool:
+        try:
+            return self._lookup(path).is_dir()
+        except OSError:
+            return False
+
+    def is_file(self, path: str) -> bool:
+        try:
+            return self._lookup(path).is_file()
+        except OSError:
+            return False
+
+    def is_link(self, path: str) -> bool:
+        try:
+            return self._lookup(path, follow_symlinks=False).is_symlink()
+        except OSError:
+            return False
+
+    def readlink(self, path: str) -> str:
+        inode = self._lookup(path, follow_symlinks=False)
+
+        if not inode.is_symlink():
+            raise OSError("not a symlink: {}".format(path))
+
+        return inode.symlink_target
+
+    def lstat(self, path: str) -> os.stat_result:
+        reader = self.reader()
+        inode = reader.lookup(path, follow_symlinks=False)
+
+        size = inode.size
+        if inode.is_symlink():
+            size = len(os.fsencode(inode.symlink_target))
+
+        # mode, inode, device, links, uid, gid, size, atime, mtime, ctime
+        return os.stat_result((
+            reader.stat_mode(inode), inode.inode_number, 0, 1, 0, 0, size, inode.mtime, inode.mtime, inode.mtime,
+        ))
+
+    def open(self, path: str) -> BinaryIO:
+        reader = self.reader()
+        return reader.open_file(reader.lookup(path))
+
+    def open_buffer(self, path: str):
+        reader = self.reader()
+        return reader.buffer(reader.lookup(path))
+
+    @contextlib.contextmanager
+    def local_path(self, path: str):
+        # external tools might care about the file name (e.g., desktop-file-validate checks the extension)
+        with make_tempdir() as tempdir:
+            local_path = os.path.join(tempdir, posixpath.basename(path))
+
+            with self.open(path) as src, open(local_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+            yield local_path
@@ -0,0 +1,337 @@
+import os
+import posixpath
+import stat
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from .payload_filesystem import DirectoryFilesystem, PayloadFilesystem
+from .squashfs_reader import SquashfsReader
+
+
+class PayloadEntry:
+    """
+    Metadata of a single file (or directory, symlink, ...) in the payload, as collected by :class:`PayloadInventory`.
+    """
+
+    TYPE_FILE = "file"
+    TYPE_DIR = "dir"
+    TYPE_SYMLINK = "symlink"
+    # device files, sockets and pipes are of no interest to any check
+    TYPE_OTHER = "other"
+
+    def __init__(self, path: str, stat_result: os.stat_result, symlink_target: str = None):
+        self.path = path
+        self.stat = stat_result
+        self.symlink_target = symlink_target
+
+        if stat.S_ISREG(stat_result.st_mode):
+            self.type = self.TYPE_FILE
+        elif stat.S_ISDIR(stat_result.st_mode):
+            self.type = self.TYPE_DIR
+        elif stat.S_ISLNK(stat_result.st_mode):
+            self.type = self.TYPE_SYMLINK
+        else:
+            self.type = self.TYPE_OTHER
+
+        # file type guessed from the contents, determined on first use (see PayloadInventory.magic())
+        self.magic: Optional[str] = None
+        self.magic_detected = False
+
+    def size(self) -> int:
+        return self.stat.st_size
+
+    def inode(self) -> int:
+        return self.stat.st_ino
+
+    def __repr__(self):
+        return "PayloadEntry({}, type={}, size={})".format(repr(self.path), self.type, self.size())
+
+
+class PayloadInventory(PayloadFilesystem):
+    """
+    In-memory index of the payload's metadata, which is shared by all checks run on the same AppImage, so that the
+    payload doesn't have to be traversed (and stat()ed) over and over again. Over FUSE, every one of those calls is a
+    round trip to the runtime.
+
+    Implements the :class:`PayloadFilesystem` interface, with all metadata queries (listdir(), is_dir(), glob(), ...)
+    answered from the index. Files' contents are read from the underlying filesystem.
+
+    Directories are scanned on first access only, so looking at a few files in the AppDir root doesn't require
+    traversing the entire payload. Local directories (e.g., mounted AppImages) are scanned using os.scandir().
+
+    The inventory may be used by multiple threads concurrently (see :class:`CheckScheduler`).
+    """
+
+    MAGIC_ELF = "elf"
+    MAGIC_PNG = "png"
+    MAGIC_JPEG = "jpeg"
+    MAGIC_SVG = "svg"
+    MAGIC_XPM = "xpm"
+    MAGIC_DESKTOP = "desktop"
+
+    # SVG files tend to start with XML declarations and comments
+    _MAGIC_SIZE = 256
+
+    def __init__(self, filesystem: PayloadFilesystem):
+        self._filesystem = filesystem
+
+        # entries keyed by path, and the names in every directory scanned so far
+        self._entries: Dict[str, PayloadEntry] = {}
+        self._children: Dict[str, List[str]] = {}
+
+        # the index is filled lazily by whichever thread needs an entry first, the lock makes sure every directory is
+        # scanned (and every file's magic detected) exactly once
+        self._lock = threading.RLock()
+
+    def filesystem(self) -> PayloadFilesystem:
+        return self._filesystem
+
+    def _scan_dir(self, path: str):
+        # a directory's entries are complete once it's listed in the children
+        if path in self._children:
+            return
+
+        with self._lock:
+            if path not in self._children:
+                self._scan_dir_locked(path)
+
+    def _scan_dir_locked(self, path: str):
+        names = []
+
+        if isinstance(self._filesystem, DirectoryFilesystem):
+            # scandir() tells us the names and types in a single call, which saves us a lot of calls to lstat()
+            with os.scandir(os.path.join(self._filesystem.root(), path)) as it:
+                for dir_entry in it:
+                    entry_path = posixpath.join(path, dir_entry.name)
+
+                    symlink_target = None
+                    if dir_entry.is_symlink():
+                        symlink_target = os.readlink(dir_entry.path)
+
+                    self._entries[entry_path] = PayloadEntry(
+                        entry_path, dir_entry.stat(follow_symlinks=False), symlink_target
+                    )
+                    names.append(dir_entry.name)
+
+        else:
+            for name in self._filesystem.listdir(path):
+                entry_path = posixpath.join(path, name)
+
+                stat_result = self._filesystem.lstat(entry_path)
+
+                symlink_target = None
+                if stat.S_ISLNK(stat_result.st_mode):
+                    symlink_target = self._filesystem.readlink(entry_path)
+
+                self._entries[entry_path] = PayloadEntry(entry_path, stat_result, symlink_target)
+                names.append(name)
+
+        # keep the order deterministic, the filesystems don't agree on one
+        self._children[path] = sorted(names)
+
+    def _resolve(self, path: str, follow_symlinks: bool = True, depth: int = 0) -> Optional[str]:
+        """
+        Resolve symlinks in path within the payload.
+
+        :return: resolved path (an empty string for the root directory), or None if path doesn't exist or points
+            outside the payload
+        """
+
+        if depth > SquashfsReader.MAX_SYMLINK_DEPTH:
+            return None
+
+        parts = [i for i in path.split("/") if i not in ("", ".")]
+
+        resolved = ""
+
+        for index, part in enumerate(parts):
+            if part == "..":
+                resolved = posixpath.dirname(resolved)
+                continue
+
+            self._scan_dir(resolved)
+
+            candidate = posixpath.join(resolved, part)
+            entry = self._entries.get(candidate)
+
+            if entry is None:
+                return None
+
+            is_last = index == len(parts) - 1
+
+            if entry.type == PayloadEntry.TYPE_SYMLINK and (follow_symlinks or not is_last):
+                # absolute symlinks point outside the payload
+                if entry.symlink_target.startswith("/"):
+                    return None
+
+                target = posixpath.join(posixpath.dirname(candidate), entry.symlink_target)
+                resolved = self._resolve(target, depth=depth + 1)
+
+                if resolved is None:
+                    return None
+
+            else:
+                resolved = candidate
+
+            if not is_last and not self._is_dir_entry(resolved):
+                return None
+
+        return resolved
+
+    def _is_dir_entry(self, path: str) -> bool:
+        return path == "" or self._entries[path].type == PayloadEntry.TYPE_DIR
+
+    def entry(self, path: str, follow_symlinks: bool = True) -> Optional[PayloadEntry]:
+        """
+        :return: entry for path, or None if it doesn't exist (or for the root directory)
+        """
+
+        resolved = self._resolve(path, follow_symlinks=follow_symlinks)
+
+        if not resolved:
+            return None
+
+        return self._entries[resolved]
+
+    def listdir(self, path: str = "") -> List[str]:
+        resolved = self._resolve(path)
+
+        if resolved is None:
+            raise FileNotFoundError("no such file or directory: {}".format(path))
+
+        if not self._is_dir_entry(resolved):
+            raise NotADirectoryError("not a directory: {}".format(path))
+
+        self._scan_dir(resolved)
+
+        return list(self._children[resolved])
+
+    def is_dir(self, path: str) -> bool:
+        resolved = self._resolve(path)
+        return resolved is not None and self._is_dir_entry(resolved)
+
+    def is_file(self, path: str) -> bool:
+        entry = self.entry(path)
+        return entry is not None and entry.type == PayloadEntry.TYPE_FILE
+
+    def is_link(self, path: str) -> bool:
+        entry = self.entry(path, follow_symlinks=False)
+        return entry is not None and entry.type == PayloadEntry.TYPE_SYMLINK
+
+    def exists(self, path: str) -> bool:
+        return self._resolve(path) is not None
+
+    def readlink(self, path: str) -> str:
+        entry = self.entry(path, follow_symlinks=False)
+
+        if entry is None or entry.type != PayloadEntry.TYPE_SYMLINK:
+            raise OSError("not a symlink: {}".format(path))
+
+        return entry.symlink_target
+
+    def lstat(self, path: str) -> os.stat_result:
+        entry = self.entry(path, follow_symlinks=False)
+
+        if entry is None:
+            return self._filesystem.lstat(path)
+
+        return entry.stat
+
+    def open(self, path: str):
+        return self._filesystem.open(path)
+
+    def open_buffer(self, path: str):
+        return self._filesystem.open_buffer(path)
+
+    def local_path(self, path: str):
+        return self._filesystem.local_path(path)
+
+    @classmethod
+    def _classify(cls, name: str, data: bytes) -> Optional[str]:
+        if data.startswith(b"\x7fELF"):
+            return cls.MAGIC_ELF
+
+        if data.startswith(b"\x89PNG\r\n\x1a\n"):
+            return cls.MAGIC_PNG
+
+        if data.startswith(b"\xff\xd8\xff"):
+            return cls.MAGIC_JPEG
+
+        if data.startswith(b"/* XPM */"):
+            return cls.MAGIC_XPM
+
+        if b"<svg" in data or (data.lstrip().startswith(b"<?xml") and name.endswith(".svg")):
+            return cls.MAGIC_SVG
+
+        if name.endswith(".desktop") or data.lstrip().startswith(b"[Desktop Entry]"):
+            return cls.MAGIC_DESKTOP
+
+        return None
+
+    def _read_magic(self, path: str) -> bytes:
+        if isinstance(self._filesystem, DirectoryFilesystem):
+            # avoid the overhead of a buffered file object, we need just the first few bytes
+            fd = os.open(os.path.join(self._filesystem.root(), path), os.O_RDONLY)
+
+            try:
+                return os.read(fd, self._MAGIC_SIZE)
+            finally:
+                os.close(fd)
+
+        with self._filesystem.open(path) as f:
+            return f.read(self._MAGIC_SIZE)
+
+    def magic(self, path: str) -> Optional[str]:
+        """
+        Guess type of a regular file from its contents (and, for some types, its name). Symlinks are followed.
+
+        :return: one of the MAGIC_* values, or None if the type is unknown or path is not a regular file
+        """
+
+        entry = self.entry(path)
+
+        if entry is None or entry.type != PayloadEntry.TYPE_FILE:
+            return None
+
+        if entry.magic_detected:
+            return entry.magic
+
+        with self._lock:
+            if not entry.magic_detected:
+                try:
+                    entry.magic = self._classify(posixpath.basename(entry.path), self._read_magic(entry.path))
+                except OSError:
+                    entry.magic = None
+
+                entry.magic_detected = True
+
+        return entry.magic
+
+    def entries(self) -> Iterator[PayloadEntry]:
+        """
+        Iterate over all entries in the payload, top-down. Symlinks to directories are not followed.
+        """
+
+        for dirpath, dirnames, filenames in self.walk():
+            for name in dirnames + filenames:
+                yield self._entries[posixpath.join(dirpath, name)]
+
+    def files_with_magic(self, magic: str) -> List[str]:
+        """
+        Find all regular files (not symlinks) of a specific type in the payload.
+
+        :param magic: one of the MAGIC_* values
+        :return: paths of matching files
+        """
+
+        return [
+            entry.path for entry in self.entries()
+            if entry.type == PayloadEntry.TYPE_FILE and self.magic(entry.path) == magic
+        ]
+
+    def binaries(self) -> List[str]:
+        """
+        Find all ELF binaries in the payload, like :class:`BinaryWalker`.
+        """
+
+        return self.files_with_magic(self.MAGIC_ELF)
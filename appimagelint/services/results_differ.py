@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ..models import TestResult
+
+
+# (change, previous result, current result)
+ResultChange = Tuple[str, Optional[TestResult], Optional[TestResult]]
+
+
+class ResultsDiffer:
+    """
+    Compares the results of two runs, e.g., of two versions of the same AppImage, or of the same AppImage before and
+    after it has changed.
+    """
+
+    CHANGE_ADDED = "added"
+    CHANGE_REMOVED = "removed"
+    CHANGE_FIXED = "fixed"
+    CHANGE_REGRESSED = "regressed"
+    CHANGE_MESSAGE = "changed"
+
+    @classmethod
+    def diff(cls, old_results: Dict[type, List[TestResult]], new_results: Dict[type, List[TestResult]]) \
+            -> List[ResultChange]:
+        """
+        Compare two sets of results, matching them by their check and result IDs.
+
+        :return: list of (change, previous result, current result) tuples, where change is one of the CHANGE_* values
+        """
+
+        def flatten(results):
+            flat = OrderedDict()
+
+            for check_cls, check_results in results.items():
+                for result in check_results:
+                    flat[(check_cls.id(), result.id())] = result
+
+            return flat
+
+        old_flat, new_flat = flatten(old_results), flatten(new_results)
+
+        changes = []
+
+        for key, new_result in new_flat.items():
+            old_result = old_flat.get(key)
+
+            if old_result is None:
+                changes.append((cls.CHANGE_ADDED, None, new_result))
+
+            elif old_result.success() != new_result.success():
+                change = cls.CHANGE_FIXED if new_result.success() else cls.CHANGE_REGRESSED
+                changes.append((change, old_result, new_result))
+
+            elif old_result.message() != new_result.message():
+                changes.append((cls.CHANGE_MESSAGE, old_result, new_result))
+
+        for key, old_result in old_flat.items():
+            if key not in new_flat:
+                changes.append((cls.CHANGE_REMOVED, old_result, None))
+
+        return changes
@@ -0,0 +1,723 @@
+import io
+import lzma
+import mmap
+import posixpath
+import stat
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+
+class SquashfsInode:
+    """
+    Information about a file, directory or symlink stored in a SquashFS image. Created by :class:`SquashfsReader`.
+    """
+
+    def __init__(self, inode_type: int, mode: int, mtime: int, inode_number: int):
+        self.inode_type = inode_type
+        self.mode = mode
+        self.mtime = mtime
+        self.inode_number = inode_number
+
+        self.size = 0
+
+        # directories
+        self.dir_block_index: int = None
+        self.dir_block_offset: int = None
+
+        # regular files
+        self.blocks_start: int = None
+        self.block_sizes: List[int] = []
+        # position of every data block within the image
+        self.block_positions: List[int] = []
+        self.fragment_index: int = None
+        self.fragment_offset: int = None
+
+        # symlinks
+        self.symlink_target: str = None
+
+    def is_dir(self):
+        return self.inode_type in SquashfsReader.DIR_TYPES
+
+    def is_file(self):
+        return self.inode_type in SquashfsReader.FILE_TYPES
+
+    def is_symlink(self):
+        return self.inode_type in SquashfsReader.SYMLINK_TYPES
+
+    def __repr__(self):
+        return "SquashfsInode(type={}, number={}, size={})".format(self.inode_type, self.inode_number, self.size)
+
+
+class SquashfsFileBuffer:
+    """
+    Read-only, lazily decompressed view of a file in a SquashFS image. Supports the subset of the bytes/mmap interface
+    needed by :class:`ElfVersionReader` (len(), slicing and find()), and decompresses only the blocks which are
+    actually accessed.
+    """
+
+    def __init__(self, reader: "SquashfsReader", inode: SquashfsInode):
+        self._reader = reader
+        self._inode = inode
+
+    def __len__(self):
+        return self._inode.size
+
+    def __getitem__(self, item) -> bytes:
+        if not isinstance(item, slice) or item.step not in (None, 1):
+            raise TypeError("only contiguous slices are supported")
+
+        start, stop, _ = item.indices(self._inode.size)
+
+        if stop <= start:
+            return b""
+
+        return self._reader.read(self._inode, start, stop - start)
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        # most searches are for the end of short strings, therefore we start with a small chunk, and grow it up to the
+        # block size
+        # chunks overlap so that matches crossing chunk boundaries are found as well
+        chunk_size = 256
+        overlap = len(sub) - 1
+
+        offset = start
+        while offset < self._inode.size:
+            chunk = self[offset:offset + chunk_size + overlap]
+            index = chunk.find(sub)
+
+            if index >= 0:
+                return offset + index
+
+            offset += chunk_size
+            chunk_size = min(chunk_size * 2, self._reader.block_size())
+
+        return -1
+
+    def close(self):
+        # nothing to release, the reader owns all the resources
+        pass
+
+
+class SquashfsFile(io.RawIOBase):
+    """
+    Seekable, read-only file object for a regular file in a SquashFS image. Use :meth:`SquashfsReader.open_file` to get a
+    buffered instance.
+    """
+
+    def __init__(self, reader: "SquashfsReader", inode: SquashfsInode):
+        super().__init__()
+
+        self._reader = reader
+        self._inode = inode
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b) -> int:
+        data = self._reader.read(self._inode, self._position, len(b))
+
+        b[:len(data)] = data
+        self._position += len(data)
+
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._inode.size + offset
+        else:
+            raise ValueError("invalid whence: {}".format(whence))
+
+        if position < 0:
+            raise OSError("negative seek position {}".format(position))
+
+        self._position = position
+        return position
+
+    def tell(self) -> int:
+        return self._position
+
+
+class SquashfsReader:
+    """
+    Read-only, pure-Python reader for SquashFS (version 4.0) images, e.g., the payload of type 2 AppImages.
+
+    Allows for reading AppImages' contents without mounting them, which requires neither FUSE nor launching the
+    runtime. Data are decompressed lazily, and only the blocks actually needed are read.
+
+    gzip, xz and lzma compressed images are supported out of the box, zstd, lz4 and lzo require the optional modules
+    zstandard, lz4 and python-lzo, respectively.
+    """
+
+    _MAGIC = b"hsqs"
+
+    # metadata blocks have a fixed maximum size
+    _METADATA_BLOCK_SIZE = 8192
+
+    _COMPRESSION_GZIP = 1
+    _COMPRESSION_LZMA = 2
+    _COMPRESSION_LZO = 3
+    _COMPRESSION_XZ = 4
+    _COMPRESSION_LZ4 = 5
+    _COMPRESSION_ZSTD = 6
+
+    DIR_TYPES = (1, 8)
+    FILE_TYPES = (2, 9)
+    SYMLINK_TYPES = (3, 10)
+
+    _NO_FRAGMENT = 0xffffffff
+
+    # flag marking uncompressed data and fragment blocks
+    _BLOCK_UNCOMPRESSED = 1 << 24
+
+    # maximum number of symlinks resolved while looking up a single path
+    MAX_SYMLINK_DEPTH = 40
+
+    def __init__(self, path: str, offset: int = None):
+        """
+        :param path: path to SquashFS image or AppImage
+        :param offset: offset of SquashFS image within file; if None, the offset is calculated from the ELF header for
+            AppImages, or assumed to be 0 for plain SquashFS images
+        """
+
+        self._path = path
+        self._offset = offset
+
+        self._file = None
+        self._data: mmap.mmap = None
+
+        self._superblock: Dict[str, int] = None
+        self._decompress = None
+
+        self._fragment_table: List[Tuple[int, int]] = None
+
+        # caches for decompressed metadata and data blocks, keyed by their position in the image
+        self._metadata_cache: Dict[int, Tuple[bytes, int]] = {}
+        self._block_cache: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+        self._block_cache_size = 32
+
+        # the reader may be used by multiple threads (e.g., checks run concurrently), and the LRU bookkeeping isn't
+        # atomic
+        self._block_cache_lock = threading.Lock()
+
+        self._directory_cache: Dict[int, Dict[str, Tuple[int, int]]] = {}
+
+    def open(self):
+        self._file = open(self._path, "rb")
+
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if self._offset is None:
+                self._offset = self.find_payload_offset(self._data)
+
+            self._parse_superblock()
+
+        except:  # noqa
+            self.close()
+            raise
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        self._metadata_cache.clear()
+        self._block_cache.clear()
+        self._directory_cache.clear()
+
+    def __enter__(self) -> "SquashfsReader":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def find_payload_offset(data) -> int:
+        """
+        Calculate the offset of the SquashFS image in an AppImage. The image is appended right after the runtime, whose
+        size is calculated from the runtime's ELF header, just like the runtime does itself.
+
+        :param data: beginning of the file, at least the ELF header
+        :return: offset of SquashFS image
+        """
+
+        if data[:4] == SquashfsReader._MAGIC:
+            return 0
+
+        if data[:4] != b"\x7fELF":
+            raise ValueError("file is neither an AppImage nor a SquashFS image")
+
+        endianness = "<" if data[5] == 1 else ">"
+
+        if data[4] == 2:
+            e_shoff, = struct.unpack(endianness + "Q", data[40:48])
+            e_shentsize, e_shnum = struct.unpack(endianness + "HH", data[58:62])
+        else:
+            e_shoff, = struct.unpack(endianness + "I", data[32:36])
+            e_shentsize, e_shnum = struct.unpack(endianness + "HH", data[46:50])
+
+        return e_shoff + e_shentsize * e_shnum
+
+    def _raw(self, position: int, size: int) -> bytes:
+        start = self._offset + position
+        rv = self._data[start:start + size]
+
+        if len(rv) != size:
+            raise ValueError("truncated SquashFS image: {}".format(self._path))
+
+        return rv
+
+    def _parse_superblock(self):
+        fields = struct.unpack("<4sIIIIHHHHHHQQQQQQQQ", self._raw(0, 96))
+
+        (magic, inode_count, _, block_size, fragment_count, compressor, _, flags, _, version_major, version_minor,
+         root_inode, bytes_used, _, _, inode_table, directory_table, fragment_table, _) = fields
+
+        if magic != self._MAGIC:
+            raise ValueError("could not find SquashFS superblock in {} (offset {})".format(self._path, self._offset))
+
+        if (version_major, version_minor) != (4, 0):
+            raise ValueError("unsupported SquashFS version {}.{}".format(version_major, version_minor))
+
+        self._superblock = dict(
+            inode_count=inode_count,
+            block_size=block_size,
+            fragment_count=fragment_count,
+            compressor=compressor,
+            flags=flags,
+            root_inode=root_inode,
+            bytes_used=bytes_used,
+            inode_table=inode_table,
+            directory_table=directory_table,
+            fragment_table=fragment_table,
+        )
+
+        self._decompress = self._make_decompressor(compressor, block_size)
+
+    @classmethod
+    def _make_decompressor(cls, compressor: int, block_size: int):
+        # the output is never larger than a data block, but zstd and lz4 need to know an upper bound
+        max_size = max(block_size, cls._METADATA_BLOCK_SIZE)
+
+        if compressor == cls._COMPRESSION_GZIP:
+            return zlib.decompress
+
+        if compressor == cls._COMPRESSION_XZ:
+            return lambda data: lzma.decompress(data, format=lzma.FORMAT_XZ)
+
+        if compressor == cls._COMPRESSION_LZMA:
+            return lambda data: lzma.decompress(data, format=lzma.FORMAT_ALONE)
+
+        if compressor == cls._COMPRESSION_ZSTD:
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("zstd compressed SquashFS images require the zstandard module") from e
+
+            # decompressor objects must not be shared between threads
+            local = threading.local()
+
+            def decompress(data):
+                try:
+                    decompressor = local.decompressor
+                except AttributeError:
+                    decompressor = local.decompressor = zstandard.ZstdDecompressor()
+
+                return decompressor.decompress(data, max_output_size=max_size)
+
+            return decompress
+
+        if compressor == cls._COMPRESSION_LZ4:
+            try:
+                import lz4.block
+            except ImportError as e:
+                raise ImportError("lz4 compressed SquashFS images require the lz4 module") from e
+
+            return lambda data: lz4.block.decompress(data, uncompressed_size=max_size)
+
+        if compressor == cls._COMPRESSION_LZO:
+            try:
+                import lzo
+            except ImportError as e:
+                raise ImportError("lzo compressed SquashFS images require the python-lzo module") from e
+
+            return lambda data: lzo.decompress(data, False, max_size)
+
+        raise ValueError("unknown SquashFS compressor ID: {}".format(compressor))
+
+    def block_size(self) -> int:
+        return self._superblock["block_size"]
+
+    def inode_count(self) -> int:
+        return self._superblock["inode_count"]
+
+    def bytes_used(self) -> int:
+        return self._superblock["bytes_used"]
+
+    def payload_offset(self) -> int:
+        return self._offset
+
+    def _metadata_block(self, position: int) -> Tuple[bytes, int]:
+        """
+        :return: decompressed metadata block at given position, and position of the next block
+        """
+
+        try:
+            return self._metadata_cache[position]
+        except KeyError:
+            pass
+
+        header, = struct.unpack("<H", self._raw(position, 2))
+
+        size = header & 0x7fff
+        data = self._raw(position + 2, size)
+
+        if not header & 0x8000:
+            data = self._decompress(data)
+
+        rv = (data, position + 2 + size)
+        self._metadata_cache[position] = rv
+
+        return rv
+
+    def _read_metadata(self, position: int, offset: int, size: int) -> Tuple[bytes, int, int]:
+        """
+        Read data which may span multiple metadata blocks.
+
+        :return: data, and position and offset right after the data
+        """
+
+        rv = bytearray()
+
+        while len(rv) < size:
+            block, next_position = self._metadata_block(position)
+
+            # must not loop endlessly on corrupt images
+            if not block:
+                raise ValueError("empty metadata block in SquashFS image: {}".format(self._path))
+
+            chunk = block[offset:offset + size - len(rv)]
+            rv += chunk
+            offset += len(chunk)
+
+            if offset >= len(block):
+                position = next_position
+                offset = 0
+
+        return bytes(rv), position, offset
+
+    def _read_inode(self, inode_ref: int) -> SquashfsInode:
+        position = self._superblock["inode_table"] + (inode_ref >> 16)
+        offset = inode_ref & 0xffff
+
+        header, position, offset = self._read_metadata(position, offset, 16)
+        inode_type, mode, _, _, mtime, inode_number = struct.unpack("<HHHHII", header)
+
+        inode = SquashfsInode(inode_type, mode, mtime, inode_number)
+
+        def read(fmt):
+            nonlocal position, offset
+            data, position, offset = self._read_metadata(position, offset, struct.calcsize(fmt))
+            return struct.unpack(fmt, data)
+
+        if inode_type == 1:
+            inode.dir_block_index, _, inode.size, inode.dir_block_offset, _ = read("<IIHHI")
+
+        elif inode_type == 8:
+            _, inode.size, inode.dir_block_index, _, _, inode.dir_block_offset, _ = read("<IIIIHHI")
+
+        elif inode_type in self.FILE_TYPES:
+            if inode_type == 2:
+                inode.blocks_start, inode.fragment_index, inode.fragment_offset, inode.size = read("<IIII")
+            else:
+                (inode.blocks_start, inode.size, _, _, inode.fragment_index, inode.fragment_offset, _) = \
+                    read("<QQQIIII")
+
+            block_size = self.block_size()
+
+            if inode.fragment_index == self._NO_FRAGMENT:
+                block_count = (inode.size + block_size - 1) // block_size
+            else:
+                block_count = inode.size // block_size
+
+            if block_count:
+                inode.block_sizes = list(read("<{}I".format(block_count)))
+
+            position = inode.blocks_start
+            for block_size in inode.block_sizes:
+                inode.block_positions.append(position)
+                position += block_size & ~self._BLOCK_UNCOMPRESSED
+
+        elif inode_type in self.SYMLINK_TYPES:
+            _, target_size = read("<II")
+            target, position, offset = self._read_metadata(position, offset, target_size)
+            inode.symlink_target = target.decode(errors="surrogateescape")
+
+        return inode
+
+    def root_inode(self) -> SquashfsInode:
+        return self._read_inode(self._superblock["root_inode"])
+
+    def _read_directory(self, inode: SquashfsInode) -> Dict[str, Tuple[int, int]]:
+        """
+        :return: directory entries, mapping names to (inode reference, inode type)
+        """
+
+        if not inode.is_dir():
+            raise NotADirectoryError("not a directory: inode {}".format(inode.inode_number))
+
+        try:
+            return self._directory_cache[inode.inode_number]
+        except KeyError:
+            pass
+
+        entries = OrderedDict()
+
+        # the size stored in the inode is 3 bytes larger than the actual listing
+        remaining = inode.size - 3
+
+        position = self._superblock["directory_table"] + inode.dir_block_index
+        offset = inode.dir_block_offset
+
+        while remaining > 0:
+            header, position, offset = self._read_metadata(position, offset, 12)
+            count, start, _ = struct.unpack("<III", header)
+            remaining -= 12
+
+            for _ in range(count + 1):
+                entry, position, offset = self._read_metadata(position, offset, 8)
+                entry_offset, _, entry_type, name_size = struct.unpack("<HhHH", entry)
+
+                name, position, offset = self._read_metadata(position, offset, name_size + 1)
+                remaining -= 8 + name_size + 1
+
+                name = name.decode(errors="surrogateescape")
+
+                # mksquashfs never writes such names, they could only be used to make paths point elsewhere, e.g.,
+                # outside the directory the payload is extracted to
+                if "/" in name or name in ("", ".", ".."):
+                    raise ValueError(
+                        "invalid name {} in directory of SquashFS image: {}".format(repr(name), self._path)
+                    )
+
+                entries[name] = ((start << 16) | entry_offset, entry_type)
+
+        self._directory_cache[inode.inode_number] = entries
+
+        return entries
+
+    def listdir(self, inode: SquashfsInode) -> List[str]:
+        return list(self._read_directory(inode))
+
+    def lookup(self, path: str, follow_symlinks: bool = True) -> SquashfsInode:
+        """
+        Look up file by its path relative to the root of the image. Absolute symlinks are considered to point outside
+        the image, and cannot be resolved.
+
+        :param path: relative path, e.g., usr/bin/foo
+        :param follow_symlinks: whether to resolve a symlink in the last path component
+        :raises FileNotFoundError: if the path does not exist in the image
+        """
+
+        return self._lookup(path, follow_symlinks, 0)
+
+    def _lookup(self, path: str, follow_symlinks: bool, depth: int) -> SquashfsInode:
+        if depth > self.MAX_SYMLINK_DEPTH:
+            raise OSError("too many levels of symbolic links: {}".format(path))
+
+        components = [c for c in path.split("/") if c not in ("", ".")]
+
+        inode = self.root_inode()
+        resolved = []
+
+        for index, component in enumerate(components):
+            if component == "..":
+                if resolved:
+                    resolved.pop()
+                inode = self._lookup("/".join(resolved), True, depth + 1)
+                continue
+
+            if not inode.is_dir():
+                raise NotADirectoryError("not a directory: {}".format("/".join(resolved)))
+
+            try:
+                inode_ref, _ = self._read_directory(inode)[component]
+            except KeyError:
+                raise FileNotFoundError("no such file in SquashFS image: {}".format(path))
+
+            inode = self._read_inode(inode_ref)
+
+            is_last = index == len(components) - 1
+
+            if inode.is_symlink() and (follow_symlinks or not is_last):
+                target = inode.symlink_target
+
+                if target.startswith("/"):
+                    raise FileNotFoundError("cannot resolve absolute symlink {} -> {}".format(path, target))
+
+                inode = self._lookup(posixpath.join("/".join(resolved), target), True, depth + 1)
+
+                # continue from the symlink's target
+                resolved = posixpath.normpath(posixpath.join("/".join(resolved), target)).split("/")
+                resolved = [c for c in resolved if c not in ("", ".")]
+            else:
+                resolved.append(component)
+
+        return inode
+
+    def _fragment(self, index: int) -> Tuple[int, int]:
+        if self._fragment_table is None:
+            count = self._superblock["fragment_count"]
+
+            # the fragment table is stored in metadata blocks, whose positions are stored in an index right after
+            entries_per_block = self._METADATA_BLOCK_SIZE // 16
+            index_count = (count + entries_per_block - 1) // entries_per_block
+
+            block_positions = struct.unpack(
+                "<{}Q".format(index_count), self._raw(self._superblock["fragment_table"], index_count * 8)
+            )
+
+            table = []
+            for block_position in block_positions:
+                block, _ = self._metadata_block(block_position)
+
+                for i in range(0, len(block), 16):
+                    start, size, _ = struct.unpack("<QII", block[i:i + 16])
+                    table.append((start, size))
+
+            self._fragment_table = table[:count]
+
+        return self._fragment_table[index]
+
+    def _data_block(self, position: int, on_disk_size: int) -> bytes:
+        key = (position, on_disk_size)
+
+        with self._block_cache_lock:
+            data = self._block_cache.pop(key, None)
+
+            # move to the end to implement LRU eviction
+            if data is not None:
+                self._block_cache[key] = data
+                return data
+
+        # decompress without holding the lock, so that other threads can read blocks in the meantime
+        data = self._raw(position, on_disk_size & ~self._BLOCK_UNCOMPRESSED)
+
+        if not on_disk_size & self._BLOCK_UNCOMPRESSED:
+            data = self._decompress(data)
+
+        with self._block_cache_lock:
+            self._block_cache.pop(key, None)
+
+            if len(self._block_cache) >= self._block_cache_size:
+                self._block_cache.popitem(last=False)
+
+            self._block_cache[key] = data
+
+        return data
+
+    def _file_block(self, inode: SquashfsInode, index: int) -> bytes:
+        block_size = self.block_size()
+
+        if index < len(inode.block_sizes):
+            on_disk_size = inode.block_sizes[index]
+            expected_size = min(block_size, inode.size - index * block_size)
+
+            # sparse block
+            if on_disk_size & ~self._BLOCK_UNCOMPRESSED == 0:
+                return b"\x00" * expected_size
+
+            block = self._data_block(inode.block_positions[index], on_disk_size)
+
+            # avoid copying the (potentially large) block unless necessary
+            if len(block) != expected_size:
+                block = block[:expected_size]
+
+            return block
+
+        # the tail end of the file is stored in a fragment block
+        start, size = self._fragment(inode.fragment_index)
+        tail_size = inode.size - len(inode.block_sizes) * block_size
+
+        fragment = self._data_block(start, size)
+        return fragment[inode.fragment_offset:inode.fragment_offset + tail_size]
+
+    def read(self, inode: SquashfsInode, offset: int = 0, size: int = None) -> bytes:
+        """
+        Read (parts of) a regular file's contents. Only the blocks covering the requested range are decompressed.
+        """
+
+        if not inode.is_file():
+            raise IsADirectoryError("not a regular file: inode {}".format(inode.inode_number))
+
+        if size is None:
+            size = inode.size - offset
+
+        end = min(offset + size, inode.size)
+
+        if offset >= end:
+            return b""
+
+        block_size = self.block_size()
+
+        rv = bytearray()
+
+        for index in range(offset // block_size, (end - 1) // block_size + 1):
+            block = self._file_block(inode, index)
+            block_start = index * block_size
+
+            rv += block[max(offset - block_start, 0):end - block_start]
+
+        return bytes(rv)
+
+    def open_file(self, inode: SquashfsInode) -> io.BufferedReader:
+        """
+        Open regular file for reading. Data are decompressed lazily while reading.
+        """
+
+        if not inode.is_file():
+            raise IsADirectoryError("not a regular file: inode {}".format(inode.inode_number))
+
+        return io.BufferedReader(SquashfsFile(self, inode))
+
+    def buffer(self, inode: SquashfsInode) -> SquashfsFileBuffer:
+        """
+        Get lazily decompressed, bytes-like view of a regular file (see :class:`SquashfsFileBuffer`).
+        """
+
+        if not inode.is_file():
+            raise IsADirectoryError("not a regular file: inode {}".format(inode.inode_number))
+
+        return SquashfsFileBuffer(self, inode)
+
+    def stat_mode(self, inode: SquashfsInode) -> int:
+        """
+        :return: file mode including file type bits, like os.stat().st_mode
+        """
+
+        if inode.is_dir():
+            type_bits = stat.S_IFDIR
+        elif inode.is_file():
+            type_bits = stat.S_IFREG
+        elif inode.is_symlink():
+            type_bits = stat.S_IFLNK
+        else:
+            type_bits = 0
+
+        return type_bits | inode.mode
@@ -0,0 +1,420 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models import TestResult
+from .._logging import make_logger
+from ..reports import JSONReport
+from .appimagemounter import AppImageMounter
+from .batch_linter import BatchLinter
+from .checks_manager import ChecksManager
+from .lint_session import LintSession
+from .result_formatter import ResultFormatter
+
+
+class QueuedJob:
+    """
+    A job claimed from a :class:`WorkQueue`.
+    """
+
+    def __init__(self, job_id: str, claim_path: str, data: Dict):
+        self.id = job_id
+        self.claim_path = claim_path
+        self.data = data
+
+    def path(self) -> str:
+        return self.data["path"]
+
+
+class WorkQueue:
+    """
+    Work queue which uses nothing but a shared directory (e.g., on NFS), so that AppImages can be linted on several
+    machines without running any additional services.
+
+    Layout of the queue directory:
+
+    - ``manifest.jsonl``: IDs and paths of all jobs, in the order they were enqueued
+    - ``pending/<id>.json``: jobs waiting for a worker
+    - ``claimed/<id>@<worker>.json``: jobs being worked on; the file's modification time is the worker's lease, and
+      is renewed periodically
+    - ``results/<id>.json``: results of finished jobs
+    - ``done/<id>.json``: marks a job as finished
+
+    Jobs are claimed by renaming them from pending/ to claimed/, which succeeds for exactly one worker even on NFS.
+    Jobs whose lease has expired, e.g., because the worker crashed, are moved back to pending/ by whoever notices
+    first. Results are written to temporary files and renamed, so readers never see incomplete files.
+    """
+
+    DEFAULT_LEASE_TIMEOUT = 300
+
+    _PENDING = "pending"
+    _CLAIMED = "claimed"
+    _RESULTS = "results"
+    _DONE = "done"
+
+    _MANIFEST = "manifest.jsonl"
+
+    _logger = make_logger("work_queue")
+
+    def __init__(self, directory: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        self._directory = directory
+        self._lease_timeout = lease_timeout
+
+    def directory(self) -> str:
+        return self._directory
+
+    def lease_timeout(self) -> float:
+        return self._lease_timeout
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self._directory, *parts)
+
+    def create(self):
+        for name in (self._PENDING, self._CLAIMED, self._RESULTS, self._DONE):
+            os.makedirs(self._path(name), exist_ok=True)
+
+    def _write_atomically(self, path: str, data):
+        # the temporary file must be on the same filesystem, otherwise the rename isn't atomic
+        temp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+
+            os.rename(temp_path, path)
+
+        except:  # noqa
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+
+            raise
+
+    def _now(self) -> float:
+        """
+        Current time according to the filesystem. The machines sharing the queue might not agree on the time, but
+        the leases are compared to modification times set by the file server.
+        """
+
+        path = self._path(".clock-{}".format(uuid.uuid4().hex))
+
+        with open(path, "w"):
+            pass
+
+        try:
+            return os.stat(path).st_mtime
+        finally:
+            os.unlink(path)
+
+    def enqueue(self, paths: Iterable[str], checks_ids: List[str] = None, level: str = LintSession.LEVEL_STANDARD,
+                backend: str = LintSession.BACKEND_AUTO, fail_fast: bool = False) -> List[str]:
+        """
+        Add a job for every AppImage to the queue.
+
+        :param paths: paths to AppImages; they must be accessible under the same paths on all workers
+        :return: IDs of the new jobs
+        """
+
+        self.create()
+
+        job_ids = []
+
+        # the IDs sort in the order the jobs are enqueued, which is the order the workers claim them in
+        id_prefix = "{:019d}".format(time.time_ns())
+
+        with open(self._path(self._MANIFEST), "a") as manifest:
+            for index, path in enumerate(paths):
+                job_id = "{}-{:08d}-{}".format(id_prefix, index, uuid.uuid4().hex[:8])
+
+                job = {
+                    "id": job_id,
+                    "path": os.path.abspath(path),
+                    "checks": checks_ids,
+                    "level": level,
+                    "backend": backend,
+                    "fail_fast": fail_fast,
+                }
+
+                # the job must be in the manifest before a worker can finish it
+                manifest.write(json.dumps({"id": job_id, "path": path}) + "\n")
+                manifest.flush()
+
+                self._write_atomically(self._path(self._PENDING, "{}.json".format(job_id)), job)
+
+                job_ids.append(job_id)
+
+        self._logger.info("Enqueued {} jobs".format(len(job_ids)))
+
+        return job_ids
+
+    def manifest(self) -> List[Tuple[str, str]]:
+        """
+        :return: IDs and paths of all jobs, in the order they were enqueued
+        """
+
+        try:
+            with open(self._path(self._MANIFEST)) as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+
+        except FileNotFoundError:
+            return []
+
+        return [(i["id"], i["path"]) for i in entries]
+
+    def is_done(self, job_id: str) -> bool:
+        return os.path.exists(self._path(self._DONE, "{}.json".format(job_id)))
+
+    def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        """
+        Claim the oldest pending job.
+
+        :return: job, or None if there are no pending jobs
+        """
+
+        for file_name in sorted(os.listdir(self._path(self._PENDING))):
+            if not file_name.endswith(".json"):
+                continue
+
+            job_id = file_name[:-len(".json")]
+
+            claim_path = self._path(self._CLAIMED, "{}@{}.json".format(job_id, worker_id))
+
+            pending_path = self._path(self._PENDING, file_name)
+
+            try:
+                # the rename keeps the modification time, which would make the lease look expired right away
+                os.utime(pending_path)
+                os.rename(pending_path, claim_path)
+
+            except FileNotFoundError:
+                # another worker was faster
+                continue
+
+            # a reclaimed job might have been finished by the worker whose lease expired after all
+            if self.is_done(job_id):
+                os.unlink(claim_path)
+                continue
+
+            with open(claim_path) as f:
+                data = json.load(f)
+
+            return QueuedJob(job_id, claim_path, data)
+
+        return None
+
+    def renew(self, job: QueuedJob):
+        """
+        Renew the lease on a job.
+
+        :raises FileNotFoundError: if the job has been reclaimed in the meantime
+        """
+
+        os.utime(job.claim_path)
+
+    def complete(self, job: QueuedJob, results: Dict[type, List[TestResult]], error: str = None):
+        """
+        Store the results of a job, and mark it as finished.
+        """
+
+        self._write_atomically(self._path(self._RESULTS, "{}.json".format(job.id)), {
+            "path": job.data["path"],
+            "checks": JSONReport.checks_to_json(results),
+            "error": error,
+        })
+
+        self._write_atomically(self._path(self._DONE, "{}.json".format(job.id)), {"path": job.data["path"]})
+
+        try:
+            os.unlink(job.claim_path)
+
+        except FileNotFoundError:
+            # the lease expired, and the job has been reclaimed by someone else; whoever claims it next sees that it's
+            # done already
+            self._logger.warning("lease on job {} expired before it was finished".format(job.id))
+
+    def reclaim_expired(self) -> int:
+        """
+        Move jobs whose lease has expired back to the pending jobs.
+
+        :return: number of reclaimed jobs
+        """
+
+        now = self._now()
+
+        reclaimed = 0
+
+        for file_name in os.listdir(self._path(self._CLAIMED)):
+            if not file_name.endswith(".json") or "@" not in file_name:
+                continue
+
+            claim_path = self._path(self._CLAIMED, file_name)
+
+            try:
+                if now - os.stat(claim_path).st_mtime < self._lease_timeout:
+                    continue
+
+                job_id = file_name.split("@", 1)[0]
+
+                # only one of the processes noticing the expired lease succeeds
+                os.rename(claim_path, self._path(self._PENDING, "{}.json".format(job_id)))
+
+            except FileNotFoundError:
+                continue
+
+            self._logger.warning("lease on job {} expired, job is pending again".format(job_id))
+            reclaimed += 1
+
+        return reclaimed
+
+    def counts(self) -> Dict[str, int]:
+        """
+        :return: numbers of pending, claimed and finished jobs
+        """
+
+        return {
+            name: len([i for i in os.listdir(self._path(name)) if i.endswith(".json")])
+            for name in (self._PENDING, self._CLAIMED, self._DONE)
+        }
+
+    def results(self) -> Iterator[Tuple[str, Optional[Dict[type, List[TestResult]]]]]:
+        """
+        Load the results of all jobs, in the order they were enqueued.
+
+        :return: iterator yielding (path, results) tuples; results are None for unfinished jobs
+        """
+
+        for job_id, path in self.manifest():
+            try:
+                with open(self._path(self._RESULTS, "{}.json".format(job_id))) as f:
+                    data = json.load(f)
+
+            except FileNotFoundError:
+                yield path, None
+                continue
+
+            if data["error"] is not None:
+                self._logger.warning("job for AppImage {} failed: {}".format(path, data["error"]))
+
+            yield path, JSONReport.checks_from_json(data["checks"])
+
+
+class WorkQueueWorker:
+    """
+    Lints the AppImages in a :class:`WorkQueue`, one at a time. Any number of workers may work on the same queue,
+    on any number of machines.
+    """
+
+    _logger = make_logger("work_queue_worker")
+
+    def __init__(self, work_queue: WorkQueue, custom_runtime: str = None, formatter: ResultFormatter = None,
+                 jobs: int = 1, binary_versions_cache=None, result_cache=None,
+                 mount_timeout: float = AppImageMounter.DEFAULT_TIMEOUT):
+        self._queue = work_queue
+        self._custom_runtime = custom_runtime
+        self._formatter = formatter or ResultFormatter()
+        self._jobs = jobs
+        self._binary_versions_cache = binary_versions_cache
+        self._result_cache = result_cache
+        self._mount_timeout = mount_timeout
+
+        self._worker_id = "{}-{}".format(socket.gethostname(), os.getpid())
+
+    def worker_id(self) -> str:
+        return self._worker_id
+
+    def _keep_lease(self, job: QueuedJob, finished: threading.Event):
+        # renew well before the lease expires, the filesystem might be slow
+        interval = self._queue.lease_timeout() / 3
+
+        while not finished.wait(interval):
+            try:
+                self._queue.renew(job)
+
+            except FileNotFoundError:
+                self._logger.warning("lost lease on job {}".format(job.id))
+                return
+
+            except OSError:
+                self._logger.debug("failed to renew lease on job {}".format(job.id), exc_info=True)
+
+    def _run(self, job: QueuedJob) -> Tuple[Dict[type, List[TestResult]], Optional[str]]:
+        level = job.data.get("level", LintSession.LEVEL_STANDARD)
+        checks_ids = job.data.get("checks") or ChecksManager.list_checks()
+
+        linter = BatchLinter(
+            checks_ids,
+            custom_runtime=self._custom_runtime,
+            formatter=self._formatter,
+            jobs=self._jobs,
+            binary_versions_cache=self._binary_versions_cache,
+            result_cache=self._result_cache,
+            backend=job.data.get("backend", LintSession.BACKEND_AUTO),
+            mount_timeout=self._mount_timeout,
+            level=level,
+            fail_fast=bool(job.data.get("fail_fast", False)),
+        )
+
+        results, stats = linter.lint_one_with_stats(job.path())
+
+        return results, stats.error()
+
+    def run_one(self) -> bool:
+        """
+        Claim a job and run it.
+
+        :return: whether there was a job to run
+        """
+
+        job = self._queue.claim(self._worker_id)
+
+        if job is None:
+            return False
+
+        self._logger.info("Claimed job {} for AppImage {}".format(job.id, job.path()))
+
+        finished = threading.Event()
+
+        lease_keeper = threading.Thread(target=self._keep_lease, args=(job, finished), daemon=True)
+        lease_keeper.start()
+
+        try:
+            results, error = self._run(job)
+
+        finally:
+            finished.set()
+            lease_keeper.join()
+
+        self._queue.complete(job, results, error)
+
+        return True
+
+    def run(self, poll_interval: float = 10, exit_when_empty: bool = False):
+        """
+        Run jobs until interrupted.
+
+        :param poll_interval: time to wait for new jobs when the queue is empty, in seconds
+        :param exit_when_empty: return as soon as there are no pending jobs (and no jobs to reclaim)
+        """
+
+        self._logger.info("Worker {} processing queue {}".format(self._worker_id, self._queue.directory()))
+
+        self._queue.create()
+
+        while True:
+            if self.run_one():
+                continue
+
+            # crashed workers' jobs are picked up by the others
+            if self._queue.reclaim_expired() > 0:
+                continue
+
+            if exit_when_empty:
+                self._logger.info("No pending jobs, exiting")
+                return
+
+            time.sleep(poll_interval)
@@ -0,0 +1,102 @@
+#! /usr/bin/env python3
+
+"""
+Measures the memory needed for keeping the results of a large batch in memory, as the CLI does for JSON reports.
+
+The results are synthesized using the IDs and messages of the registered checks. Every AppImage gets its own copies
+of the strings, like results received from worker processes or read from a cache.
+
+Usage: ci/benchmark-result-memory.py [number of AppImages]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appimagelint.models import ResultVector, TestResult  # noqa: E402
+from appimagelint.services.checks_manager import ChecksManager  # noqa: E402
+
+
+class PlainTestResult:
+    """
+    TestResult as it used to be, with a dict per instance and without interning.
+    """
+
+    def __init__(self, success: bool, id: str, message: str):
+        self._success = success
+        self._message = message
+        self._id = id
+
+
+def copy_str(s: str) -> str:
+    return (s + ".")[:-1]
+
+
+def make_template():
+    ChecksManager.init()
+
+    template = []
+
+    for check_id in ChecksManager.list_checks():
+        check_cls = ChecksManager.get_class(check_id)
+
+        # roughly what the checks produce for a single AppImage
+        results = [
+            (i % 3 != 0, "{}_result_{}".format(check_id, i), "AppImage can run on distribution release {}".format(i))
+            for i in range(6)
+        ]
+
+        template.append((check_cls, results))
+
+    return template
+
+
+def make_results(template, result_cls):
+    return OrderedDict(
+        (check_cls, [result_cls(success, copy_str(id), copy_str(message)) for success, id, message in results])
+        for check_cls, results in template
+    )
+
+
+def measure(name, count, template, make):
+    gc.collect()
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+
+    results = {}
+
+    for i in range(count):
+        results["/path/to/appimage-{}.AppImage".format(i)] = make(template)
+
+    duration = time.perf_counter() - start_time
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("{:<24} {:>10.1f} MiB {:>10.0f} B/AppImage {:>8.2f} s".format(
+        name, current / 1024 / 1024, current / count, duration
+    ))
+
+    del results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    template = make_template()
+
+    print("{} AppImages, {} results each".format(count, sum(len(i[1]) for i in template)))
+    print()
+
+    measure("plain objects", count, template, lambda t: make_results(t, PlainTestResult))
+    measure("slots, interned", count, template, lambda t: make_results(t, TestResult))
+    measure("result vectors", count, template, lambda t: ResultVector(make_results(t, TestResult)))
+
+
+if __name__ == "__main__":
+    main()
@@ -48,7 +48,6 @@ export VERSION="$SETUPPY_VERSION-git$COMMIT"
 install -D "$REPO_ROOT"/resources/com.github.theassassin.appimagelint.appdata.xml -t AppDir/usr/share/metainfo/
 
 ./linuxdeploy-"$ARCH".AppImage --appdir AppDir --plugin conda \
-    -e $(which readelf) \
     -e $(which desktop-file-validate) \
     -i "$REPO_ROOT"/resources/com.github.theassassin.appimagelint.svg \
     -d "$REPO_ROOT"/resources/com.github.theassassin.appimagelint.desktop \
@@ -39,6 +39,13 @@ setup(
         "xdg",
         "pillow",
     ],
+    extras_require={
+        # optional decompressors for reading AppImages without mounting them
+        "zstd": ["zstandard"],
+        "lz4": ["lz4"],
+        # faster serializer for NDJSON reports
+        "orjson": ["orjson"],
+    },
     cmdclass={
         "bundle_metadata": BundleMetadataCommand,
     },
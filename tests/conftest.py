@@ -0,0 +1,35 @@
+import os
+import shutil
+
+import pytest
+
+from appimagelint.services.checks_manager import ChecksManager
+
+
+@pytest.fixture(scope="session", autouse=True)
+def registered_checks():
+    ChecksManager.init()
+
+
+def make_appdir(root):
+    """
+    Create minimal AppDir, whose binaries are copied from the host system.
+    """
+
+    bin_dir = os.path.join(root, "usr", "bin")
+    os.makedirs(bin_dir)
+
+    for name in ["ls", "true"]:
+        shutil.copy(shutil.which(name), os.path.join(bin_dir, name))
+
+    shutil.copy(shutil.which("true"), os.path.join(root, "AppRun"))
+
+    with open(os.path.join(root, "test.desktop"), "w") as f:
+        f.write("[Desktop Entry]\nType=Application\nName=Test\nExec=true\nIcon=test\nCategories=Utility;\n")
+
+    return root
+
+
+@pytest.fixture
+def appdir(tmp_path):
+    return make_appdir(str(tmp_path / "test.AppDir"))
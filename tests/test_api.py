@@ -0,0 +1,22 @@
+from appimagelint.api import Linter
+
+
+CHECKS_IDS = ["glibc_abi_check"]
+
+
+def test_lint(appdir):
+    with Linter(checks=CHECKS_IDS, use_binary_cache=False) as linter:
+        report = linter.lint(appdir)
+
+    assert report.error() is None
+    assert [check_cls.id() for check_cls in report.results()] == CHECKS_IDS
+
+
+def test_lint_error(tmp_path):
+    path = str(tmp_path / "missing.AppImage")
+
+    with Linter(checks=CHECKS_IDS, use_binary_cache=False) as linter:
+        report = linter.lint(path)
+
+    assert not report.success()
+    assert report.error().startswith("FileNotFoundError: ") and path in report.error()
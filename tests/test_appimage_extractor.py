@@ -0,0 +1,88 @@
+import os
+import shutil
+import subprocess
+import uuid
+
+import pytest
+
+from appimagelint.models import AppImage
+from appimagelint.services import appimage_extractor
+from appimagelint.services.appimage_extractor import AppImageExtractor
+
+
+pytestmark = pytest.mark.skipif(shutil.which("mksquashfs") is None, reason="squashfs-tools not available")
+
+
+def build_image(source_tree, image_path):
+    subprocess.check_call(
+        ["mksquashfs", source_tree, image_path, "-noappend", "-no-progress"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+@pytest.fixture
+def without_unsquashfs(monkeypatch):
+    # make the extractor use SquashfsReader
+    which = shutil.which
+    monkeypatch.setattr(appimage_extractor.shutil, "which", lambda name: None if name == "unsquashfs" else which(name))
+
+
+def test_extract_with_reader(tmp_path, without_unsquashfs):
+    source_tree = str(tmp_path / "src")
+    os.makedirs(os.path.join(source_tree, "usr", "bin"))
+
+    with open(os.path.join(source_tree, "usr", "bin", "test"), "w") as f:
+        f.write("test")
+
+    os.symlink("usr/bin/test", os.path.join(source_tree, "link"))
+
+    image_path = str(tmp_path / "image.squashfs")
+    build_image(source_tree, image_path)
+
+    extractor = AppImageExtractor(AppImage(image_path))
+
+    try:
+        extractor.extract(["usr/bin/test", "link"])
+        extract_dir = extractor.extract_dir()
+
+        with open(os.path.join(extract_dir, "usr", "bin", "test")) as f:
+            assert f.read() == "test"
+
+        assert os.readlink(os.path.join(extract_dir, "link")) == "usr/bin/test"
+
+    finally:
+        extractor.cleanup()
+
+
+def test_paths_outside_extract_dir(tmp_path, without_unsquashfs):
+    # within the image, .. in the root directory refers to the root directory, in the local filesystem it refers to the
+    # parent directories, so the symlink points to the image's root directory, but to the local root directory once
+    # extracted
+    probe_name = "appimagelint-test-{}".format(uuid.uuid4().hex)
+
+    source_tree = str(tmp_path / "src")
+    os.makedirs(os.path.join(source_tree, "tmp"))
+
+    with open(os.path.join(source_tree, "tmp", probe_name), "w") as f:
+        f.write("test")
+
+    os.symlink("../" * 32, os.path.join(source_tree, "escape"))
+
+    image_path = str(tmp_path / "image.squashfs")
+    build_image(source_tree, image_path)
+
+    probe_path = os.path.join("/tmp", probe_name)
+
+    extractor = AppImageExtractor(AppImage(image_path))
+
+    try:
+        extractor.extract(["escape", "escape/tmp/{}".format(probe_name), "../tmp/{}".format(probe_name)])
+
+        assert os.path.islink(os.path.join(extractor.extract_dir(), "escape"))
+        assert not os.path.exists(probe_path)
+
+    finally:
+        extractor.cleanup()
+
+        if os.path.exists(probe_path):
+            os.unlink(probe_path)
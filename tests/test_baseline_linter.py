@@ -0,0 +1,61 @@
+import os
+import shutil
+
+from appimagelint.services.baseline_linter import BaselineLinter, RequirementRegression
+
+from conftest import make_appdir
+
+
+CHECKS_IDS = ["glibc_abi_check"]
+
+
+def clamp_mtimes(root, mtime=1000000000):
+    """
+    Set all modification times to the same value, like reproducible builds do (see SOURCE_DATE_EPOCH).
+    """
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            os.utime(os.path.join(dirpath, name), (mtime, mtime), follow_symlinks=False)
+
+
+def test_changed_file_with_same_size_and_mtime(tmp_path):
+    baseline = make_appdir(str(tmp_path / "baseline.AppDir"))
+    appdir = str(tmp_path / "new.AppDir")
+    shutil.copytree(baseline, appdir, symlinks=True)
+
+    # only a version string changes, which leaves the size alone
+    binary_path = os.path.join(appdir, "usr", "bin", "ls")
+
+    with open(binary_path, "rb") as f:
+        data = f.read()
+
+    assert b"GLIBC_2.3\0" in data
+
+    with open(binary_path, "wb") as f:
+        f.write(data.replace(b"GLIBC_2.3\0", b"GLIBC_9.9\0"))
+
+    clamp_mtimes(baseline)
+    clamp_mtimes(appdir)
+
+    comparison = BaselineLinter(baseline, CHECKS_IDS).lint(appdir)
+
+    assert comparison.changed_files == {"usr/bin/ls"}
+
+    regressions = [(i.prefix, i.path, i.kind, i.new_version) for i in comparison.regressions]
+    assert regressions == [("GLIBC_", "usr/bin/ls", RequirementRegression.KIND_CHANGED, "9.9")]
+
+
+def test_unchanged_payload(tmp_path):
+    baseline = make_appdir(str(tmp_path / "baseline.AppDir"))
+    appdir = str(tmp_path / "new.AppDir")
+    shutil.copytree(baseline, appdir, symlinks=True)
+
+    # the modification times don't matter, only the contents
+    clamp_mtimes(appdir, mtime=2000000000)
+
+    comparison = BaselineLinter(baseline, CHECKS_IDS).lint(appdir)
+
+    assert comparison.changed_files == set()
+    assert comparison.regressions == []
+    assert comparison.changes == []
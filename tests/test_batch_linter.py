@@ -0,0 +1,60 @@
+from appimagelint.cache import ResultCache
+from appimagelint.reports import ResultsDatabase
+from appimagelint.services.batch_linter import BatchLinter
+
+
+CHECKS_IDS = ["glibc_abi_check"]
+
+
+def simplify(results):
+    return [
+        (check_cls.id(), [(i.id(), i.success(), i.message()) for i in check_results])
+        for check_cls, check_results in results.items()
+    ]
+
+
+def test_result_cache(appdir, tmp_path, caplog):
+    caplog.set_level("INFO", logger="appimagelint")
+
+    result_cache = ResultCache(str(tmp_path / "results.sqlite"))
+    results_db = ResultsDatabase(str(tmp_path / "db.sqlite"))
+
+    linter = BatchLinter(CHECKS_IDS, result_cache=result_cache, results_db=results_db)
+
+    results, stats = linter.lint_one_with_stats(appdir)
+    required_versions = results_db.required_versions("GLIBC_")
+
+    assert stats.max_versions()["GLIBC_"]
+    assert required_versions == [(stats.max_versions()["GLIBC_"], 1)]
+
+    caplog.clear()
+
+    cached_results, cached_stats = linter.lint_one_with_stats(appdir)
+
+    assert any("Found cached results" in i.getMessage() for i in caplog.records)
+
+    # cached AppImages must be counted like the others in summaries and the database
+    assert simplify(cached_results) == simplify(results)
+    assert cached_stats.max_versions() == stats.max_versions()
+    assert results_db.required_versions("GLIBC_") == required_versions
+
+    result_cache.close()
+    results_db.close()
+
+
+def test_error(tmp_path, caplog):
+    path = str(tmp_path / "missing.AppImage")
+
+    results, stats = BatchLinter(CHECKS_IDS).lint_one_with_stats(path)
+
+    assert not results
+    assert stats.error().startswith("FileNotFoundError: ") and path in stats.error()
+
+    assert any(i.levelname == "ERROR" and path in i.getMessage() for i in caplog.records)
+
+
+def test_no_error(appdir):
+    results, stats = BatchLinter(CHECKS_IDS).lint_one_with_stats(appdir)
+
+    assert results
+    assert stats.error() is None
@@ -0,0 +1,192 @@
+import collections
+import threading
+import time
+
+import pytest
+
+from appimagelint.checks import CheckBase
+from appimagelint.services import check_scheduler, lint_session
+from appimagelint.services.check_scheduler import CheckScheduler
+from appimagelint.services.checks_manager import ChecksManager
+from appimagelint.services.lint_session import LintSession
+from appimagelint import models
+
+
+def make_check(check_id, required_artifacts, delay):
+    """
+    Create check which uses some artifacts, and takes some time to finish.
+    """
+
+    class FakeCheck(CheckBase):
+        def run(self):
+            logger = self.get_logger()
+            logger.info("{} started".format(check_id))
+
+            for artifact in required_artifacts:
+                self._session.artifact(artifact)
+
+            time.sleep(delay)
+
+            logger.info("{} finished".format(check_id))
+
+            yield models.TestResult(True, "{}.result".format(check_id), "Result of {}".format(check_id))
+
+        @staticmethod
+        def required_artifacts():
+            return tuple(required_artifacts)
+
+        @staticmethod
+        def name():
+            return "Fake check {}".format(check_id)
+
+        @staticmethod
+        def id():
+            return check_id
+
+    return FakeCheck
+
+
+# the earlier checks take longer than the later ones
+FAKE_CHECKS = [
+    make_check("slow_binaries_check", [LintSession.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS], 0.3),
+    make_check("inventory_check", [LintSession.ARTIFACT_INVENTORY], 0.2),
+    make_check("other_binaries_check", [LintSession.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS], 0.1),
+    make_check("no_artifacts_check", [], 0),
+]
+
+FAKE_CHECKS_IDS = [i.id() for i in FAKE_CHECKS]
+
+
+@pytest.fixture(autouse=True)
+def fake_checks(monkeypatch):
+    monkeypatch.setattr(ChecksManager, "_registered_checks", collections.OrderedDict(
+        (check_cls.id(), check_cls) for check_cls in FAKE_CHECKS
+    ))
+
+    # the metadata isn't used by the fake checks, and might have to be downloaded
+    monkeypatch.setattr(check_scheduler, "get_metadata_caches", lambda: [])
+
+
+@pytest.fixture
+def computations(monkeypatch):
+    """
+    Counts how often every artifact is computed. Computing them takes some time, so that other threads get a chance
+    to request them in the meantime.
+    """
+
+    counts = collections.Counter()
+    lock = threading.Lock()
+
+    def counting(name, func):
+        def wrapper(*args, **kwargs):
+            with lock:
+                counts[name] += 1
+
+            time.sleep(0.05)
+
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(lint_session, "DirectoryFilesystem", counting(
+        LintSession.ARTIFACT_FILESYSTEM, lint_session.DirectoryFilesystem
+    ))
+    monkeypatch.setattr(lint_session, "PayloadInventory", counting(
+        LintSession.ARTIFACT_INVENTORY, lint_session.PayloadInventory
+    ))
+    monkeypatch.setattr(LintSession, "_scan_gnu_lib_version_requirements", counting(
+        LintSession.ARTIFACT_GNU_LIB_VERSION_REQUIREMENTS, LintSession._scan_gnu_lib_version_requirements
+    ))
+
+    return counts
+
+
+def run_checks(appdir, checks_ids, concurrent=True, jobs=1):
+    with LintSession(models.AppImage(appdir), jobs=jobs) as session:
+        return [
+            (check_cls.id(), [i.id() for i in results])
+            for check_cls, results in CheckScheduler(session, checks_ids, concurrent=concurrent).run()
+        ]
+
+
+def expected_results(checks_ids):
+    return [(i, ["{}.result".format(i)]) for i in checks_ids]
+
+
+def test_graph(appdir):
+    with LintSession(models.AppImage(appdir)) as session:
+        graph = CheckScheduler(session, FAKE_CHECKS_IDS).graph()
+
+    assert graph == {
+        "check:slow_binaries_check": {"artifact:gnu_lib_version_requirements"},
+        "artifact:gnu_lib_version_requirements": {"artifact:inventory"},
+        "artifact:inventory": {"artifact:filesystem"},
+        "artifact:filesystem": set(),
+        "check:inventory_check": {"artifact:inventory"},
+        "check:other_binaries_check": {"artifact:gnu_lib_version_requirements"},
+        "check:no_artifacts_check": set(),
+    }
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_result_order(concurrent, appdir):
+    assert run_checks(appdir, FAKE_CHECKS_IDS, concurrent=concurrent) == expected_results(FAKE_CHECKS_IDS)
+
+    checks_ids = list(reversed(FAKE_CHECKS_IDS))
+    assert run_checks(appdir, checks_ids, concurrent=concurrent) == expected_results(checks_ids)
+
+
+@pytest.mark.parametrize("concurrent,jobs", [(True, 1), (True, 2), (False, 1)])
+def test_artifacts_computed_once(concurrent, jobs, appdir, computations):
+    assert run_checks(appdir, FAKE_CHECKS_IDS, concurrent=concurrent, jobs=jobs) == expected_results(FAKE_CHECKS_IDS)
+
+    assert computations == {artifact: 1 for artifact in LintSession.ARTIFACTS}
+
+
+def test_artifacts_computed_on_demand(appdir, computations):
+    run_checks(appdir, ["inventory_check", "no_artifacts_check"])
+
+    # nobody needs the binaries to be scanned
+    assert computations == {LintSession.ARTIFACT_FILESYSTEM: 1, LintSession.ARTIFACT_INVENTORY: 1}
+
+
+def test_checks_run_concurrently(appdir):
+    durations = {}
+
+    for concurrent in (True, False):
+        start = time.monotonic()
+        run_checks(appdir, FAKE_CHECKS_IDS, concurrent=concurrent)
+        durations[concurrent] = time.monotonic() - start
+
+    # the checks' delays sum up to 0.6 seconds, the longest one is 0.3 seconds
+    assert durations[True] < durations[False] - 0.15
+
+
+def test_log_messages_in_order(appdir, caplog):
+    caplog.set_level("INFO", logger="appimagelint")
+
+    run_checks(appdir, FAKE_CHECKS_IDS)
+
+    messages = [i.getMessage() for i in caplog.records if i.name.startswith("appimagelint.")]
+    messages = [i for i in messages if i.startswith("Running check") or i.endswith(("started", "finished"))]
+
+    expected = []
+
+    for check_cls in FAKE_CHECKS:
+        expected += [
+            "Running check \"{}\"".format(check_cls.name()),
+            "{} started".format(check_cls.id()),
+            "{} finished".format(check_cls.id()),
+        ]
+
+    assert messages == expected
+
+
+def test_failing_check(appdir, monkeypatch):
+    def fail(self):
+        raise RuntimeError("check failed")
+
+    monkeypatch.setattr(FAKE_CHECKS[1], "run", fail)
+
+    with pytest.raises(RuntimeError):
+        run_checks(appdir, FAKE_CHECKS_IDS)
@@ -0,0 +1,159 @@
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from appimagelint.services.elf_version_reader import ElfVersionReader
+from appimagelint.services.gnu_lib_versions_symbol_finder import GnuLibVersionSymbolsFinder
+
+
+pytestmark = pytest.mark.skipif(shutil.which("readelf") is None, reason="readelf not available")
+
+
+def _loaded_shared_objects():
+    paths = set()
+
+    with open("/proc/self/maps") as f:
+        for line in f:
+            fields = line.split()
+
+            if len(fields) >= 6 and ".so" in os.path.basename(fields[5]):
+                paths.add(fields[5])
+
+    return paths
+
+
+# executables and libraries (libc among them) which are available on every system running the tests
+ELF_FILES = sorted({
+    os.path.realpath(path) for path in [shutil.which("ls"), sys.executable] + list(_loaded_shared_objects())
+    if path and os.path.isfile(path)
+})
+
+
+def readelf_versions(path):
+    """
+    :return: names of the required and defined versions, as listed by readelf -V
+    """
+
+    output = subprocess.check_output(["readelf", "-V", "-W", path], env=dict(os.environ, LC_ALL="C")).decode()
+
+    requirements, definitions = [], []
+    section = None
+
+    for line in output.splitlines():
+        if line.startswith("Version needs section"):
+            section = requirements
+        elif line.startswith("Version definition section"):
+            section = definitions
+        elif line.startswith("Version symbols section"):
+            section = None
+
+        elif section is requirements:
+            match = re.search(r"Name: (\S+)\s+Flags:", line)
+            if match:
+                requirements.append(match.group(1))
+
+        elif section is definitions:
+            # the parents' names are listed in separate lines
+            match = re.search(r"Rev: \d+.*Name: (\S+)$", line)
+            if match:
+                definitions.append(match.group(1))
+
+    return requirements, definitions
+
+
+def strip_section_headers(path, target_path):
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+
+    # e_ident[EI_CLASS] and e_ident[EI_DATA]
+    if data[4] != 2 or data[5] != 1:
+        pytest.skip("not a 64-bit little endian ELF file")
+
+    # e_shoff, and e_shnum and e_shstrndx
+    struct.pack_into("<Q", data, 0x28, 0)
+    struct.pack_into("<HH", data, 0x3c, 0, 0)
+
+    with open(target_path, "wb") as f:
+        f.write(data)
+
+
+@pytest.mark.parametrize("path", ELF_FILES, ids=os.path.basename)
+def test_versions_match_readelf(path):
+    requirements, definitions = readelf_versions(path)
+
+    with ElfVersionReader(path) as reader:
+        assert reader.version_requirements() == requirements
+        assert reader.version_definitions() == definitions
+
+
+def test_libc_defines_glibc_versions():
+    libcs = [path for path in ELF_FILES if os.path.basename(path).startswith("libc.so")]
+
+    if not libcs:
+        pytest.skip("libc not found")
+
+    with ElfVersionReader(libcs[0]) as reader:
+        assert "GLIBC_2.2.5" in reader.version_definitions() or "GLIBC_2.0" in reader.version_definitions()
+
+
+@pytest.mark.parametrize("path", ELF_FILES, ids=os.path.basename)
+def test_versions_without_section_headers(path, tmp_path):
+    stripped_path = str(tmp_path / os.path.basename(path))
+    strip_section_headers(path, stripped_path)
+
+    requirements, definitions = readelf_versions(path)
+
+    # the version information is located using the dynamic segment then
+    with ElfVersionReader(stripped_path) as reader:
+        assert reader.version_requirements() == requirements
+        assert reader.version_definitions() == definitions
+
+        # the sections' sizes are unknown without the section headers
+        if requirements or definitions:
+            assert reader.fingerprint() is None
+
+
+def test_fingerprint_is_stable(tmp_path):
+    path = shutil.which("ls")
+    copy_path = str(tmp_path / "ls")
+    shutil.copy(path, copy_path)
+
+    with ElfVersionReader(path) as reader, ElfVersionReader(copy_path) as copy_reader:
+        assert reader.fingerprint() is not None
+        assert reader.fingerprint() == copy_reader.fingerprint()
+
+
+def test_not_an_elf_file(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("#! /bin/sh\n")
+
+    with pytest.raises(ValueError):
+        with ElfVersionReader(str(path)):
+            pass
+
+
+def test_truncated_file(tmp_path, caplog):
+    path = str(tmp_path / "truncated")
+
+    with open(shutil.which("ls"), "rb") as f:
+        data = f.read()
+
+    with open(path, "wb") as f:
+        f.write(data[:100])
+
+    with pytest.raises(ValueError):
+        with ElfVersionReader(path) as reader:
+            reader.version_requirements()
+
+    # the other files are still scanned, the truncated one is reported to have no versions
+    finder = GnuLibVersionSymbolsFinder()
+    results = dict(finder.detect_all_gnu_lib_versions_in_files([path, shutil.which("ls")]))
+
+    assert results[path] == {}
+    assert results[shutil.which("ls")] == finder.detect_all_gnu_lib_versions(shutil.which("ls"))
+    assert any(path in i.getMessage() for i in caplog.records if i.levelname == "WARNING")
@@ -0,0 +1,143 @@
+import os
+import threading
+
+import pytest
+
+from appimagelint.services.batch_linter import BatchLinter
+from appimagelint.services.lint_client import LintClient
+from appimagelint.services.lint_server import LintServer
+
+
+CHECKS_IDS = ["glibc_abi_check", "glibcxx_abi_check"]
+
+
+@pytest.fixture
+def start_server(tmp_path):
+    """
+    Runs lint servers in background threads, and stops them once the test is done.
+    """
+
+    servers = []
+
+    def start(**kwargs):
+        server = LintServer(socket_path=str(tmp_path / "run" / "lint.sock"), **kwargs)
+        server.start()
+        servers.append(server)
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        return server
+
+    yield start
+
+    for server in servers:
+        server._server.shutdown()
+        server.stop()
+
+
+def simplify(results):
+    return [
+        (check_cls.id(), [(i.id(), i.success(), i.message()) for i in check_results])
+        for check_cls, check_results in results.items()
+    ]
+
+
+@pytest.mark.parametrize("workers,jobs", [(1, 1), (2, 1), (2, 2)])
+def test_round_trip(workers, jobs, start_server, tmp_path, appdir, caplog):
+    server = start_server(workers=workers, jobs=jobs)
+    client = LintClient(server.socket_path())
+
+    assert client.is_available()
+
+    # the socket must only be accessible for the current user
+    assert os.stat(server.socket_path()).st_mode & 0o777 == 0o600
+    assert os.stat(os.path.dirname(server.socket_path())).st_mode & 0o777 == 0o700
+
+    other_appdir = str(tmp_path / "other.AppDir")
+    os.symlink(appdir, other_appdir)
+
+    paths = [appdir, other_appdir, appdir]
+    received = list(client.lint(paths, checks_ids=CHECKS_IDS))
+
+    assert [path for path, _ in received] == paths
+
+    expected = simplify(BatchLinter(CHECKS_IDS).lint_one(appdir))
+    assert expected
+
+    for path, results in received:
+        assert simplify(results) == expected
+
+    assert not [i for i in caplog.records if "failed to lint" in i.getMessage()]
+
+
+def test_failed_jobs(start_server, tmp_path, caplog):
+    server = start_server()
+    client = LintClient(server.socket_path())
+
+    missing_path = str(tmp_path / "missing.AppImage")
+    received = list(client.lint([missing_path], checks_ids=CHECKS_IDS))
+
+    # the results for the following jobs must not get mixed up
+    assert received == [(missing_path, {})]
+    assert any(missing_path in i.getMessage() for i in caplog.records if i.levelname == "ERROR")
+
+    # the client must learn the actual error, not just that there was one
+    assert any(
+        "failed to lint AppImage {}: FileNotFoundError".format(missing_path) in i.getMessage() for i in caplog.records
+    )
+
+
+def test_rejects_other_users(start_server, monkeypatch, appdir):
+    server = start_server()
+    client = LintClient(server.socket_path())
+
+    monkeypatch.setattr(LintServer, "peer_uid", staticmethod(lambda sock: os.getuid() + 1))
+
+    # the client checks the server's credentials as well, which are patched the same way
+    assert not client.is_available()
+
+    with pytest.raises(OSError):
+        list(client.lint([appdir], checks_ids=CHECKS_IDS))
+
+
+def test_refuses_to_replace_running_server(start_server):
+    server = start_server()
+
+    with pytest.raises(RuntimeError):
+        LintServer(socket_path=server.socket_path()).start()
+
+
+def test_crashing_jobs(start_server, monkeypatch, tmp_path, appdir, caplog):
+    failing_path = str(tmp_path / "failing.AppImage")
+    crashing_path = str(tmp_path / "crashing.AppImage")
+
+    run_job = LintServer.run_job
+
+    def patched_run_job(self, job):
+        if job["path"] == failing_path:
+            raise RuntimeError("unexpected error")
+
+        if job["path"] == crashing_path:
+            # breaks the pool, like a worker killed by the OOM killer
+            os._exit(1)
+
+        return run_job(self, job)
+
+    # the workers are forked when the server is started, and inherit the patched method
+    monkeypatch.setattr(LintServer, "run_job", patched_run_job)
+
+    server = start_server()
+    client = LintClient(server.socket_path())
+
+    paths = [failing_path, appdir, crashing_path, appdir]
+    received = list(client.lint(paths, checks_ids=CHECKS_IDS))
+
+    # every job must be reported, even those which can't be run anymore once the pool is broken
+    assert [path for path, _ in received] == paths
+    assert simplify(received[1][1]) == simplify(BatchLinter(CHECKS_IDS).lint_one(appdir))
+    assert received[2] == (crashing_path, {}) and received[3] == (appdir, {})
+
+    errors = [i.getMessage() for i in caplog.records if i.levelname == "ERROR"]
+    assert any(failing_path in i and "unexpected error" in i for i in errors)
+    assert any(crashing_path in i and "BrokenProcessPool" in i for i in errors)
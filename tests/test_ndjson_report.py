@@ -0,0 +1,64 @@
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+
+from appimagelint import models
+from appimagelint.reports import JSONReport, NDJSONReport
+from appimagelint.services.checks_manager import ChecksManager
+
+
+PATHS = [
+    "/tmp/test.AppImage",
+    "/tmp/ünicode.AppImage",
+    # paths which aren't valid UTF-8 are decoded with surrogateescape
+    os.fsdecode(b"/tmp/bad\xff.AppImage"),
+]
+
+
+def make_results():
+    check_cls = ChecksManager.get_class("glibc_abi_check")
+    return OrderedDict([(check_cls, [models.TestResult(True, "glibc_abi_check.test", "Test result")])])
+
+
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(NDJSONReport, "_make_dumps", classmethod(lambda cls: cls._json_dumps))
+
+    return request.param
+
+
+def test_round_trip(serializer, tmp_path):
+    ndjson_path = str(tmp_path / "report.ndjson")
+
+    with NDJSONReport(ndjson_path) as report:
+        for path in PATHS:
+            report.add(path, make_results())
+
+    records = list(NDJSONReport.read(ndjson_path))
+
+    assert [path for path, _ in records] == PATHS
+
+    for _, checks in records:
+        assert checks == JSONReport.checks_to_json(make_results())
+
+
+def test_convert_to_json(serializer, tmp_path):
+    ndjson_path = str(tmp_path / "report.ndjson")
+    json_path = str(tmp_path / "report.json")
+
+    with NDJSONReport(ndjson_path) as report:
+        for path in PATHS:
+            report.add(path, make_results())
+
+    NDJSONReport.convert_to_json(ndjson_path, json_path)
+
+    # the converted report must be the same as the one written directly
+    JSONReport({path: make_results() for path in PATHS}).write(str(tmp_path / "expected.json"))
+
+    with open(json_path) as f, open(str(tmp_path / "expected.json")) as expected_f:
+        assert json.load(f) == json.load(expected_f)
@@ -0,0 +1,52 @@
+import collections
+import os
+import threading
+import time
+
+from appimagelint.services import payload_inventory
+from appimagelint.services.payload_filesystem import DirectoryFilesystem
+from appimagelint.services.payload_inventory import PayloadInventory
+
+
+def test_concurrent_use(appdir, monkeypatch):
+    scanned_dirs = collections.Counter()
+    read_magics = collections.Counter()
+
+    real_scandir = os.scandir
+    real_read_magic = PayloadInventory._read_magic
+
+    # make the races likely by slowing down the lazy fills
+    def slow_scandir(path):
+        scanned_dirs[os.path.relpath(path, appdir)] += 1
+        time.sleep(0.05)
+        return real_scandir(path)
+
+    def slow_read_magic(self, path):
+        read_magics[path] += 1
+        time.sleep(0.05)
+        return real_read_magic(self, path)
+
+    monkeypatch.setattr(payload_inventory.os, "scandir", slow_scandir)
+    monkeypatch.setattr(PayloadInventory, "_read_magic", slow_read_magic)
+
+    inventory = PayloadInventory(DirectoryFilesystem(appdir))
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def run():
+        barrier.wait()
+        results.append((inventory.listdir("usr/bin"), inventory.binaries()))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert all(i == (["ls", "true"], ["AppRun", "usr/bin/ls", "usr/bin/true"]) for i in results)
+
+    assert scanned_dirs and all(i == 1 for i in scanned_dirs.values())
+    assert read_magics and all(i == 1 for i in read_magics.values())
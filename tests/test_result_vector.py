@@ -0,0 +1,94 @@
+import multiprocessing
+import pickle
+from collections import OrderedDict
+
+import pytest
+
+from appimagelint import models
+from appimagelint.services.checks_manager import ChecksManager
+
+
+def make_results():
+    glibc_check, glibcxx_check, icons_check = (
+        ChecksManager.get_class(i) for i in ("glibc_abi_check", "glibcxx_abi_check", "icons_check")
+    )
+
+    return OrderedDict([
+        (icons_check, [
+            models.TestResult(True, "icons.valid_dir_icon", "Valid .DirIcon"),
+            models.TestResult(False, "icons.icons_in_root_dir", "Icons in AppDir root dir: ✗ ünicode"),
+        ]),
+        # checks which didn't yield any results must be kept
+        (glibcxx_check, []),
+        (glibc_check, [
+            models.TestResult(True, "glibc_abi_check.debian_stable", "AppImage can run on Debian stable"),
+            models.TestResult(False, "glibc_abi_check.debian_oldstable", "AppImage can run on Debian oldstable"),
+        ]),
+    ])
+
+
+def simplify(results):
+    return [
+        (check_cls, [(i.success(), i.id(), i.message()) for i in check_results])
+        for check_cls, check_results in results.items()
+    ]
+
+
+def test_round_trip():
+    results = make_results()
+    vector = models.ResultVector(results)
+
+    assert simplify(vector.to_dict()) == simplify(results)
+
+    # Mapping interface
+    assert list(vector) == list(results)
+    assert len(vector) == len(results)
+
+    for check_cls, check_results in results.items():
+        assert check_cls in vector
+        assert simplify({check_cls: vector[check_cls]}) == simplify({check_cls: check_results})
+
+    with pytest.raises(KeyError):
+        vector[ChecksManager.get_class("desktop_files")]
+
+
+def test_empty():
+    vector = models.ResultVector({})
+
+    assert len(vector) == 0
+    assert vector.to_dict() == {}
+
+
+def test_shared_tables():
+    # the values of earlier vectors must not be affected by the ones added later on
+    vectors = [models.ResultVector(make_results()) for _ in range(3)]
+
+    other_results = make_results()
+    for check_results in other_results.values():
+        check_results.append(models.TestResult(True, "other", "Other message"))
+
+    other_vector = models.ResultVector(other_results)
+
+    for vector in vectors:
+        assert simplify(vector) == simplify(make_results())
+
+    assert simplify(other_vector) == simplify(other_results)
+
+
+def _unpickle_in_other_process(data):
+    # the tables are filled in a different order here, the indices must not be relied on
+    models.ResultVector(OrderedDict([
+        (ChecksManager.get_class("desktop_files"), [models.TestResult(True, "other", "Other message")]),
+    ]))
+
+    return simplify(pickle.loads(data))
+
+
+def test_pickle():
+    results = make_results()
+    data = pickle.dumps(models.ResultVector(results))
+
+    assert simplify(pickle.loads(data)) == simplify(results)
+
+    with multiprocessing.get_context("spawn").Pool(1, initializer=ChecksManager.init) as pool:
+        assert pool.apply(_unpickle_in_other_process, (data,)) == simplify(results)
@@ -0,0 +1,245 @@
+import os
+import random
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from appimagelint.services.payload_filesystem import DirectoryFilesystem, SquashfsFilesystem
+from appimagelint.services.squashfs_reader import SquashfsReader
+
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("mksquashfs") is None or shutil.which("unsquashfs") is None,
+    reason="squashfs-tools not available"
+)
+
+
+# maps compressor name to the module the reader needs for it, if any
+COMPRESSORS = {
+    "gzip": None,
+    "xz": None,
+    "lzma": None,
+    "zstd": "zstandard",
+    "lz4": "lz4.block",
+    "lzo": "lzo",
+}
+
+
+def make_source_tree(root):
+    rng = random.Random(0)
+
+    os.makedirs(os.path.join(root, "usr", "bin"))
+    os.makedirs(os.path.join(root, "usr", "share", "empty"))
+    os.makedirs(os.path.join(root, "many"))
+
+    with open(os.path.join(root, "empty.txt"), "wb"):
+        pass
+
+    with open(os.path.join(root, "small.txt"), "w") as f:
+        f.write("hello world\n")
+
+    # spans multiple blocks, mixes incompressible data with sparse (all zero) blocks
+    with open(os.path.join(root, "usr", "bin", "large"), "wb") as f:
+        f.write(bytes(rng.getrandbits(8) for _ in range(300 * 1024)))
+        f.write(b"\0" * 256 * 1024)
+        f.write(b"tail" * 1000)
+
+    os.chmod(os.path.join(root, "usr", "bin", "large"), 0o755)
+
+    # directory indexes and multiple directory headers are used for larger directories
+    for i in range(300):
+        with open(os.path.join(root, "many", "file-{:03d}".format(i)), "w") as f:
+            f.write(str(i) * (i % 7))
+
+    os.symlink("usr/bin/large", os.path.join(root, "relative-link"))
+    os.symlink("/usr/bin/env", os.path.join(root, "absolute-link"))
+    os.symlink("usr/share", os.path.join(root, "dir-link"))
+
+
+@pytest.fixture(scope="module")
+def source_tree(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("squashfs") / "src")
+    make_source_tree(root)
+    return root
+
+
+def build_image(source_tree, image_path, compressor):
+    try:
+        subprocess.check_call(
+            ["mksquashfs", source_tree, image_path, "-comp", compressor, "-noappend", "-no-progress"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    except subprocess.CalledProcessError:
+        pytest.skip("mksquashfs doesn't support {} compression".format(compressor))
+
+
+def extract_image(image_path, target_dir):
+    subprocess.check_call(
+        ["unsquashfs", "-no-progress", "-d", target_dir, image_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+@pytest.fixture
+def squashfs(tmp_path):
+    """
+    Creates the filesystem objects for images, and makes sure the readers are closed, as they're cached per path.
+    """
+
+    filesystems = []
+
+    def open_image(path, offset=None):
+        fs = SquashfsFilesystem(path, offset)
+        filesystems.append(fs)
+        return fs
+
+    yield open_image
+
+    for fs in filesystems:
+        fs.close()
+
+
+def assert_same_contents(fs, extracted):
+    states = fs.file_states()
+    extracted_states = extracted.file_states()
+
+    assert sorted(states) == sorted(extracted_states)
+
+    for path, (mode, size, mtime) in states.items():
+        extracted_mode, extracted_size, extracted_mtime = extracted_states[path]
+
+        assert mode == extracted_mode, path
+        assert int(mtime) == int(extracted_mtime), path
+
+        if fs.is_link(path):
+            assert fs.readlink(path) == extracted.readlink(path)
+            continue
+
+        assert size == extracted_size, path
+
+        with fs.open(path) as f, extracted.open(path) as extracted_f:
+            assert f.read() == extracted_f.read(), path
+
+        buffer = fs.open_buffer(path)
+
+        try:
+            assert len(buffer) == size
+            assert bytes(buffer[:64]) == extracted.open(path).read(64)
+        finally:
+            buffer.close()
+
+    for dirpath, dirnames, filenames in fs.walk():
+        assert sorted(fs.listdir(dirpath)) == sorted(extracted.listdir(dirpath))
+
+
+@pytest.mark.parametrize("compressor", sorted(COMPRESSORS))
+def test_matches_unsquashfs(compressor, source_tree, tmp_path, squashfs):
+    if COMPRESSORS[compressor] is not None:
+        pytest.importorskip(COMPRESSORS[compressor])
+
+    image_path = str(tmp_path / "image.squashfs")
+    build_image(source_tree, image_path, compressor)
+
+    extracted_dir = str(tmp_path / "extracted")
+    extract_image(image_path, extracted_dir)
+
+    assert_same_contents(squashfs(image_path), DirectoryFilesystem(extracted_dir))
+
+
+def test_lookups(source_tree, tmp_path, squashfs):
+    image_path = str(tmp_path / "image.squashfs")
+    build_image(source_tree, image_path, "gzip")
+
+    fs = squashfs(image_path)
+
+    assert fs.is_dir("usr/share/empty")
+    assert fs.listdir("usr/share/empty") == []
+    assert fs.is_file("relative-link")
+    assert fs.is_link("relative-link")
+    assert not fs.is_link("usr/bin/large")
+    assert fs.is_dir("dir-link")
+    assert not fs.exists("does/not/exist")
+
+    with pytest.raises(OSError):
+        fs.readlink("small.txt")
+
+    with pytest.raises(OSError):
+        fs.listdir("does-not-exist")
+
+
+def test_appimage_offset(source_tree, tmp_path, squashfs):
+    image_path = str(tmp_path / "image.squashfs")
+    build_image(source_tree, image_path, "gzip")
+
+    # the runtime is an ELF file, the image is appended to it
+    runtime_path = os.path.realpath(shutil.which("true"))
+    appimage_path = str(tmp_path / "test.AppImage")
+
+    with open(appimage_path, "wb") as f:
+        with open(runtime_path, "rb") as runtime:
+            runtime_data = runtime.read()
+            f.write(runtime_data)
+
+        with open(image_path, "rb") as image:
+            f.write(image.read())
+
+    with open(appimage_path, "rb") as f:
+        assert SquashfsReader.find_payload_offset(f.read()) == len(runtime_data)
+
+    fs = squashfs(appimage_path)
+    image_fs = squashfs(image_path)
+
+    assert fs.file_states() == image_fs.file_states()
+
+    with fs.open("small.txt") as f:
+        assert f.read() == b"hello world\n"
+
+
+def test_not_a_squashfs_image(tmp_path):
+    path = tmp_path / "garbage"
+    path.write_bytes(b"\0" * 4096)
+
+    reader = SquashfsReader(str(path), 0)
+
+    with pytest.raises(Exception):
+        reader.open()
+
+
+@pytest.mark.parametrize("invalid_name", ["..", "a/b"])
+def test_invalid_names(invalid_name, tmp_path, squashfs):
+    source_tree = str(tmp_path / "src")
+    os.makedirs(source_tree)
+
+    # the name is replaced in the image, it must have the same length
+    placeholder = "q" * len(invalid_name)
+
+    with open(os.path.join(source_tree, placeholder), "w") as f:
+        f.write("test")
+
+    image_path = str(tmp_path / "image.squashfs")
+
+    # the directory table must not be compressed, so that the name can be replaced
+    try:
+        subprocess.check_call(
+            ["mksquashfs", source_tree, image_path, "-noI", "-noD", "-noappend", "-no-progress"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    except subprocess.CalledProcessError:
+        pytest.skip("mksquashfs doesn't support uncompressed metadata")
+
+    with open(image_path, "rb") as f:
+        data = f.read()
+
+    # directory entries store the name's size minus one right before the name
+    entry_name = struct.pack("<H", len(placeholder) - 1) + placeholder.encode()
+    assert data.count(entry_name) == 1
+
+    with open(image_path, "wb") as f:
+        f.write(data.replace(entry_name, struct.pack("<H", len(invalid_name) - 1) + invalid_name.encode()))
+
+    fs = squashfs(image_path)
+
+    with pytest.raises(ValueError):
+        fs.listdir("")
@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+
+import pytest
+
+from appimagelint import models
+from appimagelint.services.checks_manager import ChecksManager
+from appimagelint.services.work_queue import WorkQueue, WorkQueueWorker
+
+
+# the races are more likely to show up with more processes than CPUs
+PROCESSES = 8
+
+
+@pytest.fixture
+def work_queue(tmp_path):
+    work_queue = WorkQueue(str(tmp_path / "queue"), lease_timeout=60)
+    work_queue.create()
+    return work_queue
+
+
+def expire_leases(work_queue):
+    claimed_dir = os.path.join(work_queue.directory(), "claimed")
+    expired = time.time() - work_queue.lease_timeout() - 10
+
+    for file_name in os.listdir(claimed_dir):
+        os.utime(os.path.join(claimed_dir, file_name), (expired, expired))
+
+
+def run_concurrently(func, *args):
+    """
+    Run func in several processes at (about) the same time.
+
+    :return: the values returned by each process
+    """
+
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(PROCESSES)
+    results = context.Queue()
+
+    def target(index):
+        barrier.wait()
+        results.put(func(index, *args))
+
+    processes = [context.Process(target=target, args=(i,)) for i in range(PROCESSES)]
+
+    for process in processes:
+        process.start()
+
+    values = [results.get(timeout=60) for _ in processes]
+
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    return values
+
+
+def claim_all(index, work_queue):
+    job_ids = []
+
+    while True:
+        job = work_queue.claim("worker-{}".format(index))
+
+        if job is None:
+            return job_ids
+
+        job_ids.append(job.id)
+
+
+def test_concurrent_claims(work_queue):
+    job_ids = work_queue.enqueue(["/tmp/{}.AppImage".format(i) for i in range(200)])
+
+    claimed = [job_id for job_ids in run_concurrently(claim_all, work_queue) for job_id in job_ids]
+
+    # every job is claimed by exactly one worker
+    assert sorted(claimed) == sorted(job_ids)
+    assert work_queue.counts() == {"pending": 0, "claimed": len(job_ids), "done": 0}
+
+
+def test_claim_order(work_queue):
+    first_ids = work_queue.enqueue(["/tmp/a.AppImage", "/tmp/b.AppImage"])
+    second_ids = work_queue.enqueue(["/tmp/c.AppImage"])
+
+    assert [work_queue.claim("worker").id for _ in range(3)] == first_ids + second_ids
+    assert work_queue.claim("worker") is None
+
+
+def test_concurrent_reclaims(work_queue):
+    job_ids = work_queue.enqueue(["/tmp/{}.AppImage".format(i) for i in range(20)])
+
+    for _ in job_ids:
+        work_queue.claim("crashed-worker")
+
+    # leases which haven't expired yet must not be touched
+    assert work_queue.reclaim_expired() == 0
+
+    expire_leases(work_queue)
+
+    reclaimed = run_concurrently(lambda index: work_queue.reclaim_expired())
+
+    # every expired lease is reclaimed by exactly one process
+    assert sum(reclaimed) == len(job_ids)
+    assert work_queue.counts() == {"pending": len(job_ids), "claimed": 0, "done": 0}
+
+    assert sorted(claim_all(0, work_queue)) == sorted(job_ids)
+
+
+def test_claim_renews_lease(work_queue):
+    work_queue.enqueue(["/tmp/test.AppImage"])
+
+    # the pending file is old, which must not carry over to the lease
+    pending_dir = os.path.join(work_queue.directory(), "pending")
+    for file_name in os.listdir(pending_dir):
+        os.utime(os.path.join(pending_dir, file_name), (0, 0))
+
+    assert work_queue.claim("worker") is not None
+    assert work_queue.reclaim_expired() == 0
+
+
+def make_results():
+    check_cls = ChecksManager.get_class("glibc_abi_check")
+    return OrderedDict([(check_cls, [models.TestResult(True, "glibc_abi_check.test", "Test result")])])
+
+
+def test_complete(work_queue):
+    work_queue.enqueue(["/tmp/a.AppImage", "/tmp/b.AppImage"])
+
+    job = work_queue.claim("worker")
+    work_queue.complete(job, make_results())
+
+    assert work_queue.is_done(job.id)
+    assert work_queue.counts() == {"pending": 1, "claimed": 0, "done": 1}
+
+    results = list(work_queue.results())
+    assert [path for path, _ in results] == ["/tmp/a.AppImage", "/tmp/b.AppImage"]
+
+    (check_cls, check_results), = results[0][1].items()
+    assert check_cls.id() == "glibc_abi_check"
+    assert [(i.success(), i.id(), i.message()) for i in check_results] == [
+        (True, "glibc_abi_check.test", "Test result"),
+    ]
+
+    # unfinished jobs have no results yet
+    assert results[1][1] is None
+
+
+def test_complete_after_reclaim(work_queue, caplog):
+    job_id, = work_queue.enqueue(["/tmp/test.AppImage"])
+
+    job = work_queue.claim("slow-worker")
+
+    expire_leases(work_queue)
+    assert work_queue.reclaim_expired() == 1
+
+    with pytest.raises(FileNotFoundError):
+        work_queue.renew(job)
+
+    # the slow worker finishes after all, which must not fail
+    work_queue.complete(job, make_results())
+    assert any("expired before it was finished" in i.getMessage() for i in caplog.records)
+
+    # the job must not be run again
+    assert work_queue.claim("other-worker") is None
+    assert work_queue.counts() == {"pending": 0, "claimed": 0, "done": 1}
+
+
+def test_worker(work_queue, appdir):
+    work_queue.enqueue([appdir], checks_ids=["glibc_abi_check"])
+
+    worker = WorkQueueWorker(work_queue)
+
+    assert worker.run_one()
+    assert not worker.run_one()
+
+    (path, results), = work_queue.results()
+
+    assert path == appdir
+    assert [check_cls.id() for check_cls in results] == ["glibc_abi_check"]
+
+
+def test_worker_error(work_queue, tmp_path, caplog):
+    path = str(tmp_path / "missing.AppImage")
+    work_queue.enqueue([path], checks_ids=["glibc_abi_check"])
+
+    assert WorkQueueWorker(work_queue).run_one()
+
+    assert list(work_queue.results()) == [(path, OrderedDict())]
+
+    # the actual error must be recorded along with the job, not just in the worker's log
+    assert any(
+        "job for AppImage {} failed: FileNotFoundError".format(path) in i.getMessage() for i in caplog.records
+    )